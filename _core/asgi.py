@@ -2,6 +2,8 @@
 ASGI config for _core project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+HTTP requests go to Django; WebSocket connections go to the real-time voice
+conversation endpoint (app.voices.realtime).
 
 For more information on this file, see
 https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
@@ -11,6 +13,18 @@ import os
 
 from django.core.asgi import get_asgi_application
 
-os.environ.setdefault('DJANGO_SETTINGS_MODULE', '_core.settings')
+from _core.settings.base import DEBUG
 
-application = get_asgi_application()
+# Same settings selection as manage.py
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', '_core.settings.local' if DEBUG else '_core.settings.production')
+
+django_application = get_asgi_application()
+
+# Imported after Django is set up, since it uses the auth models.
+from app.voices.realtime import websocket_application  # noqa: E402
+
+
+async def application(scope, receive, send):
+    if scope["type"] == "websocket":
+        return await websocket_application(scope, receive, send)
+    return await django_application(scope, receive, send)
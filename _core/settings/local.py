@@ -11,6 +11,7 @@ from _core.settings.settings_tweaks.db_config import LOCAL_SQLITE_CONFIG
 from _core.settings.settings_tweaks.caches_config import LOCAL_CACHE_CONFIG
 from _core.settings.settings_tweaks.network_ip_config import LOCAL_ALLOWED_HOST,LOCAL_INTERNAL_IP
 from _core.settings.settings_tweaks.middleware_config import LOCAL_MIDDLEWARE_ADDED
+from _core.settings.settings_tweaks.voice_config import VOICE_MEDIA_STORE_CONFIG, VOICE_WORKER_CONFIG
 from _core.settings.settings_tweaks.django_admin_env_notice_config import *  # noqa: F403
 load_dotenv()
 ENV = os.getenv('DJANGO_ENV', 'local')
@@ -60,6 +61,8 @@ CACHES = LOCAL_CACHE_CONFIG
 LOGGING = LOGGER_SETTINGS
 REST_FRAMEWORK = LOCAL_REST_FRAMEWORK_SETTINGS
 JAZZMIN_SETTINGS = JAZZMIN_DISPAY_SETTING
+VOICE_WORKER = VOICE_WORKER_CONFIG
+VOICE_MEDIA_STORE = VOICE_MEDIA_STORE_CONFIG
 
 # Stripe:
 STRIPE_SECRET_KEY=os.getenv("STRIPE_SECRET_KEY")
@@ -7,6 +7,7 @@ from _core.settings.settings_tweaks.rest_framework_settings import LOCAL_REST_FR
 from _core.settings.settings_tweaks.app_config import PRIORITY_APP,DJANGO_BUILT_IN_APP,PRODUCTION_APP,CUSTOM_APP
 from _core.settings.settings_tweaks.network_ip_config import PRODUCTION_ALLOWED_HOST
 from _core.settings.settings_tweaks.cors_config import PRODUCTION_ALLOWED_ORIGIN
+from _core.settings.settings_tweaks.voice_config import VOICE_MEDIA_STORE_CONFIG, VOICE_WORKER_CONFIG
 from _core.settings.settings_tweaks.django_admin_env_notice_config import *  # noqa: F403
 load_dotenv()
 ENV = os.getenv('DJANGO_ENV', 'production')
@@ -24,6 +25,8 @@ CORS_ALLOW_CREDENTIALS = True
 
 WSGI_APPLICATION = '_core.wsgi.application'
 REST_FRAMEWORK = LOCAL_REST_FRAMEWORK_SETTINGS
+VOICE_WORKER = VOICE_WORKER_CONFIG
+VOICE_MEDIA_STORE = VOICE_MEDIA_STORE_CONFIG
 
 
 SESSION_COOKIE_HTTPONLY = True
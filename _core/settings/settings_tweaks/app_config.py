@@ -39,5 +39,6 @@ CUSTOM_APP = [
     "app.dashboard",
     "app.subscribtions",
     "app.stripe",
+    "app.voices",
 ]
 
@@ -0,0 +1,40 @@
+import os
+
+VOICE_WORKER_CONFIG = {
+    # Pipeline jobs one run_voice_worker process runs at the same time.
+    "CONCURRENCY": 2,
+    "MAX_ATTEMPTS": 3,
+    # Retry delay is RETRY_BACKOFF_SECONDS * 2 ** (attempt - 1).
+    "RETRY_BACKOFF_SECONDS": 30,
+    "POLL_INTERVAL_SECONDS": 2,
+    # RUNNING jobs whose worker hasn't renewed their lease for this long are assumed
+    # orphaned by a dead worker and requeued.
+    "LEASE_SECONDS": 600,
+    # How often a worker renews the leases of the jobs it is running.
+    "HEARTBEAT_SECONDS": 60,
+    # How often the worker reconciles the Voice table with the vendor account.
+    "VOICE_SYNC_INTERVAL_SECONDS": 6 * 3600,
+    # Share of worker slots per subscription tier while several tiers are waiting
+    # (a tier alone in the queue gets every slot).
+    "TIER_WEIGHTS": {"YEARLY": 6, "MONTHLY": 3, "FREE": 1},
+    # Jobs one user may have running at the same time, per tier.
+    "MAX_RUNNING_PER_USER": {"YEARLY": 3, "MONTHLY": 2, "FREE": 1},
+}
+
+
+VOICE_MEDIA_STORE_CONFIG = {
+    # Generated audio not served for this long is deleted.
+    "TTL_SECONDS": 7 * 24 * 3600,
+    # Least recently used audio is deleted once the store grows past this.
+    "MAX_BYTES": 2 * 1024 * 1024 * 1024,
+    # How often run_voice_worker garbage-collects the store.
+    "GC_INTERVAL_SECONDS": 3600,
+    # Files touched this recently are never collected: a put() of the same audio
+    # refreshes the file before it writes its row.
+    "WRITE_GRACE_SECONDS": 60,
+    # Hand audio downloads to the front proxy instead of streaming them from Python:
+    # "nginx" (X-Accel-Redirect), "apache" (X-Sendfile, also lighttpd) or "" to serve directly.
+    "SENDFILE_BACKEND": os.getenv("VOICE_SENDFILE_BACKEND", ""),
+    # nginx `internal` location that maps onto GENERATED_AUDIO_DIR.
+    "ACCEL_REDIRECT_PREFIX": os.getenv("VOICE_ACCEL_REDIRECT_PREFIX", "/protected/generated-audio/"),
+}
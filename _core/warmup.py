@@ -0,0 +1,98 @@
+"""
+Warm-up for preforking servers (see gunicorn.conf.py).
+
+Runs once in the gunicorn master after the app is loaded and before workers are
+forked, so everything it imports or caches is shared copy-on-write by all workers
+instead of being rebuilt by each worker on its first requests.
+"""
+import importlib
+import time
+
+# Voice feature modules and the libraries they import lazily (see
+# app.features.voice_cloning); loaded here once instead of per worker on first use.
+VOICE_MODULES = [
+    "app.features.voice_cloning.production",
+    "app.features.voice_cloning.conversation",
+    "app.features.voice_cloning.stt",
+    "scipy.signal",
+    "noisereduce",
+    "pydub",
+    "soundfile",
+    "openai",
+    "elevenlabs.client",
+]
+
+
+def _import_urlconf():
+    from django.urls import get_resolver
+
+    resolver = get_resolver()
+    # Imports every view (and with them the serializers) and builds the reverse() tables.
+    resolver.reverse_dict
+    for pattern in resolver.url_patterns:
+        getattr(pattern, "url_patterns", None)
+
+
+def _load_translations():
+    from django.conf import settings
+    from django.utils import translation
+
+    translation.activate(settings.LANGUAGE_CODE)
+    translation.gettext("")
+    translation.deactivate()
+
+
+def _load_templates():
+    from django.template.loader import get_template
+
+    for name in ("Error/404.html", "Error/500.html"):
+        get_template(name)
+
+
+def _load_voice_features():
+    for module in VOICE_MODULES:
+        importlib.import_module(module)
+
+    from app.features.voice_cloning.filters import highpass_coefficients
+    from app.features.voice_cloning.production import STREAM_SAMPLE_RATE
+
+    highpass_coefficients(STREAM_SAMPLE_RATE)
+
+
+def _close_connections():
+    # Sockets opened here would be shared by every forked worker.
+    from django.core.cache import caches
+    from django.db import connections
+
+    connections.close_all()
+    caches.close_all()
+
+
+def warm_up(voice=True, log=print):
+    """
+    Import and prime what the first requests would otherwise pay for: URLconf, views
+    and serializers, translations, error templates, and (with voice=True) the audio
+    libraries and vendor SDKs. No vendor clients or connections are left open.
+
+    Returns:
+        dict: Seconds spent per step; a failing step is logged and skipped.
+    """
+    steps = [
+        ("urlconf", _import_urlconf),
+        ("translations", _load_translations),
+        ("templates", _load_templates),
+    ]
+    if voice:
+        steps.append(("voice", _load_voice_features))
+
+    timings = {}
+    for name, step in steps:
+        started = time.perf_counter()
+        try:
+            step()
+        except Exception as e:
+            log(f"Warm-up step {name} failed: {e}")
+            continue
+        timings[name] = time.perf_counter() - started
+    _close_connections()
+    return timings
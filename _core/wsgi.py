@@ -2,6 +2,7 @@
 WSGI config for _core project.
 
 It exposes the WSGI callable as a module-level variable named ``application``.
+In production it is served by gunicorn with the settings in gunicorn.conf.py.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/4.2/howto/deployment/wsgi/
@@ -11,6 +12,9 @@ import os
 
 from django.core.wsgi import get_wsgi_application
 
-os.environ.setdefault('DJANGO_SETTINGS_MODULE', '_core.settings')
+from _core.settings.base import DEBUG
+
+# Same settings selection as manage.py
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', '_core.settings.local' if DEBUG else '_core.settings.production')
 
 application = get_wsgi_application()
@@ -40,6 +40,11 @@ class UserProfile(models.Model):
     )
     subscription_start = models.DateTimeField(null=True, blank=True)
     subscription_end = models.DateTimeField(null=True, blank=True)
+
+    # Fixed phrases spoken in the user's voice; their audio is pre-generated
+    # (app.voices.phrases) whenever they or the voice change.
+    distinct_greeting = models.CharField(max_length=500, blank=True)
+    distinct_goodbye = models.CharField(max_length=500, blank=True)
     
     def __str__(self):
         return f"Profile of {self.user.full_name} ({self.user.email})"
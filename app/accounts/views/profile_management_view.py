@@ -1,4 +1,5 @@
 from app.accounts.serializers.profile_serializers import UserProfileSerializer
+from app.voices.phrases import PHRASE_FIELDS, queue_phrase_audio
 from drf_yasg.utils import swagger_auto_schema
 from rest_framework.response import Response
 from rest_framework import status,permissions
@@ -26,5 +27,7 @@ class ProfileView(APIView):
         serializer = UserProfileSerializer(profile, data=request.data, partial=True)
         if serializer.is_valid():
             serializer.save()
+            if PHRASE_FIELDS.values() & request.data.keys():
+                queue_phrase_audio(request.user)
             return Response(serializer.data)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
\ No newline at end of file
@@ -0,0 +1,75 @@
+"""
+Voice cloning, AI replies and speech for Tether.
+
+Importing the package is cheap. The public functions below resolve to their
+submodules on first attribute access (PEP 562). Inside the submodules, the audio
+libraries (scipy, noisereduce, pydub) and the vendor SDKs (openai, elevenlabs) are
+imported at first use, and API clients are created on the first call (clients.py).
+Django code should call through the package, e.g.
+
+    from app.features import voice_cloning
+    voice_cloning.run_voice_assistant_pipeline_concurrent(...)
+
+so gunicorn workers and management commands that never touch a voice feature
+never load them. `python manage.py import_report` tracks what importing costs.
+"""
+import importlib
+import os
+from pathlib import Path
+
+_EXPORTS = {
+    "AudioIngestError": "ingest",
+    "calibrate_noise_profile": "clone",
+    "default_voice_id": "production",
+    "default_voice_name": "production",
+    "ElevenLabsNotConfigured": "rate_limit",
+    "ElevenLabsTranscriber": "stt",
+    "get_elevenlabs_client": "clients",
+    "get_media_store": "media_store",
+    "get_openai_client": "clients",
+    "INPUT_SAMPLE_RATE": "conversation",
+    "MediaProbeError": "media_probe",
+    "MIN_SAMPLE_SECONDS": "clone",
+    "NoVoiceError": "production",
+    "OUTPUT_SAMPLE_RATE": "conversation",
+    "remove_noise_and_clone_voice": "clone",
+    "resolve_voice_id": "registry",
+    "run_voice_assistant_pipeline": "production",
+    "run_voice_assistant_pipeline_concurrent": "production",
+    "store_generated_audio": "media_store",
+    "stream_voice_assistant_reply": "production",
+    "synthesize_filtered_mp3": "production",
+    "validate_upload": "media_probe",
+    "voice_available_to": "registry",
+    "VoiceConversation": "conversation",
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f"{__name__}.{module}"), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
+
+
+def load_env():
+    """Load .env and .env/.<DJANGO_ENV> from the project root, like the Django settings do."""
+    from dotenv import load_dotenv
+
+    base_dir = Path(__file__).resolve().parents[3]
+    load_dotenv()
+    load_dotenv(dotenv_path=base_dir / ".env" / f".{os.getenv('DJANGO_ENV', 'local')}")
+
+
+if "DJANGO_SETTINGS_MODULE" not in os.environ:
+    # Standalone runs (python -m app.features.voice_cloning.<module>); under Django
+    # the settings module has already loaded the environment.
+    load_env()
@@ -0,0 +1,194 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+
+# Latency benchmark for the voice pipeline stages. By default it runs against
+# fake_vendors, so it costs nothing and is repeatable; pass --live to hit the real
+# vendor endpoints configured in the environment.
+
+SAMPLE_USER_DATA = {
+    "name": "Alex",
+    "relationship": "daughter",
+    "distinct_greeting": "Hey sunshine, how was your day?",
+}
+PERCENTILES = (50, 95, 99)
+
+
+def _stages(sample_path):
+    """Stage name -> callable(iteration); callables returning an iterator are timed to first chunk."""
+    from app.features.voice_cloning import production
+    from app.features.voice_cloning.clients import get_elevenlabs_client
+    from app.features.voice_cloning.clone import remove_noise_and_clone_voice
+    from app.features.voice_cloning.stt import ElevenLabsTranscriber
+
+    voice_id = production.default_voice_id or "benchmark-voice"
+
+    def user_data(iteration):
+        # Vary the request so neither the TTS cache nor the vendor can replay it.
+        return {**SAMPLE_USER_DATA, "benchmark_run": iteration}
+
+    def sentence(iteration):
+        return f"This is benchmark sentence number {iteration}, spoken at a natural pace."
+
+    return {
+        "chat": lambda i: production._generate_reply_text(user_data(i)),
+        "chat_stream": lambda i: production._stream_reply_text(user_data(i)),
+        "tts": lambda i: production.synthesize_filtered_mp3(voice_id, sentence(i)),
+        "tts_stream": lambda i: get_elevenlabs_client().text_to_speech.stream(
+            voice_id=voice_id,
+            text=sentence(i),
+            model_id=production.TTS_MODEL_ID,
+            output_format=production.STREAM_OUTPUT_FORMAT,
+        ),
+        "clone": lambda i: remove_noise_and_clone_voice(sample_path, f"benchmark-{i}", skip_noise_reduction=True),
+        "stt": lambda i: ElevenLabsTranscriber().transcribe(sample_path),
+        # Skip the WAV header, so the first chunk is the first audible audio.
+        "reply_stream": lambda i: _after_first(production.stream_voice_assistant_reply(user_data(i), voice_id)),
+    }
+
+
+def _after_first(iterator):
+    next(iterator, None)
+    return iterator
+
+
+def _write_sample(directory) -> str:
+    from app.features.voice_cloning.ingest import encode_wav
+
+    t = np.arange(16000 * 12) / 16000
+    voice_like = 0.3 * np.sin(2 * np.pi * 180 * t) * (0.6 + 0.4 * np.sin(2 * np.pi * 3 * t))
+    path = os.path.join(directory, "benchmark_sample.wav")
+    with open(path, "wb") as f:
+        f.write(encode_wav(voice_like.astype(np.float32), 16000))
+    return path
+
+
+def measure(func, iteration):
+    """(time to first byte, total time) in seconds for one call."""
+    start = time.perf_counter()
+    result = func(iteration)
+    if isinstance(result, dict) and "error" in result:
+        raise RuntimeError(result["error"])
+    first = None
+    if hasattr(result, "__next__"):
+        for _ in result:
+            if first is None:
+                first = time.perf_counter() - start
+    total = time.perf_counter() - start
+    return (first if first is not None else total), total
+
+
+def summarize(samples) -> dict:
+    summary = {"count": len(samples["total"]), "errors": samples["errors"]}
+    for metric in ("ttfb", "total"):
+        values = np.asarray(samples[metric]) * 1000
+        for p in PERCENTILES:
+            summary[f"{metric}_p{p}_ms"] = round(float(np.percentile(values, p)), 1) if len(values) else None
+    return summary
+
+
+def run_benchmark(stages, iterations=20, warmup=2, only=None):
+    results = {}
+    for name, func in stages.items():
+        if only and name not in only:
+            continue
+        samples = {"ttfb": [], "total": [], "errors": 0}
+        for iteration in range(warmup + iterations):
+            try:
+                ttfb, total = measure(func, iteration)
+            except Exception as e:
+                samples["errors"] += 1
+                print(f"⚠️ {name} failed: {e}", file=sys.stderr)
+                continue
+            if iteration >= warmup:
+                samples["ttfb"].append(ttfb)
+                samples["total"].append(total)
+        results[name] = summarize(samples)
+    return results
+
+
+def format_report(results) -> str:
+    header = f"{'stage':<14}{'n':>4}{'err':>5}" + "".join(
+        f"{f'{metric} p{p}':>13}" for metric in ("ttfb", "total") for p in PERCENTILES
+    )
+    lines = [header, "-" * len(header)]
+    for name, summary in results.items():
+        cells = "".join(
+            f"{summary[f'{metric}_p{p}_ms']:>11}ms" if summary[f"{metric}_p{p}_ms"] is not None else f"{'-':>13}"
+            for metric in ("ttfb", "total") for p in PERCENTILES
+        )
+        lines.append(f"{name:<14}{summary['count']:>4}{summary['errors']:>5}{cells}")
+    return "\n".join(lines)
+
+
+def find_regressions(results, baseline, tolerance) -> list:
+    """Stages whose p95 (first byte or total) grew by more than tolerance over baseline."""
+    regressions = []
+    for name, summary in results.items():
+        for key in ("ttfb_p95_ms", "total_p95_ms"):
+            before, after = baseline.get(name, {}).get(key), summary.get(key)
+            if before and after and after > before * (1 + tolerance):
+                regressions.append(f"{name} {key}: {before}ms -> {after}ms")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure per-stage latency of the voice pipeline.")
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--stage", action="append", help="Only run this stage (repeatable)")
+    parser.add_argument("--live", action="store_true", help="Use the real vendor endpoints")
+    parser.add_argument("--profile", help="JSON file overriding the fake latency profiles")
+    parser.add_argument("--latency-scale", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="Write the results to this file")
+    parser.add_argument("--baseline", help="Fail if p95 regressed against this results file")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix="voice-benchmark-")
+    # Start from an empty TTS cache, so cache hits don't hide vendor latency.
+    os.environ["TTS_CACHE_DIR"] = os.path.join(workdir, "tts_cache")
+    os.environ.pop("TTS_CACHE_REDIS_URL", None)
+
+    server = None
+    if not args.live:
+        from app.features.voice_cloning.fake_vendors import FakeVendorServer, load_profiles
+
+        config = json.load(open(args.profile)) if args.profile else None
+        server = FakeVendorServer(profiles=load_profiles(config, args.latency_scale), seed=args.seed).start()
+        os.environ["OPENAI_BASE_URL"] = f"{server.base_url}/v1"
+        os.environ["ELEVENLABS_BASE_URL"] = server.base_url
+        os.environ.setdefault("OPENAI_API_KEY", "fake")
+        os.environ.setdefault("ELEVENLABS_API_KEY", "fake")
+        print(f"🧪 Using fake vendors on {server.base_url}")
+
+    from app.features.voice_cloning.clients import reset_clients
+    reset_clients()
+
+    try:
+        results = run_benchmark(_stages(_write_sample(workdir)), args.iterations, args.warmup, args.stage)
+    finally:
+        if server is not None:
+            server.stop()
+
+    print(format_report(results))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = find_regressions(results, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"❌ Regression: {regression}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
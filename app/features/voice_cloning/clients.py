@@ -0,0 +1,198 @@
+import os
+import threading
+import time
+from typing import TYPE_CHECKING
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+if TYPE_CHECKING:
+    from elevenlabs.client import ElevenLabs
+    from openai import OpenAI
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+# A 5xx to a POST may come after the vendor did the work (e.g. created a voice),
+# so only these methods are retried on it; a 429 was refused and is always retried.
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def _setting(name, default, cast=float):
+    value = os.getenv(name)
+    return cast(value) if value not in (None, "") else default
+
+
+def pool_size() -> int:
+    return _setting("VOICE_HTTP_POOL_SIZE", 10, int)
+
+
+def max_retries() -> int:
+    return _setting("VOICE_HTTP_MAX_RETRIES", 2, int)
+
+
+def backoff_factor() -> float:
+    return _setting("VOICE_HTTP_BACKOFF_FACTOR", 0.5)
+
+
+def http_timeout():
+    """(connect, read) timeouts in seconds, for requests-style calls."""
+    return _setting("VOICE_HTTP_CONNECT_TIMEOUT", 5.0), _setting("VOICE_HTTP_READ_TIMEOUT", 60.0)
+
+
+def elevenlabs_base_url() -> str:
+    """ElevenLabs API root; ELEVENLABS_BASE_URL points it elsewhere, e.g. at fake_vendors."""
+    return (os.getenv("ELEVENLABS_BASE_URL") or "https://api.elevenlabs.io").rstrip("/")
+
+
+def _httpx_timeout() -> httpx.Timeout:
+    connect, read = http_timeout()
+    return httpx.Timeout(read, connect=connect)
+
+
+def _httpx_limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=pool_size(),
+        max_keepalive_connections=pool_size(),
+        keepalive_expiry=60,
+    )
+
+
+def report_throttled(api_key, seconds):
+    """Put an ElevenLabs key that got a 429 on cool-down, so other calls use other keys."""
+    if not api_key:
+        return
+    from app.features.voice_cloning.rate_limit import get_rate_limiter
+
+    try:
+        get_rate_limiter().cool_down(api_key, seconds)
+    except Exception as e:
+        print(f"⚠️ Could not record ElevenLabs throttling: {e}")
+
+
+def should_retry(method: str, status_code: int) -> bool:
+    if status_code == 429:
+        return True
+    return status_code in RETRY_STATUSES and method.upper() in IDEMPOTENT_METHODS
+
+
+class RetryTransport(httpx.HTTPTransport):
+    """
+    Keep-alive transport that also retries throttled responses (and, for idempotent
+    methods, unavailable ones) with exponential backoff, honoring Retry-After.
+    Connection errors are retried by HTTPTransport itself.
+
+    Inside a resilience.vendor_call the wait never outlasts the call's deadline:
+    when it would, the response is returned as is and the caller decides.
+    """
+
+    def handle_request(self, request):
+        from app.features.voice_cloning.resilience import remaining_deadline
+
+        attempt = 0
+        while True:
+            response = super().handle_request(request)
+            if not should_retry(request.method, response.status_code) or attempt >= max_retries():
+                return response
+            delay = backoff_factor() * 2 ** attempt
+            retry_after = response.headers.get("retry-after")
+            if retry_after and retry_after.replace(".", "", 1).isdigit():
+                delay = max(delay, float(retry_after))
+            if response.status_code == 429:
+                report_throttled(request.headers.get("xi-api-key"), delay)
+            remaining = remaining_deadline()
+            if remaining is not None and delay >= remaining:
+                return response
+            response.close()
+            time.sleep(delay)
+            attempt += 1
+
+
+def _get_or_create(name, factory):
+    with _clients_lock:
+        if name not in _clients:
+            _clients[name] = factory()
+        return _clients[name]
+
+
+def get_openai_client() -> "OpenAI":
+    """Process-wide OpenAI client on a pooled keep-alive connection."""
+    def build():
+        # The SDKs are imported on first use; they are slow to import and most
+        # processes (migrations, crons) never call a vendor.
+        from openai import OpenAI
+
+        http_client = httpx.Client(
+            transport=httpx.HTTPTransport(retries=max_retries(), limits=_httpx_limits()),
+            timeout=_httpx_timeout(),
+        )
+        # The OpenAI SDK retries 429/5xx itself, with backoff.
+        return OpenAI(
+            api_key=os.getenv("OPENAI_API_KEY"),
+            base_url=os.getenv("OPENAI_BASE_URL") or None,
+            http_client=http_client,
+            timeout=_httpx_timeout(),
+            max_retries=max_retries(),
+        )
+    return _get_or_create("openai", build)
+
+
+def get_elevenlabs_client(api_key=None) -> "ElevenLabs":
+    """Process-wide ElevenLabs client (one per API key) on a pooled keep-alive connection."""
+    api_key = api_key or os.getenv("ELEVENLABS_API_KEY")
+
+    def build():
+        from elevenlabs.client import ElevenLabs
+
+        http_client = httpx.Client(
+            transport=RetryTransport(retries=max_retries(), limits=_httpx_limits()),
+            timeout=_httpx_timeout(),
+        )
+        return ElevenLabs(
+            api_key=api_key,
+            base_url=elevenlabs_base_url(),
+            httpx_client=http_client,
+            timeout=_httpx_timeout().read,
+        )
+    return _get_or_create(f"elevenlabs:{api_key}", build)
+
+
+def get_http_session() -> requests.Session:
+    """
+    Process-wide requests session for plain REST calls (e.g. speech-to-text).
+
+    Only idempotent methods are retried on a status; a POST is retried just on
+    connection errors, before anything was sent, and its 429s are left to the
+    caller (see stt.transcribe_bytes).
+    """
+    def build():
+        session = requests.Session()
+        retry = Retry(
+            total=max_retries(),
+            backoff_factor=backoff_factor(),
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=IDEMPOTENT_METHODS,
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size(), max_retries=retry)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+    return _get_or_create("http_session", build)
+
+
+def get_redis_client(url):
+    """Process-wide Redis connection pool per URL."""
+    def build():
+        import redis
+        return redis.Redis.from_url(url)
+    return _get_or_create(f"redis:{url}", build)
+
+
+def reset_clients():
+    """Drop every cached client, e.g. in a freshly forked worker process."""
+    with _clients_lock:
+        _clients.clear()
@@ -1,166 +1,148 @@
 import os
-import tempfile
-import noisereduce as nr
-import soundfile as sf
-from dotenv import load_dotenv
-from elevenlabs.client import ElevenLabs
-from pydub import AudioSegment
 import traceback
-from pydub import AudioSegment
+from app.features.voice_cloning.clients import get_elevenlabs_client
+from app.features.voice_cloning.denoise import (
+    estimate_noise_profile,
+    leading_silence,
+    reduce_noise_parallel,
+    spectral_gate,
+)
+from app.features.voice_cloning.ingest import decode_upload, encode_wav
+from app.features.voice_cloning.media_probe import validate_upload
+from app.features.voice_cloning.rate_limit import ElevenLabsNotConfigured, elevenlabs_slot, get_rate_limiter
+from app.features.voice_cloning.registry import (
+    lookup_cloned_voice,
+    lookup_noise_profile,
+    remember_cloned_voice,
+    remember_noise_profile,
+    sample_fingerprint,
+)
+from app.features.voice_cloning.resilience import vendor_call
+from app.features.voice_cloning.vad import select_best_speech, trim_silence
 
-# ✅ Load environment variables
-load_dotenv()
-
-# # ✅ Set your actual ffmpeg and ffprobe paths
-
-ffmpeg_path = os.getenv("FFMPEG_PATH")
-ffprobe_path = os.getenv("FFPROBE_PATH")
 clone_name= os.getenv("ELEVENLABS_VOICE_NAME")
+MIN_SAMPLE_SECONDS = 10
+
+
+def calibrate_noise_profile(source, owner, device_id=""):
+    """
+    Store the noise profile for a user's device from a calibration clip (room tone
+    only, no speech). Later samples from that device are denoised against it.
+    """
+    audio = decode_upload(source)
+    profile = estimate_noise_profile(audio.samples)
+    remember_noise_profile(owner, device_id, audio.sample_rate, profile, "CALIBRATION")
+    print(f"🎚️ Noise profile calibrated for device '{device_id or 'default'}'")
+    return profile
+
+
+def _reduce_noise(audio, samples, owner=None, device_id=""):
+    """
+    Denoise samples (a trimmed excerpt of audio). Gates against the owner's stored
+    noise profile when there is one, or when one can be taken from the untrimmed
+    audio's leading silence; otherwise runs the adaptive pass.
+    """
+    profile = lookup_noise_profile(owner, device_id, audio.sample_rate)
+    if profile is None and owner is not None:
+        silence = leading_silence(audio.samples, audio.sample_rate)
+        if silence is not None:
+            profile = estimate_noise_profile(silence)
+            remember_noise_profile(owner, device_id, audio.sample_rate, profile, "LEADING_SILENCE")
+            print("🎚️ Noise profile estimated from leading silence")
+
+    if profile is not None:
+        print("⚡ Using stationary noise profile")
+        return spectral_gate(samples, profile)
+    return reduce_noise_parallel(samples, audio.sample_rate)
+
+
+def remove_noise_and_clone_voice(input_audio_path, clone_name, skip_noise_reduction=False, owner=None, device_id=""):
+    """
+    Remove noise (optional) and clone voice using ElevenLabs.
+
+    The container header is probed first so unreadable or too-short uploads are
+    rejected without decoding them. Accepted uploads are decoded once into a mono
+    16kHz buffer; silence trimming, noise reduction and the WAV sent to ElevenLabs
+    work from memory, and only the best CLONE_SAMPLE_SECONDS of speech are uploaded.
+    Samples already cloned for the same owner and clone name are resolved from the
+    local Voice table by content hash, without calling the vendor. Noise
+    reduction reuses the owner's stationary noise profile for device_id when one
+    is stored.
+    """
+    description = "a person talking"
 
-AudioSegment.converter = ffmpeg_path
-AudioSegment.ffprobe = ffprobe_path
-
-def convert_m4a_to_wav(input_path):
-    """Convert .m4a to .wav (mono, 16kHz, PCM 16-bit) and verify the output file."""
-    print("🔄 Converting .m4a to .wav (mono, 16kHz, PCM 16-bit)...")
-    output_path = tempfile.mktemp(suffix=".wav")
+    # Check the container metadata before paying for a full decode
     try:
-        audio = AudioSegment.from_file(input_path, format="m4a")
-        audio = audio.set_channels(1).set_frame_rate(16000)
-        # Ensure PCM 16-bit encoding
-        audio.export(output_path, format="wav", parameters=["-acodec", "pcm_s16le"])
-        # Verify if the output file exists and is playable
-        if os.path.exists(output_path) and os.path.getsize(output_path) > 0:
-            print(f"✅ Converted WAV file created: {output_path}")
-            try:
-                # Try loading the file to ensure it's not corrupted
-                AudioSegment.from_file(output_path, format="wav")
-                print(f"✅ Converted WAV file is playable")
-            except Exception as e:
-                print(f"❌ Converted WAV file is corrupted: {str(e)}")
-                raise Exception("Converted WAV file is not valid")
-        else:
-            print(f"❌ Failed to create WAV file: {output_path}")
-            raise Exception("WAV conversion failed")
-        return output_path
+        info = validate_upload(input_audio_path, min_duration=MIN_SAMPLE_SECONDS)
+        print(f"✅ Audio duration: {info.duration:.2f} seconds ({info.codec}, {info.channels}ch, {info.sample_rate}Hz)")
     except Exception as e:
-        print(f"❌ Error during conversion: {str(e)}")
+        print(f"❌ Error validating audio: {str(e)}")
         raise e
 
-def remove_noise_and_clone_voice(input_audio_path, clone_name, skip_noise_reduction=False):
-    """Remove noise (optional) and clone voice using ElevenLabs."""
-    description = "a person talking"
-
-    # Verify input file
-    if not os.path.exists(input_audio_path):
-        raise Exception(f"Input file does not exist: {input_audio_path}")
-
-    # Convert .m4a to .wav if needed
-    temp_audio_path = input_audio_path
-    if input_audio_path.lower().endswith(".m4a"):
-        temp_audio_path = convert_m4a_to_wav(input_audio_path)
-
-    # Read WAV audio
-    print("📥 Reading WAV audio...")
+    print("📥 Decoding audio (mono, 16kHz, PCM 16-bit)...")
     try:
-        audio_data, sample_rate = sf.read(temp_audio_path)
-        print(f"🎧 Audio shape: {audio_data.shape}, Sample rate: {sample_rate}")
-        # Check if audio duration is sufficient (at least 10 seconds)
-        duration = len(audio_data) / sample_rate
-        if duration < 10:
-            raise Exception(f"Audio duration ({duration:.2f} seconds) is too short. Minimum 10 seconds required.")
-        print(f"✅ Audio duration: {duration:.2f} seconds")
+        audio = decode_upload(input_audio_path)
     except Exception as e:
-        print(f"❌ Error reading WAV file: {str(e)}")
-        if temp_audio_path != input_audio_path:
-            os.remove(temp_audio_path)
+        print(f"❌ Error decoding audio: {str(e)}")
         raise e
 
+    # Check for an identical sample cloned earlier
+    sample_hash = sample_fingerprint(audio.pcm, audio.sample_rate)
+    existing_voice_id = lookup_cloned_voice(sample_hash, clone_name, owner)
+    if existing_voice_id:
+        print(f"✅ Sample already cloned as '{clone_name}' with ID: {existing_voice_id}")
+        return existing_voice_id
+
+    # Drop dead air and keep the best stretch of speech
+    speech, report = trim_silence(audio.samples, audio.sample_rate)
+    if report.kept_seconds < MIN_SAMPLE_SECONDS:
+        print(f"⚠️ Only {report.kept_seconds:.1f}s of speech after trimming, uploading the untrimmed sample")
+        speech = audio.samples
+    else:
+        speech = select_best_speech(speech, audio.sample_rate)
+        print(f"✂️ Trimmed silence: {report}, uploading {len(speech) / audio.sample_rate:.1f}s")
+
     # Skip noise reduction if specified
     if skip_noise_reduction:
         print("⏩ Skipping noise reduction...")
-        reduced_noise_audio = audio_data
+        reduced_noise_audio = speech
     else:
         print("🔇 Reducing background noise...")
         try:
-            reduced_noise_audio = nr.reduce_noise(y=audio_data, sr=sample_rate)
+            reduced_noise_audio = _reduce_noise(audio, speech, owner, device_id)
         except Exception as e:
             print(f"❌ Error during noise reduction: {str(e)}")
-            if temp_audio_path != input_audio_path:
-                os.remove(temp_audio_path)
             raise e
 
-    # Save processed audio to a temporary file
-    with tempfile.NamedTemporaryFile(delete=False, suffix='.wav') as tmp_file:
-        try:
-            sf.write(tmp_file.name, reduced_noise_audio, sample_rate, subtype='PCM_16')
-            tmp_path = tmp_file.name
-            print(f"✅ Processed audio saved: {tmp_path}")
-            # Verify the saved file
-            if os.path.getsize(tmp_path) == 0:
-                print(f"❌ Temporary file is empty: {tmp_path}")
-                raise Exception("Processed audio file is empty")
-            # Try loading the file to ensure it's not corrupted
-            AudioSegment.from_file(tmp_path, format="wav")
-            print(f"✅ Processed WAV file is playable")
-        except Exception as e:
-            print(f"❌ Error saving or verifying processed audio: {str(e)}")
-            os.remove(tmp_path)
-            if temp_audio_path != input_audio_path:
-                os.remove(temp_audio_path)
-            raise e
+    wav_bytes = encode_wav(reduced_noise_audio, audio.sample_rate)
 
-    # Connect to ElevenLabs
-    print("🧬 Connecting to ElevenLabs...")
-    try:
-        client = ElevenLabs(api_key=os.getenv("ELEVENLABS_API_KEY"))
-        if not os.getenv("ELEVENLABS_API_KEY"):
-            raise Exception("ELEVENLABS_API_KEY is not set in .env file")
-    except Exception as e:
-        print(f"❌ Error initializing ElevenLabs client: {str(e)}")
-        os.remove(tmp_path)
-        if temp_audio_path != input_audio_path:
-            os.remove(temp_audio_path)
-        raise e
+    # Connect to ElevenLabs, with the keys elevenlabs_slot() hands out
+    if not get_rate_limiter().api_keys:
+        raise ElevenLabsNotConfigured("Set ELEVENLABS_API_KEYS (or ELEVENLABS_API_KEY) in the .env file")
 
-    # Check for existing voice
-    print("🔍 Checking for existing voice...")
     try:
-        voices_response = client.voices.get_all()
-        voice_list = getattr(voices_response, 'voices', voices_response)
-
-        for voice in voice_list:
-            try:
-                if hasattr(voice, 'name') and voice.name.lower() == clone_name.lower():
-                    print(f"✅ Voice '{clone_name}' already exists with ID: {voice.voice_id}")
-                    os.remove(tmp_path)
-                    if temp_audio_path != input_audio_path:
-                        os.remove(temp_audio_path)
-                    return voice.voice_id
-            except AttributeError:
-                print(f"⚠️ Skipping invalid voice entry: {voice}")
-                continue
-
         # Clone new voice
         print("🧬 Cloning new voice...")
-        with open(tmp_path, 'rb') as f:
-            voice = client.voices.ivc.create(
-                name=clone_name,
-                description=description,
-                files=[f],  # Pass file object instead of path
+        # Each call creates a voice on the account, so it is neither hedged nor
+        # abandoned at a deadline: the voice must be recorded once it exists.
+        with elevenlabs_slot() as api_key:
+            client = get_elevenlabs_client(api_key)
+            voice = vendor_call(
+                "elevenlabs", "clone",
+                lambda cancelled: client.voices.ivc.create(
+                    name=clone_name,
+                    description=description,
+                    files=[("sample.wav", wav_bytes, "audio/wav")],
+                ),
+                idempotent=False,
             )
         print(f"✅ New voice cloned with ID: {voice.voice_id}")
-        os.remove(tmp_path)
-        if temp_audio_path != input_audio_path:
-            os.remove(temp_audio_path)
+        remember_cloned_voice(sample_hash, clone_name, voice.voice_id, owner)
         return voice.voice_id
 
     except Exception as e:
         print(f"❌ Error while connecting to ElevenLabs: {str(e)}")
         traceback.print_exc()
-        os.remove(tmp_path)
-        if temp_audio_path != input_audio_path:
-            os.remove(temp_audio_path)
         raise e
 
 if __name__ == "__main__":
@@ -0,0 +1,78 @@
+import threading
+from typing import Optional
+from app.features.voice_cloning import production
+from app.features.voice_cloning.prompts import build_messages, prompt_cache_key
+from app.features.voice_cloning.stt import ElevenLabsTranscriber
+from app.features.voice_cloning.vad import StreamingVAD
+
+INPUT_SAMPLE_RATE = 16000
+OUTPUT_SAMPLE_RATE = production.STREAM_SAMPLE_RATE
+MAX_HISTORY_TURNS = 10
+HISTORY_TRIM_TURNS = 5
+
+
+class VoiceConversation:
+    """
+    One duplex voice conversation: end-pointing of the caller's microphone audio,
+    the running chat history, and speech-to-text / reply synthesis per turn.
+
+    Transport-agnostic and blocking; app.voices.realtime drives it from a WebSocket.
+    """
+
+    def __init__(self, user_data: Optional[dict] = None, voice_id: Optional[str] = None):
+        self.user_data = user_data or {}
+        self.voice_id = voice_id or production.default_voice_id
+        self.vad = StreamingVAD(INPUT_SAMPLE_RATE)
+        self.history: list = []
+        self.transcriber = ElevenLabsTranscriber()
+        self._history_lock = threading.Lock()
+
+    def feed_audio(self, pcm: bytes) -> list:
+        """Microphone PCM (16 kHz mono s16le) in, VAD events out."""
+        return self.vad.feed(pcm)
+
+    def transcribe(self, pcm: bytes) -> str:
+        result = self.transcriber.transcribe_bytes(pcm, "utterance.pcm", file_format="pcm_s16le_16")
+        if isinstance(result, dict):
+            raise RuntimeError(f"Transcription failed: {result['error']}")
+        return result.strip()
+
+    def _messages(self, text):
+        # The persona prefix, then the history and the new turn. Old turns are dropped
+        # HISTORY_TRIM_TURNS at a time rather than one per turn, so the history also
+        # stays a stable prefix for the provider's prompt cache between trims.
+        with self._history_lock:
+            excess = max(0, len(self.history) - 2 * MAX_HISTORY_TURNS)
+            block = 2 * HISTORY_TRIM_TURNS
+            drop = -(-excess // block) * block  # excess rounded up to whole blocks
+            history = self.history[drop:]
+        return build_messages(self.user_data, history + [{"role": "user", "content": text}])
+
+    def reply_audio(self, text: str, cancelled: threading.Event, on_sentence=None):
+        """
+        Yield the spoken reply to text as PCM at OUTPUT_SAMPLE_RATE.
+
+        Only sentences that actually started playing are added to the history, so a
+        reply cut short by barge-in is remembered as cut short.
+
+        Raises:
+            production.NoVoiceError: The conversation has no voice to speak with.
+        """
+        voice_id = production.require_voice_id(self.voice_id)
+        spoken = []
+
+        def sentence_started(sentence):
+            spoken.append(sentence)
+            if on_sentence is not None:
+                on_sentence(sentence)
+
+        try:
+            yield from production.stream_reply_audio(
+                production._stream_chat_text(self._messages(text), prompt_cache_key(self.user_data)),
+                voice_id, cancelled, sentence_started
+            )
+        finally:
+            with self._history_lock:
+                self.history.append({"role": "user", "content": text})
+                if spoken:
+                    self.history.append({"role": "assistant", "content": " ".join(spoken)})
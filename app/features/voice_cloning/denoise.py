@@ -0,0 +1,184 @@
+import multiprocessing
+import os
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import numpy as np
+
+# Each window is denoised with PADDING_SECONDS of extra context on both sides
+# (thrown away afterwards) so the adaptive noise estimate, smoothed over
+# reduce_noise's 2 s time constant, settles before the part we keep; neighbouring
+# windows are then cross-faded over OVERLAP_SECONDS. All offsets are multiples of
+# the FFT size so every window sees the same STFT frame grid as a single-shot run.
+WINDOW_SECONDS = float(os.getenv("NOISE_REDUCTION_WINDOW_SECONDS", 20))
+OVERLAP_SECONDS = 0.5
+PADDING_SECONDS = 8.0
+
+
+def noise_reduction_workers() -> int:
+    value = os.getenv("NOISE_REDUCTION_WORKERS")
+    return int(value) if value else max(1, min(4, os.cpu_count() or 1))
+
+
+def _reduce_window(samples, sample_rate, options):
+    import noisereduce as nr
+
+    return nr.reduce_noise(y=samples, sr=sample_rate, **options).astype(np.float32)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn, not fork: callers run on worker threads that may hold locks.
+            _pool = ProcessPoolExecutor(
+                max_workers=noise_reduction_workers(),
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+
+def _discard_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def _align(value, step):
+    return int(round(value / step)) * step
+
+
+def plan_windows(length, window, overlap, padding, step=1):
+    """
+    (keep_start, keep_stop, read_start, read_stop) per window.
+
+    Kept ranges overlap their neighbours by 2 * overlap samples; read ranges add
+    padding of context on top. Window boundaries are rounded to multiples of step.
+    """
+    # Even split, so no trailing sliver is shorter than the cross-fade.
+    count = max(1, round(length / window))
+    bounds = [_align(bound, step) for bound in np.linspace(0, length, count + 1)]
+    bounds[-1] = length
+    plans = []
+    for start, stop in zip(bounds[:-1], bounds[1:]):
+        keep_start = max(0, start - overlap)
+        keep_stop = min(length, stop + overlap)
+        plans.append((keep_start, keep_stop, max(0, keep_start - padding), min(length, keep_stop + padding)))
+    return plans
+
+
+def _crossfade_weights(keep_start, keep_stop, length, overlap):
+    """Linear fade in/out over the overlaps; neighbouring windows sum to 1."""
+    weights = np.ones(keep_stop - keep_start, dtype=np.float32)
+    if overlap and keep_start > 0:
+        weights[:2 * overlap] = (np.arange(2 * overlap, dtype=np.float32) + 0.5) / (2 * overlap)
+    if overlap and keep_stop < length:
+        weights[-2 * overlap:] = (np.arange(2 * overlap, 0, -1, dtype=np.float32) - 0.5) / (2 * overlap)
+    return weights
+
+
+def reduce_noise_parallel(samples, sample_rate, window_seconds=WINDOW_SECONDS, max_workers=None, **options):
+    """
+    nr.reduce_noise() over overlapping windows on a process pool, overlap-added back.
+
+    Only max_workers + 1 windows are in flight at a time, so peak memory is bounded
+    by the window size rather than the length of the recording. Signals shorter than
+    two windows are processed in-process in one shot.
+    """
+    samples = np.asarray(samples, dtype=np.float32)
+    length = len(samples)
+    step = options.get("n_fft", 1024)
+    window = _align(window_seconds * sample_rate, step)
+    overlap = _align(OVERLAP_SECONDS * sample_rate, step)
+    padding = _align(PADDING_SECONDS * sample_rate, step)
+    if length < 2 * window:
+        return _reduce_window(samples, sample_rate, options)
+
+    max_workers = max_workers or noise_reduction_workers()
+    pool = _get_pool()
+    output = np.zeros(length, dtype=np.float32)
+    pending = deque()
+
+    def collect(future, keep_start, keep_stop, read_start):
+        reduced = future.result()
+        kept = reduced[keep_start - read_start:keep_stop - read_start]
+        output[keep_start:keep_stop] += kept * _crossfade_weights(keep_start, keep_stop, length, overlap)
+
+    try:
+        for keep_start, keep_stop, read_start, read_stop in plan_windows(length, window, overlap, padding, step):
+            if len(pending) > max_workers:
+                collect(*pending.popleft())
+            future = pool.submit(_reduce_window, samples[read_start:read_stop], sample_rate, options)
+            pending.append((future, keep_start, keep_stop, read_start))
+        while pending:
+            collect(*pending.popleft())
+    except BrokenProcessPool:
+        _discard_pool()
+        raise
+    return output
+
+
+# ✅ Stationary noise profiles
+PROFILE_N_FFT = 1024
+PROFILE_N_STD = 1.5
+MIN_SILENCE_SECONDS = 0.5
+
+
+def _stft(samples, n_fft):
+    from scipy.signal import stft
+
+    _, _, spectrum = stft(samples, nperseg=n_fft, noverlap=n_fft - n_fft // 4, boundary="even")
+    return spectrum
+
+
+def leading_silence(samples, sample_rate, frame_seconds=0.02, min_seconds=MIN_SILENCE_SECONDS):
+    """
+    The quiet stretch before the speaker starts, or None if it's shorter than min_seconds.
+
+    Frames within 6 dB of the clip's quietest frame count as silence.
+    """
+    frame = int(frame_seconds * sample_rate)
+    count = len(samples) // frame
+    if count == 0:
+        return None
+    energy = np.square(samples[:count * frame].reshape(count, frame), dtype=np.float32).mean(axis=1)
+    level = 10 * np.log10(energy + 1e-12)
+    loud = np.flatnonzero(level > level.min() + 6)
+    silent_frames = loud[0] if loud.size else count
+    if silent_frames * frame < min_seconds * sample_rate:
+        return None
+    return samples[:silent_frames * frame]
+
+
+def estimate_noise_profile(noise, n_fft=PROFILE_N_FFT, n_std=PROFILE_N_STD) -> np.ndarray:
+    """Per-frequency gate threshold (dB) from a noise-only clip, as a float32 vector."""
+    level = 20 * np.log10(np.abs(_stft(np.asarray(noise, dtype=np.float32), n_fft)) + 1e-10)
+    return (level.mean(axis=1) + n_std * level.std(axis=1)).astype(np.float32)
+
+
+def spectral_gate(samples, profile, prop_decrease=1.0, smooth_bins=3, smooth_frames=5):
+    """
+    Single-pass stationary noise gate against a stored profile.
+
+    Bins below the profile's threshold are attenuated by prop_decrease; the mask is
+    smoothed over a few bins and frames to avoid musical noise.
+    """
+    from scipy.signal import fftconvolve, istft
+
+    samples = np.asarray(samples, dtype=np.float32)
+    n_fft = (len(profile) - 1) * 2
+    spectrum = _stft(samples, n_fft)
+    level = 20 * np.log10(np.abs(spectrum) + 1e-10)
+    mask = (level > profile[:, None]).astype(np.float32)
+    kernel = np.ones((smooth_bins, smooth_frames), dtype=np.float32) / (smooth_bins * smooth_frames)
+    mask = np.clip(fftconvolve(mask, kernel, mode="same"), 0.0, 1.0)
+    gain = mask * prop_decrease + (1.0 - prop_decrease)
+    _, gated = istft(spectrum * gain, nperseg=n_fft, noverlap=n_fft - n_fft // 4)
+    return gated[:len(samples)].astype(np.float32)
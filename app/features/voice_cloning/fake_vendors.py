@@ -0,0 +1,311 @@
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+import numpy as np
+
+# Stand-ins for the OpenAI and ElevenLabs endpoints the voice modules call, for
+# benchmarks and tests. Point OPENAI_BASE_URL at <base_url>/v1 and
+# ELEVENLABS_BASE_URL at <base_url>.
+
+SECONDS_PER_CHAR = 0.06  # roughly natural speech rate
+MP3_FRAME_SECONDS = 1152 / 44100
+# One MPEG-1 Layer III frame (128 kbps, 44.1 kHz, mono) of digital silence: the
+# header followed by zeroed side info and main data.
+SILENT_MP3_FRAME = bytes([0xFF, 0xFB, 0x90, 0xC4]) + bytes(413)
+REPLY_SENTENCES = [
+    "It's so good to hear from you today.",
+    "I was just thinking about the time we spent together last summer.",
+    "Tell me everything that happened this week, I want to hear it all.",
+    "You always know how to make me smile.",
+    "Remember to take a little time for yourself, too.",
+]
+
+
+@dataclass
+class LatencyProfile:
+    """Injected delays (milliseconds) and failure rate for one group of endpoints."""
+    ttfb_ms: float = 0.0
+    jitter_ms: float = 0.0
+    chunk_interval_ms: float = 0.0
+    error_rate: float = 0.0
+    error_status: int = 503
+
+
+DEFAULT_PROFILES = {
+    "chat": LatencyProfile(ttfb_ms=350, jitter_ms=80, chunk_interval_ms=25),
+    "tts": LatencyProfile(ttfb_ms=300, jitter_ms=60, chunk_interval_ms=40),
+    "clone": LatencyProfile(ttfb_ms=1500, jitter_ms=300),
+    "voices": LatencyProfile(ttfb_ms=120, jitter_ms=20),
+    "stt": LatencyProfile(ttfb_ms=700, jitter_ms=150),
+}
+
+
+def load_profiles(config=None, scale=1.0) -> dict:
+    """
+    Latency profiles from DEFAULT_PROFILES, overridden per endpoint group by
+    config ({"tts": {"ttfb_ms": 500}, ...}) and multiplied by scale.
+    """
+    profiles = {}
+    for name, default in DEFAULT_PROFILES.items():
+        values = {**asdict(default), **(config or {}).get(name, {})}
+        for key in ("ttfb_ms", "jitter_ms", "chunk_interval_ms"):
+            values[key] *= scale
+        profiles[name] = LatencyProfile(**values)
+    return profiles
+
+
+def _seed(*parts) -> int:
+    return int.from_bytes(hashlib.sha256("\x00".join(map(str, parts)).encode()).digest()[:4], "little")
+
+
+def fake_reply_text(messages) -> str:
+    """A deterministic multi-sentence reply, chosen by the request's messages."""
+    rng = random.Random(_seed(json.dumps(messages, sort_keys=True)))
+    return " ".join(rng.sample(REPLY_SENTENCES, 3))
+
+
+def fake_pcm(text, voice_id, sample_rate) -> bytes:
+    """Mono 16-bit PCM tone whose pitch depends on the voice and length on the text."""
+    frequency = 110 + _seed(voice_id) % 220
+    t = np.arange(int(max(len(text), 1) * SECONDS_PER_CHAR * sample_rate)) / sample_rate
+    return (0.2 * 32767 * np.sin(2 * np.pi * frequency * t)).astype("<i2").tobytes()
+
+
+def fake_mp3(text) -> bytes:
+    """Silent MP3 lasting as long as the text would take to say."""
+    return SILENT_MP3_FRAME * max(1, int(len(text) * SECONDS_PER_CHAR / MP3_FRAME_SECONDS))
+
+
+class FakeVendorHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    routes = [
+        ("POST", re.compile(r"^/v1/chat/completions$"), "chat", "chat_completions"),
+        ("POST", re.compile(r"^/v1/text-to-speech/(?P<voice_id>[^/]+)(?P<stream>/stream)?$"), "tts", "text_to_speech"),
+        ("POST", re.compile(r"^/v1/voices/add$"), "clone", "add_voice"),
+        ("GET", re.compile(r"^/v[12]/voices$"), "voices", "list_voices"),
+        ("POST", re.compile(r"^/v1/speech-to-text$"), "stt", "speech_to_text"),
+    ]
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def _dispatch(self, method):
+        url = urlparse(self.path)
+        self.query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        self.body = self._read_body()
+        for route_method, pattern, group, handler in self.routes:
+            match = pattern.match(url.path)
+            if route_method == method and match:
+                profile = self.server.fake.profiles[group]
+                time.sleep(self.server.fake.delay(profile))
+                if self.server.fake.should_fail(profile):
+                    return self._send_error(profile.error_status)
+                self.server.fake.count(group)
+                return getattr(self, handler)(profile, **match.groupdict())
+        self._send_json(404, {"detail": f"No fake for {method} {url.path}"})
+
+    def _read_body(self):
+        if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+            body = b""
+            while True:
+                size = int(self.rfile.readline().strip() or b"0", 16)
+                chunk = self.rfile.read(size + 2)[:size]
+                if not size:
+                    return body
+                body += chunk
+        return self.rfile.read(int(self.headers.get("Content-Length") or 0))
+
+    def _json_body(self):
+        try:
+            return json.loads(self.body or b"{}")
+        except ValueError:
+            return {}
+
+    # ✅ Responses
+    def _send_bytes(self, status, body, content_type):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, status, payload):
+        self._send_bytes(status, json.dumps(payload).encode(), "application/json")
+
+    def _send_error(self, status):
+        self.send_response(status)
+        body = json.dumps({"error": {"message": "Injected failure", "type": "fake_vendor"}}).encode()
+        if status == 429:
+            self.send_header("Retry-After", "1")
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_chunked(self, chunks, content_type, profile):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for index, chunk in enumerate(chunks):
+            if index:
+                time.sleep(profile.chunk_interval_ms / 1000)
+            self.wfile.write(f"{len(chunk):X}\r\n".encode() + chunk + b"\r\n")
+            self.wfile.flush()
+        self.wfile.write(b"0\r\n\r\n")
+
+    # ✅ Endpoints
+    def chat_completions(self, profile):
+        request = self._json_body()
+        text = fake_reply_text(request.get("messages", []))
+        completion_id = f"chatcmpl-{_seed(text):08x}"
+        model = request.get("model", "gpt-4o")
+        if not request.get("stream"):
+            return self._send_json(200, {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": 0,
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": text},
+                    "finish_reason": "stop",
+                }],
+                "usage": {"prompt_tokens": 0, "completion_tokens": len(text.split()), "total_tokens": len(text.split())},
+            })
+
+        def events():
+            for token in re.findall(r"\S+\s*", text):
+                chunk = {
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "created": 0,
+                    "model": model,
+                    "choices": [{"index": 0, "delta": {"content": token}, "finish_reason": None}],
+                }
+                yield f"data: {json.dumps(chunk)}\n\n".encode()
+            yield b"data: [DONE]\n\n"
+        self._send_chunked(events(), "text/event-stream", profile)
+
+    def text_to_speech(self, profile, voice_id, stream=None):
+        text = self._json_body().get("text", "")
+        output_format = self.query.get("output_format", "mp3_44100_128")
+        if output_format.startswith("pcm_"):
+            audio, content_type = fake_pcm(text, voice_id, int(output_format[4:])), "audio/pcm"
+        else:
+            audio, content_type = fake_mp3(text), "audio/mpeg"
+        if not stream:
+            return self._send_bytes(200, audio, content_type)
+        chunk_size = 4096
+        self._send_chunked(
+            (audio[i:i + chunk_size] for i in range(0, len(audio), chunk_size)), content_type, profile
+        )
+
+    def add_voice(self, profile):
+        self._send_json(200, {"voice_id": f"fake{_seed(self.body):08x}", "requires_verification": False})
+
+    def list_voices(self, profile):
+        voices = [
+            {"voice_id": f"fake{_seed(name):08x}", "name": name, "category": "cloned"}
+            for name in ("Fake Voice A", "Fake Voice B")
+        ]
+        self._send_json(200, {"voices": voices, "has_more": False, "total_count": len(voices)})
+
+    def speech_to_text(self, profile):
+        rng = random.Random(_seed(self.body))
+        self._send_json(200, {
+            "language_code": "en",
+            "language_probability": 1.0,
+            "text": " ".join(rng.sample(REPLY_SENTENCES, 2)),
+            "words": [],
+        })
+
+
+@dataclass
+class FakeVendorServer:
+    """
+    Threaded local HTTP server answering like OpenAI and ElevenLabs, with latency,
+    jitter and error injection per endpoint group. Jitter and injected failures
+    are drawn from a seeded RNG, so a run is repeatable for the same request order.
+    """
+    host: str = "127.0.0.1"
+    port: int = 0
+    profiles: dict = field(default_factory=load_profiles)
+    seed: int = 0
+
+    def __post_init__(self):
+        self._rng = random.Random(self.seed)
+        self._lock = threading.Lock()
+        self.requests = {}
+        self._server = None
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def delay(self, profile) -> float:
+        with self._lock:
+            return max(0.0, self._rng.gauss(profile.ttfb_ms, profile.jitter_ms)) / 1000
+
+    def should_fail(self, profile) -> bool:
+        with self._lock:
+            return self._rng.random() < profile.error_rate
+
+    def count(self, group):
+        with self._lock:
+            self.requests[group] = self.requests.get(group, 0) + 1
+
+    def start(self):
+        self._server = ThreadingHTTPServer((self.host, self.port), FakeVendorHandler)
+        self._server.daemon_threads = True
+        self._server.fake = self
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-vendors", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Serve fake OpenAI / ElevenLabs endpoints.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--profile", help="JSON file overriding the latency profiles")
+    parser.add_argument("--latency-scale", type=float, default=1.0)
+    args = parser.parse_args()
+
+    config = json.load(open(args.profile)) if args.profile else None
+    server = FakeVendorServer(port=args.port, profiles=load_profiles(config, args.latency_scale)).start()
+    print(f"🧪 Fake vendors on {server.base_url}")
+    print(f"   OPENAI_BASE_URL={server.base_url}/v1  ELEVENLABS_BASE_URL={server.base_url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
@@ -0,0 +1,116 @@
+import io
+import os
+from functools import lru_cache
+import numpy as np
+
+DEFAULT_CUTOFF = 80
+DEFAULT_BLOCK_SIZE = 4096
+
+
+@lru_cache(maxsize=32)
+def highpass_coefficients(sample_rate: int, cutoff=DEFAULT_CUTOFF, order=1):
+    """Butterworth high-pass coefficients, designed once per (rate, cutoff, order)."""
+    from scipy.signal import butter
+
+    nyquist = 0.5 * sample_rate
+    b, a = butter(order, cutoff / nyquist, btype='high')
+    return b.astype(np.float32), a.astype(np.float32)
+
+
+class StreamingHighPassFilter:
+    """
+    High-pass filter that can be fed audio a chunk at a time.
+
+    The lfilter state (zi) is carried between calls, so filtering a stream chunk by
+    chunk gives the same result as filtering the whole signal at once, with memory
+    bounded by the chunk size instead of the reply length.
+    """
+
+    def __init__(self, sample_rate: int, cutoff=DEFAULT_CUTOFF, order=1, block_size=DEFAULT_BLOCK_SIZE):
+        from scipy.signal import lfilter, lfilter_zi
+
+        self._lfilter = lfilter
+        self.sample_rate = sample_rate
+        self.block_size = block_size
+        self.b, self.a = highpass_coefficients(sample_rate, cutoff, order)
+        self._zi_shape = lfilter_zi(self.b, self.a).shape
+        self.reset()
+
+    def reset(self):
+        self._zi = np.zeros(self._zi_shape, dtype=np.float32)
+        self._pending = b""
+
+    def process(self, samples: np.ndarray) -> np.ndarray:
+        """Filter the next chunk of float samples."""
+        filtered, self._zi = self._lfilter(self.b, self.a, np.asarray(samples, dtype=np.float32), zi=self._zi)
+        return filtered
+
+    def process_pcm16(self, data: bytes) -> bytes:
+        """
+        Filter the next chunk of 16-bit mono PCM bytes.
+
+        Chunks may split a sample in half; the odd byte is held until the next call.
+        Output is clipped to the int16 range instead of wrapping around.
+        """
+        data = self._pending + data
+        usable = len(data) - len(data) % 2
+        self._pending = data[usable:]
+
+        pcm = np.frombuffer(data[:usable], dtype=np.int16)
+        out = np.empty(len(pcm), dtype=np.int16)
+        for start in range(0, len(pcm), self.block_size):
+            block = self.process(pcm[start:start + self.block_size])
+            np.clip(block, -32768, 32767, out=block)
+            out[start:start + len(block)] = block
+        return out.tobytes()
+
+
+def high_pass_filter(audio_data: np.ndarray, sample_rate: int, cutoff=DEFAULT_CUTOFF):
+    """
+    Apply a high-pass filter to remove low-frequency noise (e.g., hums, rumbles).
+    """
+    return StreamingHighPassFilter(sample_rate, cutoff).process(audio_data)
+
+
+def audio_segment_class():
+    """pydub's AudioSegment, imported on first use and pointed at FFMPEG_PATH / FFPROBE_PATH."""
+    from pydub import AudioSegment
+
+    if os.getenv("FFMPEG_PATH"):
+        AudioSegment.converter = os.getenv("FFMPEG_PATH")
+    if os.getenv("FFPROBE_PATH"):
+        AudioSegment.ffprobe = os.getenv("FFPROBE_PATH")
+    return AudioSegment
+
+
+def filter_mp3_bytes(mp3_bytes) -> bytes:
+    """
+    Convert MP3 bytes to 16-bit mono, high-pass filter it block by block, and encode back to MP3.
+    """
+    AudioSegment = audio_segment_class()
+    audio_segment = AudioSegment.from_file(io.BytesIO(mp3_bytes), format="mp3")
+    audio_segment = audio_segment.set_channels(1).set_sample_width(2)
+    high_pass = StreamingHighPassFilter(audio_segment.frame_rate)
+    filtered_audio = AudioSegment(
+        high_pass.process_pcm16(audio_segment.raw_data),
+        frame_rate=audio_segment.frame_rate,
+        sample_width=2,
+        channels=1
+    )
+    output = io.BytesIO()
+    filtered_audio.export(output, format="mp3")
+    return output.getvalue()
+
+
+def save_audio(audio_bytes, output_file):
+    os.makedirs(os.path.dirname(output_file), exist_ok=True)
+    with open(output_file, "wb") as f:
+        f.write(audio_bytes)
+    print(f"✅ Filtered audio saved: {output_file}")
+
+
+def apply_filter_and_save_audio(mp3_bytes, output_file):
+    """
+    Convert MP3 bytes to waveform, apply filter, and save back as MP3.
+    """
+    save_audio(filter_mp3_bytes(mp3_bytes), output_file)
@@ -0,0 +1,123 @@
+import io
+import os
+import struct
+import subprocess
+import wave
+from dataclasses import dataclass
+import numpy as np
+
+TARGET_SAMPLE_RATE = 16000
+
+
+class AudioIngestError(Exception):
+    """Raised when an upload cannot be decoded or fails validation."""
+
+
+@dataclass
+class IngestedAudio:
+    """A decoded upload: mono 16-bit PCM held in memory."""
+    pcm: np.ndarray
+    sample_rate: int
+
+    @property
+    def samples(self) -> np.ndarray:
+        """The PCM as float32 in [-1, 1], the form the DSP stages expect."""
+        return self.pcm.astype(np.float32) / 32768.0
+
+    @property
+    def duration(self) -> float:
+        return len(self.pcm) / self.sample_rate
+
+    def to_wav_bytes(self) -> bytes:
+        return encode_wav(self.pcm, self.sample_rate)
+
+
+def encode_wav(samples: np.ndarray, sample_rate: int) -> bytes:
+    """Encode mono samples (int16, or float in [-1, 1]) as an in-memory PCM_16 WAV file."""
+    samples = np.asarray(samples)
+    if samples.dtype != np.int16:
+        samples = (np.clip(samples, -1.0, 1.0) * 32767).astype(np.int16)
+
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(sample_rate)
+        wav_file.writeframes(samples.tobytes())
+    return buffer.getvalue()
+
+
+def streaming_wav_header(sample_rate: int) -> bytes:
+    """
+    Header for a mono PCM_16 WAV stream whose length is not known up front.
+
+    The RIFF and data sizes are set to the maximum, which players treat as
+    "read until the stream ends".
+    """
+    unknown_size = 0xFFFFFFFF
+    return (
+        b"RIFF" + struct.pack("<I", unknown_size) + b"WAVE"
+        + b"fmt " + struct.pack("<IHHIIHH", 16, 1, 1, sample_rate, sample_rate * 2, 2, 16)
+        + b"data" + struct.pack("<I", unknown_size)
+    )
+
+
+def decode_upload(source, sample_rate=TARGET_SAMPLE_RATE, min_duration=None) -> IngestedAudio:
+    """
+    Decode any ffmpeg-readable upload once, straight into a mono PCM buffer.
+
+    Args:
+        source (str | bytes): Path to the upload, or its raw bytes (piped to ffmpeg's stdin).
+        sample_rate (int): Output sample rate.
+        min_duration (float, optional): Reject audio shorter than this many seconds.
+
+    Returns:
+        IngestedAudio: The decoded mono 16-bit PCM.
+    """
+    if isinstance(source, (bytes, bytearray)):
+        input_arg, stdin_data = "pipe:0", bytes(source)
+    else:
+        if not os.path.exists(source):
+            raise AudioIngestError(f"Input file does not exist: {source}")
+        input_arg, stdin_data = str(source), None
+
+    command = [
+        os.getenv("FFMPEG_PATH") or "ffmpeg",
+        "-hide_banner", "-loglevel", "error",
+        "-i", input_arg,
+        "-vn", "-ac", "1", "-ar", str(sample_rate),
+        "-f", "s16le", "-acodec", "pcm_s16le",
+        "pipe:1",
+    ]
+    try:
+        result = subprocess.run(
+            command,
+            input=stdin_data,
+            stdin=None if stdin_data is not None else subprocess.DEVNULL,
+            capture_output=True,
+            check=False,
+        )
+    except OSError as e:
+        raise AudioIngestError(f"Could not run ffmpeg: {e}") from e
+
+    if result.returncode != 0:
+        message = result.stderr.decode(errors="replace").strip()
+        raise AudioIngestError(f"Could not decode audio: {message or 'ffmpeg failed'}")
+
+    pcm = np.frombuffer(result.stdout, dtype=np.int16)
+    audio = IngestedAudio(pcm=pcm, sample_rate=sample_rate)
+    validate_audio(audio, min_duration=min_duration)
+    return audio
+
+
+def validate_audio(audio: IngestedAudio, min_duration=None):
+    """Validate decoded audio in memory, instead of re-decoding a written file."""
+    if audio.pcm.size == 0:
+        raise AudioIngestError("Decoded audio is empty")
+    if not np.any(audio.pcm):
+        raise AudioIngestError("Decoded audio is silent")
+    if min_duration is not None and audio.duration < min_duration:
+        raise AudioIngestError(
+            f"Audio duration ({audio.duration:.2f} seconds) is too short. "
+            f"Minimum {min_duration} seconds required."
+        )
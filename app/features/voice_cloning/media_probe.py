@@ -0,0 +1,130 @@
+import hashlib
+import json
+import os
+import subprocess
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+
+SAMPLE_BYTES = 1024 * 1024
+PROBE_CACHE_SIZE = 256
+
+
+class MediaProbeError(Exception):
+    """Raised when an upload is not readable audio or fails validation."""
+
+
+@dataclass(frozen=True)
+class MediaInfo:
+    duration: float
+    channels: int
+    sample_rate: int
+    codec: str
+    format_name: str
+
+
+_probe_cache: OrderedDict[str, MediaInfo] = OrderedDict()
+_probe_cache_lock = threading.Lock()
+
+
+def file_digest(path) -> str:
+    """
+    Cheap content hash for memoizing probes: file size plus the first and last MiB.
+
+    Container headers (and the trailing moov atom of .m4a files) live there, so it
+    changes whenever the metadata we read could, without reading a long recording
+    end to end.
+    """
+    size = os.path.getsize(path)
+    digest = hashlib.sha256(str(size).encode())
+    with open(path, "rb") as f:
+        digest.update(f.read(SAMPLE_BYTES))
+        if size > 2 * SAMPLE_BYTES:
+            f.seek(-SAMPLE_BYTES, os.SEEK_END)
+            digest.update(f.read(SAMPLE_BYTES))
+    return digest.hexdigest()
+
+
+def _probe_with_soundfile(path):
+    import soundfile as sf
+
+    info = sf.info(path)
+    return MediaInfo(
+        duration=info.duration,
+        channels=info.channels,
+        sample_rate=info.samplerate,
+        codec=info.subtype,
+        format_name=info.format,
+    )
+
+
+def _probe_with_ffprobe(path):
+    command = [
+        os.getenv("FFPROBE_PATH") or "ffprobe",
+        "-v", "error",
+        "-select_streams", "a:0",
+        "-show_entries", "stream=codec_name,sample_rate,channels,duration:format=duration,format_name",
+        "-of", "json",
+        path,
+    ]
+    try:
+        result = subprocess.run(command, capture_output=True, check=False)
+    except OSError as e:
+        raise MediaProbeError(f"Could not run ffprobe: {e}") from e
+    if result.returncode != 0:
+        raise MediaProbeError(f"Unreadable media file: {result.stderr.decode(errors='replace').strip()}")
+
+    metadata = json.loads(result.stdout or b"{}")
+    streams = metadata.get("streams") or []
+    if not streams:
+        raise MediaProbeError("File has no audio stream")
+    stream, container = streams[0], metadata.get("format", {})
+    duration = stream.get("duration") or container.get("duration")
+    if duration in (None, "N/A"):
+        raise MediaProbeError("Could not determine audio duration")
+    return MediaInfo(
+        duration=float(duration),
+        channels=int(stream.get("channels") or 0),
+        sample_rate=int(stream.get("sample_rate") or 0),
+        codec=stream.get("codec_name", ""),
+        format_name=container.get("format_name", ""),
+    )
+
+
+def probe_media(path) -> MediaInfo:
+    """
+    Read duration, channels, sample rate and codec from the container header only.
+
+    soundfile handles WAV/FLAC/OGG without spawning a process; anything else
+    (.m4a, .mp3, ...) goes to ffprobe. Results are memoized by file_digest.
+    """
+    if not os.path.exists(path):
+        raise MediaProbeError(f"Input file does not exist: {path}")
+
+    key = file_digest(path)
+    with _probe_cache_lock:
+        if key in _probe_cache:
+            _probe_cache.move_to_end(key)
+            return _probe_cache[key]
+
+    try:
+        info = _probe_with_soundfile(path)
+    except RuntimeError:  # includes soundfile.LibsndfileError
+        info = _probe_with_ffprobe(path)
+
+    with _probe_cache_lock:
+        _probe_cache[key] = info
+        while len(_probe_cache) > PROBE_CACHE_SIZE:
+            _probe_cache.popitem(last=False)
+    return info
+
+
+def validate_upload(path, min_duration=None) -> MediaInfo:
+    """Reject unreadable or too-short uploads before anything decodes them."""
+    info = probe_media(path)
+    if min_duration is not None and info.duration < min_duration:
+        raise MediaProbeError(
+            f"Audio duration ({info.duration:.2f} seconds) is too short. "
+            f"Minimum {min_duration} seconds required."
+        )
+    return info
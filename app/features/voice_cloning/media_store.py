@@ -0,0 +1,103 @@
+import hashlib
+import os
+import tempfile
+import time
+from dataclasses import dataclass
+from typing import Optional
+from app.features.voice_cloning.registry import record_generated_audio
+
+GENERATED_AUDIO_DIR = os.getenv("GENERATED_AUDIO_DIR", "output/generated")
+CONTENT_TYPES = {
+    "mp3": "audio/mpeg",
+    "wav": "audio/wav",
+}
+
+
+@dataclass(frozen=True)
+class StoredAudio:
+    content_hash: str
+    path: str
+    size: int
+    audio_id: Optional[str] = None
+
+
+class MediaStore:
+    """
+    Generated audio on disk, named by content hash under two levels of shard
+    directories (ab/cd/abcd....mp3). Writes go to a temp file and are renamed into
+    place, so concurrent pipelines never see or clobber a partial file, and
+    identical outputs share one file.
+    """
+
+    def __init__(self, directory=GENERATED_AUDIO_DIR):
+        self.directory = directory
+
+    def path_for(self, content_hash, extension):
+        return os.path.join(self.directory, content_hash[:2], content_hash[2:4], f"{content_hash}.{extension}")
+
+    def put(self, data: bytes, extension="mp3"):
+        content_hash = hashlib.sha256(data).hexdigest()
+        path = self.path_for(content_hash, extension)
+        try:
+            # Touched before the caller records its row, so the GC leaves it alone.
+            os.utime(path)
+            return content_hash, path
+        except FileNotFoundError:
+            pass  # new, or collected just now
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except Exception:
+            os.unlink(tmp_path)
+            raise
+        return content_hash, path
+
+    def delete(self, path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def files(self):
+        """(path, size, mtime) of every stored file, plus abandoned temp files."""
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                yield path, stat.st_size, stat.st_mtime
+
+    def sweep_untracked(self, tracked_paths, older_than_seconds):
+        """Delete files no DB row points at once they are older than older_than_seconds."""
+        cutoff = time.time() - older_than_seconds
+        removed = 0
+        for path, _, mtime in self.files():
+            if mtime < cutoff and os.path.normpath(path) not in tracked_paths:
+                self.delete(path)
+                removed += 1
+        return removed
+
+
+_store = None
+
+
+def get_media_store() -> MediaStore:
+    global _store
+    if _store is None:
+        _store = MediaStore()
+    return _store
+
+
+def store_generated_audio(data: bytes, extension="mp3", owner=None) -> StoredAudio:
+    """Write generated audio to the media store and record it (per owner) in GeneratedAudio."""
+    content_hash, path = get_media_store().put(data, extension)
+    audio_id = record_generated_audio(
+        content_hash, path, len(data), CONTENT_TYPES.get(extension, "application/octet-stream"), owner
+    )
+    return StoredAudio(content_hash=content_hash, path=path, size=len(data), audio_id=audio_id)
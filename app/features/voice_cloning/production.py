@@ -1,118 +1,145 @@
 import os
-import json
-import io
-import tempfile
+import re
+import itertools
+import queue
+import threading
 import traceback
-import numpy as np
-import soundfile as sf
-from pathlib import Path
-from scipy.signal import butter, lfilter
-from dotenv import load_dotenv
-from elevenlabs.client import ElevenLabs
-from openai import OpenAI
-from pydub import AudioSegment
-import noisereduce as nr
-
-# ✅ Load environment variables
-BASE_DIR = Path(__file__).resolve().parent.parent.parent
-load_dotenv()
-ENV = os.getenv('DJANGO_ENV', 'local')
-dotenv_path = BASE_DIR / '.env' / f'.{ENV}'  # noqa: F405
-load_dotenv(dotenv_path=dotenv_path)
-# Set paths
-ffmpeg_path = os.getenv("FFMPEG_PATH")
-ffprobe_path = os.getenv("FFPROBE_PATH")
-AudioSegment.converter = ffmpeg_path
-AudioSegment.ffprobe = ffprobe_path
-
-# Clients
-openai_client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-elevenlabs_client = ElevenLabs(api_key=os.getenv("ELEVENLABS_API_KEY"))
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+from app.features.voice_cloning.clients import get_elevenlabs_client, get_openai_client
+from app.features.voice_cloning.clone import remove_noise_and_clone_voice
+from app.features.voice_cloning.filters import StreamingHighPassFilter, filter_mp3_bytes
+from app.features.voice_cloning.ingest import streaming_wav_header
+from app.features.voice_cloning.media_store import store_generated_audio
+from app.features.voice_cloning.prompts import build_messages, prompt_cache_key
+from app.features.voice_cloning.rate_limit import HedgeSlots
+from app.features.voice_cloning.registry import resolve_voice_id, run_in_worker_thread
+from app.features.voice_cloning.resilience import vendor_call
+from app.features.voice_cloning.tts_cache import get_tts_cache, tts_cache_key
+
+# Environment variables are loaded by the Django settings, or by the package
+# __init__ for standalone runs; FFMPEG_PATH / FFPROBE_PATH are applied by filters.
+
+# Default voice
 default_voice_name = os.getenv("ELEVENLABS_VOICE_NAME")
 default_voice_id = os.getenv("ELEVENLABS_VOICE_ID")
 
 
-# ✅ Audio Conversion & Noise Reduction
-def convert_m4a_to_wav(input_path):
-    print("🔄 Converting .m4a to .wav...")
-    output_path = tempfile.mktemp(suffix=".wav")
-    audio = AudioSegment.from_file(input_path, format="m4a")
-    audio = audio.set_channels(1).set_frame_rate(16000)
-    audio.export(output_path, format="wav", parameters=["-acodec", "pcm_s16le"])
-    return output_path
+class NoVoiceError(Exception):
+    """There is no voice to speak with: none was given and ELEVENLABS_VOICE_ID is not set."""
 
 
-def remove_noise_and_clone_voice(input_audio_path, clone_name, skip_noise_reduction=False):
-    if not os.path.exists(input_audio_path):
-        raise Exception(f"Input file does not exist: {input_audio_path}")
+def require_voice_id(voice_id: Optional[str]) -> str:
+    """voice_id, else the default voice; raises NoVoiceError when neither is set."""
+    voice_id = voice_id or default_voice_id
+    if not voice_id:
+        raise NoVoiceError("No voice to speak with: pass a voice_id or set ELEVENLABS_VOICE_ID")
+    return voice_id
 
-    temp_audio_path = input_audio_path
-    if input_audio_path.lower().endswith(".m4a"):
-        temp_audio_path = convert_m4a_to_wav(input_audio_path)
+CHAT_MODEL = "gpt-4o"
+TTS_MODEL_ID = "eleven_multilingual_v2"
+TTS_VOICE_SETTINGS = {
+    "stability": 0.5,
+    "use_speaker_boost": True,
+    "similarity_boost": 1.0,
+    "style": 1.0,
+    "speed": 0.9
+}
 
-    audio_data, sample_rate = sf.read(temp_audio_path)
-    duration = len(audio_data) / sample_rate
-    if duration < 10:
-        raise Exception(f"Audio too short: {duration:.2f}s")
 
-    if skip_noise_reduction:
-        reduced_audio = audio_data
-    else:
-        reduced_audio = nr.reduce_noise(y=audio_data, sr=sample_rate)
+# ✅ Prompt
+def _chat_messages(user_data: dict) -> list:
+    # Stable persona prefix first (see prompts), the greeting turn last.
+    return build_messages(user_data, [{"role": "user", "content": user_data.get("distinct_greeting", "Hi there!")}])
 
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as tmp_file:
-        sf.write(tmp_file.name, reduced_audio, sample_rate, subtype='PCM_16')
-        tmp_path = tmp_file.name
 
+# ✅ Pipeline Steps
+def _clone_voice_or_default(
+    audio_path: str, skip_noise_reduction=True, owner=None, device_id="", voice_name=None
+) -> str:
+    """Step 1: clone (or look up) the voice, falling back to the owner's latest voice, then the default voice."""
     try:
-        voices_response = elevenlabs_client.voices.get_all()
-        for voice in voices_response.voices:
-            if voice.name.lower() == clone_name.lower():
-                print(f"✅ Voice already exists: {voice.voice_id}")
-                os.remove(tmp_path)
-                return voice.voice_id
-
-        with open(tmp_path, 'rb') as f:
-            voice = elevenlabs_client.voices.ivc.create(
-                name=clone_name,
-                description="a person talking",
-                files=[f],
-            )
-        print(f"✅ New voice cloned: {voice.voice_id}")
-        return voice.voice_id
-    finally:
-        os.remove(tmp_path)
-        if temp_audio_path != input_audio_path:
-            os.remove(temp_audio_path)
-
-
-# ✅ Audio Filtering
-def high_pass_filter(audio_data: np.ndarray, sample_rate: int, cutoff=80):
-    nyquist = 0.5 * sample_rate
-    normal_cutoff = cutoff / nyquist
-    b, a = butter(1, normal_cutoff, btype='high')
-    return lfilter(b, a, audio_data)
-
-
-def apply_filter_and_save_audio(mp3_bytes, output_file):
-    audio_segment = AudioSegment.from_file(io.BytesIO(mp3_bytes), format="mp3")
-    samples = np.array(audio_segment.get_array_of_samples()).astype(np.float32)
-    if audio_segment.channels == 2:
-        samples = samples.reshape((-1, 2)).mean(axis=1)
-    filtered = high_pass_filter(samples, audio_segment.frame_rate)
-    filtered_audio = AudioSegment(
-        filtered.astype(np.int16).tobytes(),
-        frame_rate=audio_segment.frame_rate,
-        sample_width=2,
-        channels=1
+        return remove_noise_and_clone_voice(
+            audio_path, voice_name or default_voice_name, skip_noise_reduction, owner, device_id
+        )
+    except Exception as e:
+        print(f"❌ Voice cloning failed: {e}")
+        return resolve_voice_id(owner, default=default_voice_id)
+
+
+def _generate_reply_text(user_data: dict) -> str:
+    """Step 3: get the AI response."""
+    # Not hedged: a second completion would be billed and could differ.
+    response = vendor_call(
+        "openai", "chat",
+        lambda cancelled: get_openai_client().chat.completions.create(
+            model=CHAT_MODEL,
+            messages=_chat_messages(user_data),
+            max_tokens=2000,
+            temperature=0.7,
+            prompt_cache_key=prompt_cache_key(user_data),
+        ),
     )
-    os.makedirs(os.path.dirname(output_file), exist_ok=True)
-    filtered_audio.export(output_file, format="mp3")
-    print(f"✅ Filtered audio saved: {output_file}")
+    ai_response_text = response.choices[0].message.content
+    print(f"🧠 AI says: {ai_response_text}")
+    return ai_response_text
+
+
+def synthesize_filtered_mp3(voice_id: str, text: str) -> bytes:
+    """
+    Text-to-speech plus high-pass filtering, served from the TTS cache when the same
+    text was already spoken with the same voice and settings.
+    """
+    output_format = "mp3_44100_128"
+    cache = get_tts_cache()
+    cache_key = tts_cache_key(voice_id, text, TTS_MODEL_ID, output_format, TTS_VOICE_SETTINGS)
+    filtered_bytes = cache.get(cache_key)
+    if filtered_bytes is not None:
+        print("⚡ TTS cache hit")
+        return filtered_bytes
+
+    def fetch(cancelled, slots):
+        with slots.slot() as api_key:
+            audio_data = get_elevenlabs_client(api_key).text_to_speech.convert(
+                voice_id=voice_id,
+                text=text,
+                model_id=TTS_MODEL_ID,
+                output_format=output_format,
+                voice_settings=TTS_VOICE_SETTINGS
+            )
+            received = []
+            try:
+                for chunk in audio_data:
+                    if cancelled.is_set():
+                        return b""  # the other copy won; stop reading
+                    if chunk:
+                        received.append(chunk)
+            finally:
+                close = getattr(audio_data, "close", None)
+                if close is not None:
+                    close()
+            return b''.join(received)
+
+    # Same text and voice give the same audio, so a slow request is hedged; each
+    # copy holds its own rate-limit slot until its request is done.
+    with HedgeSlots(len(text)) as slots:
+        audio_bytes = vendor_call("elevenlabs", "tts_convert", fetch, slots, hedge=True)
+    filtered_bytes = filter_mp3_bytes(audio_bytes)
+    cache.put(cache_key, filtered_bytes)
+    return filtered_bytes
+
+
+def _synthesize_reply(voice_id: str, ai_response_text: str, owner=None) -> str:
+    """Step 4: convert the response to filtered MP3 audio in the generated-audio store."""
+    stored = store_generated_audio(synthesize_filtered_mp3(voice_id, ai_response_text), "mp3", owner)
+    print("🎙️ Voice assistant pipeline completed.")
+    return stored.path
 
 
 # ✅ Main Pipeline Function
-def run_voice_assistant_pipeline(audio_path: str, user_data: dict, skip_noise_reduction=True) -> str:
+def run_voice_assistant_pipeline(
+    audio_path: str, user_data: dict, skip_noise_reduction=True, owner=None, device_id="", voice_name=None
+) -> str:
     """
     Complete voice assistant pipeline.
 
@@ -120,66 +147,271 @@ def run_voice_assistant_pipeline(audio_path: str, user_data: dict, skip_noise_re
         audio_path (str): Path to the uploaded voice recording (.m4a or .wav).
         user_data (dict): Dictionary of user preferences and metadata.
         skip_noise_reduction (bool): Whether to skip noise reduction.
+        owner (User, optional): Owner of the voice sample, used to dedupe clones per user.
+        device_id (str, optional): Recording device, selects the owner's stored noise profile.
+        voice_name (str, optional): Name to clone the voice as, defaults to ELEVENLABS_VOICE_NAME.
 
     Returns:
         str: Path to the generated and filtered MP3 file.
     """
     print("🎙️ Running voice assistant pipeline...")
 
+    # Step 1: Clone voice
+    voice_id = _clone_voice_or_default(audio_path, skip_noise_reduction, owner, device_id, voice_name)
+
+    # Step 2: the prompt is built from user_data by _chat_messages (prompts.py)
     try:
-        # Step 1: Clone voice
-        voice_id = remove_noise_and_clone_voice(audio_path, default_voice_name, skip_noise_reduction)
+        ai_response_text = _generate_reply_text(user_data)
+        return _synthesize_reply(voice_id, ai_response_text, owner)
+
     except Exception as e:
-        print(f"❌ Voice cloning failed: {e}")
-        voice_id = default_voice_id
+        print(f"❌ Error generating response or speech: {e}")
+        traceback.print_exc()
+        return ""
 
-    # Step 2: Prepare prompt
-    prompt = "You are an AI assistant (user's loved one)...\n"
-    for key, value in user_data.items():
-        prompt += f"- {key.replace('_', ' ').capitalize()} is {value}.\n"
-    prompt += "\nRespond warmly and personally."
 
-    try:
-        # Step 3: Get AI response
-        response = openai_client.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {"role": "system", "content": "You are a warm, caring AI loved one. You must sound personal and affectionate. Use the user's data to shape your response naturally."},
-                {"role": "system", "content": f"User data: {json.dumps(user_data)}"},
-                {"role": "user", "content": user_data.get("distinct_greeting", "Hi there!")}
-            ],
+def run_voice_assistant_pipeline_concurrent(
+    audio_path: str, user_data: dict, skip_noise_reduction=True, owner=None, device_id="", voice_name=None
+) -> str:
+    """
+    Same as run_voice_assistant_pipeline, but runs voice cloning and the AI response
+    at the same time, since neither needs the other until text-to-speech.
+
+    The voice fallback is unchanged: if cloning fails, the reply is spoken with the
+    owner's most recently used voice, or ELEVENLABS_VOICE_ID.
+
+    Returns:
+        str: Path to the generated and filtered MP3 file, or "" on failure.
+    """
+    print("🎙️ Running voice assistant pipeline (concurrent)...")
+
+    with ThreadPoolExecutor(max_workers=2, thread_name_prefix="voice-pipeline") as executor:
+        voice_future = executor.submit(
+            run_in_worker_thread,
+            _clone_voice_or_default, audio_path, skip_noise_reduction, owner, device_id, voice_name
+        )
+        reply_future = executor.submit(_generate_reply_text, user_data)
+
+        try:
+            ai_response_text = reply_future.result()
+            voice_id = voice_future.result()
+            return _synthesize_reply(voice_id, ai_response_text, owner)
+
+        except Exception as e:
+            print(f"❌ Error generating response or speech: {e}")
+            traceback.print_exc()
+            return ""
+
+
+# ✅ Streaming Pipeline
+SENTENCE_END = re.compile(r'[.!?…]+["\')\]]*\s+')
+MIN_SENTENCE_CHARS = 20
+STREAM_TTS_CONCURRENCY = 2
+STREAM_SAMPLE_RATE = 24000
+STREAM_OUTPUT_FORMAT = f"pcm_{STREAM_SAMPLE_RATE}"
+
+
+def split_sentences(text_deltas):
+    """
+    Re-chunk a stream of text deltas into sentences as soon as each one is complete.
+
+    Very short fragments ("Hi!") are held back and merged with the next sentence so
+    each TTS call has enough context to sound natural.
+    """
+    buffer = ""
+    for delta in text_deltas:
+        buffer += delta
+        while True:
+            cut = next(
+                (match.end() for match in SENTENCE_END.finditer(buffer) if match.end() >= MIN_SENTENCE_CHARS),
+                None
+            )
+            if cut is None:
+                break
+            sentence, buffer = buffer[:cut].strip(), buffer[cut:]
+            if sentence:
+                yield sentence
+    if buffer.strip():
+        yield buffer.strip()
+
+
+def _stream_chat_text(messages: list, cache_key: str):
+    """
+    Yield an assistant reply to messages as text deltas from the OpenAI token stream.
+    cache_key is the persona's prompt cache key (prompts.prompt_cache_key).
+    """
+    # The deadline covers the wait for the response to start streaming.
+    stream = vendor_call(
+        "openai", "chat_stream",
+        lambda cancelled: get_openai_client().chat.completions.create(
+            model=CHAT_MODEL,
+            messages=messages,
             max_tokens=2000,
             temperature=0.7,
-        )
-        ai_response_text = response.choices[0].message.content
-        print(f"🧠 AI says: {ai_response_text}")
-
-        # Step 4: Convert response to voice
-        audio_data = elevenlabs_client.text_to_speech.convert(
-            voice_id=voice_id,
-            text=ai_response_text,
-            model_id="eleven_multilingual_v2",
-            output_format="mp3_44100_128",
-            voice_settings={
-                "stability": 0.5,
-                "use_speaker_boost": True,
-                "similarity_boost": 1.0,
-                "style": 1.0,
-                "speed": 0.9
-            }
-        )
+            stream=True,
+            prompt_cache_key=cache_key,
+        ),
+    )
+    for event in stream:
+        if event.choices and event.choices[0].delta.content:
+            yield event.choices[0].delta.content
+
+
+def _stream_reply_text(user_data: dict):
+    """Yield the assistant reply as text deltas from the OpenAI token stream."""
+    return _stream_chat_text(_chat_messages(user_data), prompt_cache_key(user_data))
+
+
+def _tts_stream(slots, **params):
+    """
+    ElevenLabs streaming TTS chunks, holding one of slots until the stream is
+    exhausted, closed or garbage-collected.
+    """
+    with slots.slot() as api_key:
+        audio_stream = get_elevenlabs_client(api_key).text_to_speech.stream(**params)
+        try:
+            yield from audio_stream
+        finally:
+            close = getattr(audio_stream, "close", None)
+            if close is not None:
+                close()
 
-        audio_bytes = b''.join(chunk for chunk in audio_data if chunk)
 
-        output_path = "output/output_audio_filtered2.mp3"
-        apply_filter_and_save_audio(audio_bytes, output_path)
-        print("🎙️ Voice assistant pipeline completed.")
-        return output_path
+def _synthesize_sentence(voice_id, text, previous_text, chunks: queue.Queue, cancelled: threading.Event):
+    # Sentences are cached as raw PCM: the high-pass filter carries state across
+    # sentences, so it runs on the way out instead.
+    cache = get_tts_cache()
+    cache_key = tts_cache_key(
+        voice_id, text, TTS_MODEL_ID, STREAM_OUTPUT_FORMAT, TTS_VOICE_SETTINGS, previous_text=previous_text
+    )
+    try:
+        cached = cache.get(cache_key)
+        if cached is not None:
+            chunks.put(cached)
+            return
 
+        def first_chunk(attempt_cancelled, slots):
+            audio_stream = _tts_stream(
+                slots,
+                voice_id=voice_id,
+                text=text,
+                previous_text=previous_text or None,
+                model_id=TTS_MODEL_ID,
+                output_format=STREAM_OUTPUT_FORMAT,
+                voice_settings=TTS_VOICE_SETTINGS
+            )
+            first = next(audio_stream, b"")
+            if attempt_cancelled.is_set():
+                audio_stream.close()  # the other copy won
+            return first, audio_stream
+
+        # The deadline and hedge cover the time to the first audio chunk; the
+        # winning copy keeps its slot until its stream is read.
+        with HedgeSlots(len(text)) as slots:
+            first, audio_stream = vendor_call("elevenlabs", "tts_stream", first_chunk, slots, hedge=True)
+        received = []
+        try:
+            for chunk in itertools.chain([first], audio_stream):
+                if cancelled.is_set():
+                    return
+                if chunk:
+                    chunks.put(chunk)
+                    received.append(chunk)
+        finally:
+            audio_stream.close()
+        cache.put(cache_key, b''.join(received))
     except Exception as e:
-        print(f"❌ Error generating response or speech: {e}")
-        traceback.print_exc()
-        return ""
+        chunks.put(e)
+    finally:
+        chunks.put(None)
+
+
+def stream_reply_audio(text_deltas, voice_id: str, cancelled: Optional[threading.Event] = None, on_sentence=None):
+    """
+    Speak a stream of reply text deltas, sentence by sentence.
+
+    Deltas are cut at sentence boundaries; each sentence goes to ElevenLabs TTS while
+    the rest is still being generated, and the audio is high-pass filtered chunk by
+    chunk and yielded in sentence order as soon as it arrives. Setting cancelled (or
+    closing the generator) stops generation and any in-flight TTS.
+
+    Args:
+        text_deltas (iterable): Reply text fragments, e.g. from _stream_chat_text.
+        voice_id (str): Voice to speak with.
+        cancelled (threading.Event, optional): Set by the caller to abandon the reply.
+        on_sentence (callable, optional): Called with each sentence as its audio starts.
+
+    Yields:
+        bytes: Filtered 16-bit mono PCM chunks at STREAM_SAMPLE_RATE.
+    """
+    sentences: queue.Queue = queue.Queue()
+    cancelled = cancelled or threading.Event()
+    executor = ThreadPoolExecutor(max_workers=1 + STREAM_TTS_CONCURRENCY)
+    tts_slots = threading.Semaphore(STREAM_TTS_CONCURRENCY)
+
+    def produce():
+        previous_text = ""
+        try:
+            for sentence in split_sentences(text_deltas):
+                print(f"🧠 AI says: {sentence}")
+                tts_slots.acquire()
+                if cancelled.is_set():
+                    break
+                chunks = queue.Queue()
+                future = executor.submit(_synthesize_sentence, voice_id, sentence, previous_text, chunks, cancelled)
+                future.add_done_callback(lambda _: tts_slots.release())
+                sentences.put((sentence, chunks))
+                previous_text = f"{previous_text} {sentence}".strip()
+        except Exception as e:
+            sentences.put(e)
+        finally:
+            sentences.put(None)
+
+    executor.submit(produce)
+    high_pass = StreamingHighPassFilter(STREAM_SAMPLE_RATE)
+    try:
+        while not cancelled.is_set():
+            item = sentences.get()
+            if item is None:
+                break
+            if isinstance(item, Exception):
+                raise item
+            sentence, chunks = item
+            if on_sentence is not None:
+                on_sentence(sentence)
+            while True:
+                chunk = chunks.get()
+                if chunk is None or cancelled.is_set():
+                    break
+                if isinstance(chunk, Exception):
+                    raise chunk
+                filtered = high_pass.process_pcm16(chunk)
+                if filtered:
+                    yield filtered
+    finally:
+        cancelled.set()
+        tts_slots.release()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def stream_voice_assistant_reply(user_data: dict, voice_id: Optional[str] = None):
+    """
+    Streaming variant of the response half of the pipeline: the OpenAI reply is
+    spoken sentence by sentence through stream_reply_audio while it is generated.
+
+    Args:
+        user_data (dict): Dictionary of user preferences and metadata.
+        voice_id (str, optional): Voice to speak with, defaults to ELEVENLABS_VOICE_ID.
+
+    Yields:
+        bytes: A streaming WAV header, then filtered 16-bit mono PCM chunks.
+
+    Raises:
+        NoVoiceError: Neither voice_id nor ELEVENLABS_VOICE_ID is set.
+    """
+    voice_id = require_voice_id(voice_id)
+    yield streaming_wav_header(STREAM_SAMPLE_RATE)
+    yield from stream_reply_audio(_stream_reply_text(user_data), voice_id)
 
 
 # ✅ Example usage (for testing only)
@@ -0,0 +1,80 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+
+# Bump whenever the wording or layout below changes: the memo (and the
+# provider-side cache key) then moves to the new prefix.
+PROMPT_VERSION = 1
+PERSONA_INSTRUCTIONS = (
+    "You are a warm, caring AI loved one. You must sound personal and affectionate. "
+    "Use the user's data to shape your response naturally."
+)
+PREFIX_MEMO_SIZE = 1024
+
+
+@dataclass(frozen=True)
+class SystemPrefix:
+    """The system messages for one persona, byte-identical on every call."""
+    version: int
+    digest: str
+    messages: tuple
+
+    @property
+    def cache_key(self) -> str:
+        # Routes requests with the same prefix to the same provider cache.
+        return f"tether-v{self.version}-{self.digest[:16]}"
+
+
+def canonical_user_data(user_data: dict) -> str:
+    """user_data as JSON with sorted keys and fixed separators, so equal data is equal bytes."""
+    return json.dumps(user_data or {}, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+_prefixes: OrderedDict[str, SystemPrefix] = OrderedDict()
+_prefixes_lock = threading.Lock()
+
+
+def system_prefix(user_data: dict) -> SystemPrefix:
+    """
+    The persona's system prefix: the fixed instructions, then the user data.
+
+    Nothing that changes per turn goes in here, so consecutive requests for the
+    same persona share their leading tokens and the provider's prompt cache
+    (OpenAI caches prefixes of 1024+ tokens) can serve them. Memoized by a hash of
+    the canonical user data and PROMPT_VERSION.
+    """
+    data = canonical_user_data(user_data)
+    digest = hashlib.sha256(f"{PROMPT_VERSION}\n{data}".encode("utf-8")).hexdigest()
+    with _prefixes_lock:
+        prefix = _prefixes.get(digest)
+        if prefix is not None:
+            _prefixes.move_to_end(digest)
+            return prefix
+
+    prefix = SystemPrefix(
+        version=PROMPT_VERSION,
+        digest=digest,
+        messages=(
+            {"role": "system", "content": PERSONA_INSTRUCTIONS},
+            {"role": "system", "content": f"User data: {data}"},
+        ),
+    )
+    with _prefixes_lock:
+        _prefixes[digest] = prefix
+        while len(_prefixes) > PREFIX_MEMO_SIZE:
+            _prefixes.popitem(last=False)
+    return prefix
+
+
+def build_messages(user_data: dict, turns=()) -> list:
+    """
+    Chat messages for a request: the persona's stable prefix, then the per-turn
+    messages (history, the new user turn) last.
+    """
+    return [dict(message) for message in system_prefix(user_data).messages] + list(turns)
+
+
+def prompt_cache_key(user_data: dict) -> str:
+    return system_prefix(user_data).cache_key
@@ -0,0 +1,349 @@
+import hashlib
+import itertools
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from app.features.voice_cloning.clients import get_redis_client
+
+# Several keys spread the load; they must belong to the same ElevenLabs account
+# (or workspace), since cloned voices are only visible to their own account.
+ELEVENLABS_API_KEYS = [
+    key.strip() for key in (os.getenv("ELEVENLABS_API_KEYS") or os.getenv("ELEVENLABS_API_KEY") or "").split(",")
+    if key.strip()
+]
+# Requests in flight per key (the plan's concurrency limit) and characters sent per
+# key per rolling minute; 0 disables the limit.
+ELEVENLABS_MAX_CONCURRENCY = int(os.getenv("ELEVENLABS_MAX_CONCURRENCY", 5))
+ELEVENLABS_CHARS_PER_MINUTE = int(os.getenv("ELEVENLABS_CHARS_PER_MINUTE", 0))
+# How long a call waits for a free slot before giving up.
+ELEVENLABS_QUEUE_TIMEOUT_SECONDS = float(os.getenv("ELEVENLABS_QUEUE_TIMEOUT_SECONDS", 60))
+# A slot held longer than this (e.g. by a killed worker) is reclaimed.
+LEASE_SECONDS = 300
+WINDOW_SECONDS = 60
+POLL_SECONDS = 0.05
+
+
+class RateLimitTimeout(TimeoutError):
+    """No API key had a free slot (or character budget) within the queue timeout."""
+
+
+class ElevenLabsNotConfigured(RuntimeError):
+    """Neither ELEVENLABS_API_KEYS nor ELEVENLABS_API_KEY is set."""
+
+
+def _key_id(api_key: str) -> str:
+    # Redis only ever sees a fingerprint of the key.
+    return hashlib.sha256(api_key.encode()).hexdigest()[:16]
+
+
+class LocalLimits:
+    """Slots, character windows and cool-downs for this process only."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._slots = {}
+        self._chars = {}
+        self._cooldowns = {}
+
+    def try_acquire(self, key_id, token, chars, max_concurrency, chars_per_minute, now):
+        """Take a slot and charge chars; returns 0 on success, else seconds to wait."""
+        with self._lock:
+            if self._cooldowns.get(key_id, 0) > now:
+                return self._cooldowns[key_id] - now
+            slots = self._slots.setdefault(key_id, {})
+            for expired in [t for t, expires in slots.items() if expires <= now]:
+                del slots[expired]
+            if max_concurrency and len(slots) >= max_concurrency:
+                return POLL_SECONDS
+
+            window = self._chars.setdefault(key_id, deque())
+            while window and window[0][0] <= now - WINDOW_SECONDS:
+                window.popleft()
+            if chars_per_minute and chars:
+                used = sum(spent for _, spent in window)
+                # A request larger than the whole budget still goes through on an idle key.
+                if used and used + chars > chars_per_minute:
+                    return window[0][0] + WINDOW_SECONDS - now
+                window.append((now, chars))
+            slots[token] = now + LEASE_SECONDS
+            return 0
+
+    def release(self, key_id, token):
+        with self._lock:
+            self._slots.get(key_id, {}).pop(token, None)
+
+    def cool_down(self, key_id, seconds, now):
+        with self._lock:
+            self._cooldowns[key_id] = max(self._cooldowns.get(key_id, 0), now + seconds)
+
+
+class RedisLimits:
+    """
+    The same bookkeeping shared by every worker: per key, a sorted set of slot
+    tokens by lease expiry, a sorted set of "token:chars" entries by time, and a
+    cool-down key that expires with Retry-After. Checks and updates run in one
+    Lua script, so two workers never take the last slot at once.
+    """
+    PREFIX = "elevenlabs:rate"
+
+    ACQUIRE = """
+    local now = tonumber(ARGV[1])
+    local chars = tonumber(ARGV[3])
+    local max_concurrency = tonumber(ARGV[4])
+    local chars_per_minute = tonumber(ARGV[5])
+    local lease = tonumber(ARGV[6])
+    local window = tonumber(ARGV[7])
+
+    local cooldown = redis.call('PTTL', KEYS[3])
+    if cooldown > 0 then return tostring(cooldown / 1000) end
+
+    redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now)
+    if max_concurrency > 0 and redis.call('ZCARD', KEYS[1]) >= max_concurrency then
+        return ARGV[8]
+    end
+
+    redis.call('ZREMRANGEBYSCORE', KEYS[2], '-inf', now - window)
+    if chars_per_minute > 0 and chars > 0 then
+        local entries = redis.call('ZRANGE', KEYS[2], 0, -1, 'WITHSCORES')
+        local used = 0
+        for i = 1, #entries, 2 do
+            used = used + tonumber(string.match(entries[i], ':(%d+)$'))
+        end
+        if used > 0 and used + chars > chars_per_minute then
+            return tostring(tonumber(entries[2]) + window - now)
+        end
+        redis.call('ZADD', KEYS[2], now, ARGV[2] .. ':' .. chars)
+        redis.call('EXPIRE', KEYS[2], math.ceil(window) + 1)
+    end
+
+    redis.call('ZADD', KEYS[1], now + lease, ARGV[2])
+    redis.call('EXPIRE', KEYS[1], math.ceil(lease))
+    return '0'
+    """
+
+    def __init__(self, redis_client):
+        self.redis = redis_client
+        self._acquire = redis_client.register_script(self.ACQUIRE)
+
+    def _keys(self, key_id):
+        return [f"{self.PREFIX}:{key_id}:slots", f"{self.PREFIX}:{key_id}:chars", f"{self.PREFIX}:{key_id}:cooldown"]
+
+    def try_acquire(self, key_id, token, chars, max_concurrency, chars_per_minute, now):
+        wait = self._acquire(
+            keys=self._keys(key_id),
+            args=[now, token, chars, max_concurrency, chars_per_minute, LEASE_SECONDS, WINDOW_SECONDS, POLL_SECONDS],
+        )
+        return float(wait)
+
+    def release(self, key_id, token):
+        self.redis.zrem(self._keys(key_id)[0], token)
+
+    def cool_down(self, key_id, seconds, now):
+        cooldown_key = self._keys(key_id)[2]
+        # Never shorten a longer cool-down another worker already set.
+        if (self.redis.pttl(cooldown_key) or 0) < seconds * 1000:
+            self.redis.set(cooldown_key, 1, px=max(1, int(seconds * 1000)))
+
+
+class ElevenLabsRateLimiter:
+    """
+    Client-side limits for ElevenLabs, so bursts queue here instead of coming back
+    as 429s: at most max_concurrency requests in flight and chars_per_minute
+    characters per API key, across every worker when a Redis client is given.
+
+    Keys are tried round-robin, so several keys share the load. A 429 puts its key
+    on cool-down for the response's Retry-After (see clients.RetryTransport).
+    If Redis is unreachable the limits fall back to this process.
+    """
+
+    def __init__(
+        self,
+        api_keys=None,
+        max_concurrency=ELEVENLABS_MAX_CONCURRENCY,
+        chars_per_minute=ELEVENLABS_CHARS_PER_MINUTE,
+        redis_client=None,
+        clock=time.time,
+    ):
+        self.api_keys = list(api_keys if api_keys is not None else ELEVENLABS_API_KEYS)
+        self.max_concurrency = max_concurrency
+        self.chars_per_minute = chars_per_minute
+        self.clock = clock
+        self.local = LocalLimits()
+        self.limits = RedisLimits(redis_client) if redis_client is not None else self.local
+        self._next_key = itertools.count()
+
+    def _call(self, method, *args):
+        try:
+            return getattr(self.limits, method)(*args)
+        except Exception as e:
+            if self.limits is self.local:
+                raise
+            print(f"⚠️ ElevenLabs rate limit store unavailable, limiting per process: {e}")
+            return getattr(self.local, method)(*args)
+
+    def try_acquire(self, chars=0):
+        """
+        Take a slot on the first key that has one.
+
+        Returns:
+            tuple: (api_key, token) on success, or (None, seconds to wait).
+        """
+        if not self.api_keys:
+            return None, 0  # nothing to limit; the client uses ELEVENLABS_API_KEY
+        token = uuid.uuid4().hex
+        start = next(self._next_key)
+        waits = []
+        for offset in range(len(self.api_keys)):
+            api_key = self.api_keys[(start + offset) % len(self.api_keys)]
+            wait = self._call(
+                "try_acquire", _key_id(api_key), token, chars, self.max_concurrency, self.chars_per_minute, self.clock()
+            )
+            if wait <= 0:
+                return api_key, token
+            waits.append(wait)
+        return None, min(waits)
+
+    def release(self, api_key, token):
+        self._call("release", _key_id(api_key), token)
+
+    def cool_down(self, api_key, seconds):
+        if api_key in self.api_keys:
+            print(f"⏳ ElevenLabs key …{api_key[-4:]} throttled, cooling down for {seconds:.1f}s")
+            self._call("cool_down", _key_id(api_key), seconds, self.clock())
+
+    def acquire(self, chars=0, timeout=ELEVENLABS_QUEUE_TIMEOUT_SECONDS):
+        """
+        Wait for a free slot, charging chars against the key's per-minute budget.
+
+        Returns:
+            tuple: (api_key, token); pass both to release().
+
+        Raises:
+            ElevenLabsNotConfigured: There are no keys to wait for.
+            RateLimitTimeout: No key was free within timeout seconds.
+        """
+        if not self.api_keys:
+            raise ElevenLabsNotConfigured("No ElevenLabs API keys: set ELEVENLABS_API_KEYS or ELEVENLABS_API_KEY")
+        give_up_at = time.monotonic() + timeout
+        while True:
+            api_key, token = self.try_acquire(chars)
+            if api_key is not None:
+                return api_key, token
+            remaining = give_up_at - time.monotonic()
+            if remaining <= 0:
+                raise RateLimitTimeout(f"No ElevenLabs capacity for {chars} characters within {timeout:.0f}s")
+            wait = token
+            time.sleep(min(max(wait, POLL_SECONDS), remaining, 1.0))
+
+    @contextmanager
+    def slot(self, chars=0, timeout=ELEVENLABS_QUEUE_TIMEOUT_SECONDS):
+        """
+        Wait for a free slot (see acquire) and hold it for the duration of the block.
+
+        Yields:
+            str: The API key to call with (None if no keys are configured).
+        """
+        if not self.api_keys:
+            yield None
+            return
+        api_key, token = self.acquire(chars, timeout)
+        try:
+            yield api_key
+        finally:
+            self.release(api_key, token)
+
+
+class HedgeSlots:
+    """
+    ElevenLabs slots for the copies of one hedged vendor_call.
+
+    The slot the caller waited for is reserved up front, outside the call's
+    deadline, and taken by the first copy. A hedge only goes out if another slot
+    is free right now; otherwise it fails with RateLimitTimeout and the first copy
+    carries on. Each copy holds its slot until its own request is done, even when
+    vendor_call has already given up on it.
+
+        with HedgeSlots(len(text)) as slots:
+            vendor_call("elevenlabs", "tts_convert", fetch, hedge=True)  # fetch uses slots.slot()
+    """
+
+    def __init__(self, chars=0, timeout=ELEVENLABS_QUEUE_TIMEOUT_SECONDS, limiter=None):
+        self.limiter = limiter or get_rate_limiter()
+        self.chars = chars
+        self.timeout = timeout
+        self._reserved = None
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        if self.limiter.api_keys:
+            self._reserved = self.limiter.acquire(self.chars, self.timeout)
+        return self
+
+    def __exit__(self, *exc_info):
+        # No copy took the reservation (e.g. the circuit was open).
+        with self._lock:
+            reserved, self._reserved = self._reserved, None
+        if reserved is not None:
+            self.limiter.release(*reserved)
+
+    @contextmanager
+    def slot(self):
+        """
+        Hold a slot for one copy's request.
+
+        Yields:
+            str: The API key to call with (None if no keys are configured).
+
+        Raises:
+            RateLimitTimeout: This is a hedge and no slot is free.
+        """
+        if not self.limiter.api_keys:
+            yield None
+            return
+        with self._lock:
+            reserved, self._reserved = self._reserved, None
+        if reserved is None:
+            api_key, token = self.limiter.try_acquire(self.chars)
+            if api_key is None:
+                raise RateLimitTimeout("No free ElevenLabs slot for a hedged request")
+            reserved = api_key, token
+        try:
+            yield reserved[0]
+        finally:
+            self.limiter.release(*reserved)
+
+
+def rate_limit_redis_url():
+    """ELEVENLABS_RATE_LIMIT_REDIS_URL, else the Django cache's Redis (if it uses one)."""
+    url = os.getenv("ELEVENLABS_RATE_LIMIT_REDIS_URL")
+    if url is not None:
+        return url or None  # set but empty: limit per process
+    try:
+        from django.conf import settings
+
+        cache = settings.CACHES.get("default", {}) if settings.configured else {}
+    except ImportError:
+        return None
+    return cache.get("LOCATION") if "redis" in cache.get("BACKEND", "").lower() else None
+
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> ElevenLabsRateLimiter:
+    """Per-process ElevenLabs rate limiter, built on first use."""
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            url = rate_limit_redis_url()
+            _limiter = ElevenLabsRateLimiter(redis_client=get_redis_client(url) if url else None)
+        return _limiter
+
+
+def elevenlabs_slot(chars=0, timeout=ELEVENLABS_QUEUE_TIMEOUT_SECONDS):
+    """Shortcut for get_rate_limiter().slot(); use the yielded key with get_elevenlabs_client()."""
+    return get_rate_limiter().slot(chars, timeout)
@@ -0,0 +1,222 @@
+import hashlib
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import numpy as np
+
+
+def sample_fingerprint(audio_data: "np.ndarray", sample_rate: int) -> str:
+    """
+    Content hash of a voice sample, taken over its normalized PCM (mono, 16-bit)
+    so the same recording hashes the same regardless of how it was decoded.
+    """
+    import numpy as np
+
+    samples = np.asarray(audio_data)
+    if samples.ndim == 2:
+        samples = samples.mean(axis=1)
+    if samples.dtype != np.int16:
+        samples = (np.clip(samples, -1.0, 1.0) * 32767).astype(np.int16)
+
+    digest = hashlib.sha256()
+    digest.update(str(int(sample_rate)).encode())
+    digest.update(samples.tobytes())
+    return digest.hexdigest()
+
+
+def _voices_model(name):
+    """Return a model from app.voices, or None when running outside Django."""
+    try:
+        from django.apps import apps
+    except ImportError:
+        return None
+    if not apps.ready:
+        return None
+    return apps.get_model("voices", name)
+
+
+def _voice_model():
+    return _voices_model("Voice")
+
+
+def run_in_worker_thread(func, *args, **kwargs):
+    """
+    Call func from a short-lived worker thread and close the DB connections that
+    thread opened, so registry lookups off the request thread don't leak them.
+    """
+    try:
+        return func(*args, **kwargs)
+    finally:
+        if _voice_model() is not None:
+            from django.db import connections
+            connections.close_all()
+
+
+def _owner_id(owner):
+    return getattr(owner, "pk", owner)
+
+
+def lookup_cloned_voice(sample_hash: str, clone_name: str, owner=None):
+    """Return the voice_id already cloned from this sample, if any."""
+    model = _voice_model()
+    if model is None:
+        return None
+    return (
+        model.objects
+        .filter(
+            sample_hash=sample_hash,
+            name=clone_name,
+            owner_id=_owner_id(owner),
+            status=model.Status.READY,
+        )
+        .values_list("voice_id", flat=True)
+        .first()
+    )
+
+
+def remember_cloned_voice(sample_hash: str, clone_name: str, voice_id: str, owner=None):
+    """Record the voice_id returned by the vendor for this sample."""
+    model = _voice_model()
+    if model is None:
+        return
+    from django.utils import timezone
+
+    model.objects.update_or_create(
+        sample_hash=sample_hash,
+        name=clone_name,
+        owner_id=_owner_id(owner),
+        defaults={"voice_id": voice_id, "status": model.Status.READY, "last_used_at": timezone.now()},
+    )
+    forget_resolved_voices(owner, clone_name)
+
+
+# Resolved voice ids are cached per (owner, name) for this long.
+VOICE_CACHE_SECONDS = 300
+_VOICE_CACHE_VERSION_KEY = "voices:version"
+
+
+def _voice_cache_key(cache, owner, name):
+    # Bumping the version (after a vendor sync) invalidates every cached lookup at once.
+    version = cache.get_or_set(_VOICE_CACHE_VERSION_KEY, 1, None)
+    name_hash = hashlib.sha1((name or "").encode()).hexdigest()[:16]
+    return f"voices:{version}:{_owner_id(owner) or ''}:{name_hash}"
+
+
+def resolve_voice_id(owner=None, name=None, default=None):
+    """
+    The vendor voice_id of the owner's ready voice called name (their most recently
+    used one when name is empty), or default when they have none.
+
+    Lookups are cached in Django's cache for VOICE_CACHE_SECONDS, so switching between
+    voices costs at most one query on the (owner, name) index; a miss also refreshes
+    the voice's last_used_at.
+    """
+    model = _voice_model()
+    if model is None:
+        return default
+    from django.core.cache import cache
+    from django.db.models import F
+    from django.utils import timezone
+
+    key = _voice_cache_key(cache, owner, name)
+    voice_id = cache.get(key)
+    if voice_id is None:
+        voices = model.objects.filter(owner_id=_owner_id(owner), status=model.Status.READY)
+        if name:
+            voices = voices.filter(name=name)
+        row = (
+            voices
+            .order_by(F("last_used_at").desc(nulls_last=True), "-created_at")
+            .values_list("pk", "voice_id")
+            .first()
+        )
+        voice_id = ""
+        if row:
+            model.objects.filter(pk=row[0]).update(last_used_at=timezone.now())
+            voice_id = row[1]
+        cache.set(key, voice_id, VOICE_CACHE_SECONDS)
+    return voice_id or default
+
+
+def voice_available_to(owner, voice_id: str) -> bool:
+    """Whether voice_id is one of the owner's ready voices or a shared one (owner=None)."""
+    model = _voice_model()
+    if model is None or not voice_id:
+        return False
+    from django.db.models import Q
+
+    return model.objects.filter(
+        Q(owner_id=_owner_id(owner)) | Q(owner__isnull=True), voice_id=voice_id, status=model.Status.READY
+    ).exists()
+
+
+def forget_resolved_voices(owner=None, name=None):
+    """Drop the cached resolve_voice_id results a new or changed voice affects."""
+    if _voice_model() is None:
+        return
+    from django.core.cache import cache
+
+    cache.delete_many([_voice_cache_key(cache, owner, name), _voice_cache_key(cache, owner, None)])
+
+
+def forget_all_resolved_voices():
+    if _voice_model() is None:
+        return
+    from django.core.cache import cache
+
+    try:
+        cache.incr(_VOICE_CACHE_VERSION_KEY)
+    except ValueError:
+        cache.set(_VOICE_CACHE_VERSION_KEY, 1, None)
+
+
+def lookup_noise_profile(owner, device_id: str, sample_rate: int):
+    """Return the stored noise profile for this user's device as a float32 vector, if any."""
+    model = _voices_model("NoiseProfile")
+    if model is None or owner is None:
+        return None
+    spectrum = (
+        model.objects
+        .filter(owner_id=_owner_id(owner), device_id=device_id or "", sample_rate=sample_rate)
+        .values_list("spectrum", flat=True)
+        .first()
+    )
+    if spectrum is None:
+        return None
+    import numpy as np
+
+    return np.frombuffer(bytes(spectrum), dtype=np.float32)
+
+
+def remember_noise_profile(owner, device_id: str, sample_rate: int, profile: "np.ndarray", source: str):
+    """Store (or replace) the noise profile for this user's device."""
+    model = _voices_model("NoiseProfile")
+    if model is None or owner is None:
+        return
+    import numpy as np
+
+    model.objects.update_or_create(
+        owner_id=_owner_id(owner),
+        device_id=device_id or "",
+        sample_rate=sample_rate,
+        defaults={"spectrum": np.asarray(profile, dtype=np.float32).tobytes(), "source": source},
+    )
+
+
+def record_generated_audio(content_hash: str, path: str, size: int, content_type: str, owner=None):
+    """Record (or refresh) a generated audio file for its owner; returns its audio_id."""
+    model = _voices_model("GeneratedAudio")
+    if model is None:
+        return None
+    from django.utils import timezone
+    audio, _ = model.objects.update_or_create(
+        content_hash=content_hash,
+        owner_id=_owner_id(owner),
+        defaults={
+            "path": path,
+            "size": size,
+            "content_type": content_type,
+            "last_accessed_at": timezone.now(),
+        },
+    )
+    return audio.pk
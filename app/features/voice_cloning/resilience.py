@@ -0,0 +1,255 @@
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Optional
+from app.features.voice_cloning.rate_limit import RateLimitTimeout
+
+# Consecutive failures that open a vendor's circuit, and how long it stays open
+# before one probe call is let through (half-open).
+BREAKER_FAILURES = int(os.getenv("VENDOR_BREAKER_FAILURES", 5))
+BREAKER_RESET_SECONDS = float(os.getenv("VENDOR_BREAKER_RESET_SECONDS", 30))
+# Per-operation deadlines in seconds; VENDOR_DEADLINE_<OPERATION>_SECONDS overrides one.
+DEFAULT_DEADLINES = {
+    "chat": 30.0,
+    "chat_stream": 10.0,  # time to the first token
+    "tts_convert": 30.0,
+    "tts_stream": 10.0,  # time to the first audio chunk
+    "stt": 30.0,
+}
+# Hedge after the operation's recent p95; until enough samples exist, after this.
+HEDGE_DEFAULT_DELAY_SECONDS = float(os.getenv("VENDOR_HEDGE_DEFAULT_DELAY_SECONDS", 2.0))
+HEDGE_MIN_DELAY_SECONDS = float(os.getenv("VENDOR_HEDGE_MIN_DELAY_SECONDS", 0.1))
+HEDGE_MIN_SAMPLES = 20
+VENDOR_CALL_THREADS = int(os.getenv("VENDOR_CALL_THREADS", 32))
+
+
+class CircuitOpenError(Exception):
+    """The vendor's circuit is open; the call was not attempted."""
+
+
+class DeadlineExceeded(TimeoutError):
+    """The vendor call did not finish within its deadline."""
+
+
+def deadline_for(operation: str) -> float:
+    value = os.getenv(f"VENDOR_DEADLINE_{operation.upper()}_SECONDS")
+    return float(value) if value else DEFAULT_DEADLINES.get(operation, 30.0)
+
+
+def is_vendor_failure(error: BaseException) -> bool:
+    """Whether an error says the vendor is unhealthy (so it counts against the circuit)."""
+    if isinstance(error, (CircuitOpenError, RateLimitTimeout)):
+        return False  # nothing reached the vendor
+    status = getattr(error, "status_code", None) or getattr(getattr(error, "response", None), "status_code", None)
+    # Client errors (bad voice id, invalid input) are our problem, not the vendor's.
+    return status is None or status == 429 or status >= 500
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker for one vendor.
+
+    CLOSED: calls go through; failure_threshold failures in a row open the circuit.
+    OPEN: calls fail fast with CircuitOpenError for reset_seconds.
+    HALF_OPEN: one probe call goes through; success closes the circuit, failure
+    opens it again.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, name, failure_threshold=BREAKER_FAILURES, reset_seconds=BREAKER_RESET_SECONDS, clock=time.monotonic):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._state == self.OPEN and self.clock() - self._opened_at >= self.reset_seconds:
+                return self.HALF_OPEN
+            return self._state
+
+    def before_call(self):
+        with self._lock:
+            if self._state == self.OPEN:
+                if self.clock() - self._opened_at < self.reset_seconds:
+                    raise CircuitOpenError(f"{self.name} circuit is open")
+                self._state = self.HALF_OPEN
+            if self._state == self.HALF_OPEN:
+                if self._probing:
+                    raise CircuitOpenError(f"{self.name} circuit is half-open, probe in flight")
+                self._probing = True
+
+    def record_success(self):
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    print(f"⚠️ {self.name} circuit opened after {self._failures} failure(s)")
+                self._state = self.OPEN
+                self._opened_at = self.clock()
+            self._probing = False
+
+
+class LatencyTracker:
+    """Recent successful call durations for one vendor operation."""
+
+    def __init__(self, size=200):
+        self._samples = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def record(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, q):
+        with self._lock:
+            samples = sorted(self._samples)
+        if len(samples) < HEDGE_MIN_SAMPLES:
+            return None
+        return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+
+_breakers: dict[str, CircuitBreaker] = {}
+_latencies: dict[tuple[str, str], LatencyTracker] = {}
+_registry_lock = threading.Lock()
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def get_breaker(vendor: str) -> CircuitBreaker:
+    with _registry_lock:
+        if vendor not in _breakers:
+            _breakers[vendor] = CircuitBreaker(vendor)
+        return _breakers[vendor]
+
+
+def get_latency_tracker(vendor: str, operation: str) -> LatencyTracker:
+    with _registry_lock:
+        return _latencies.setdefault((vendor, operation), LatencyTracker())
+
+
+def _get_executor():
+    global _executor
+    with _registry_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=VENDOR_CALL_THREADS, thread_name_prefix="vendor-call")
+        return _executor
+
+
+def reset_resilience():
+    """Forget breaker state and latency history (tests, or after a config change)."""
+    with _registry_lock:
+        _breakers.clear()
+        _latencies.clear()
+
+
+def hedge_delay(vendor: str, operation: str) -> float:
+    p95 = get_latency_tracker(vendor, operation).percentile(0.95)
+    return HEDGE_DEFAULT_DELAY_SECONDS if p95 is None else max(HEDGE_MIN_DELAY_SECONDS, p95)
+
+
+_call_state = threading.local()
+
+
+def remaining_deadline():
+    """Seconds left before the vendor_call running on this thread gives up, or None outside one."""
+    expires = getattr(_call_state, "expires", None)
+    return None if expires is None else max(0.0, expires - time.monotonic())
+
+
+def _attempt(vendor, operation, func, cancelled, expires, args, kwargs):
+    _call_state.expires = expires
+    started = time.monotonic()
+    try:
+        result = func(cancelled, *args, **kwargs)
+    finally:
+        _call_state.expires = None
+    get_latency_tracker(vendor, operation).record(time.monotonic() - started)
+    return result
+
+
+def vendor_call(vendor: str, operation: str, func, *args, deadline=None, hedge=False, idempotent=True, **kwargs):
+    """
+    Call func(cancelled, *args, **kwargs) against a vendor, behind the vendor's
+    circuit breaker and within a deadline.
+
+    Non-idempotent calls (idempotent=False, e.g. cloning a voice) get no deadline
+    and are never hedged: giving up on one that is still running would leave its
+    side effect (a new voice) unrecorded, so the caller waits for the outcome and
+    only the HTTP read timeout bounds it.
+
+    With hedge=True (idempotent calls only, e.g. TTS convert or STT) a second copy
+    is started if the first hasn't answered after the operation's recent p95
+    latency; the first successful copy wins. The loser is cancelled: a copy that
+    hasn't started never runs, and a running one sees cancelled set and should
+    stop reading and close its response.
+
+    The caller's thread is released at the deadline even if the vendor never
+    answers. The abandoned copy keeps running until its HTTP read timeout, and
+    holds one of the VENDOR_CALL_THREADS pool workers until then; enough stuck
+    copies starve the pool, and later calls miss their deadlines while queued.
+
+    Raises:
+        CircuitOpenError: The vendor is failing; nothing was sent.
+        DeadlineExceeded: No copy finished in time (counts as a vendor failure).
+    """
+    if hedge and not idempotent:
+        raise ValueError("Only idempotent vendor calls can be hedged")
+    breaker = get_breaker(vendor)
+    breaker.before_call()
+    deadline = deadline if deadline is not None else deadline_for(operation)
+    expires = time.monotonic() + deadline if idempotent else None
+    cancelled = threading.Event()
+    executor = _get_executor()
+
+    pending = {executor.submit(_attempt, vendor, operation, func, cancelled, expires, args, kwargs)}
+    hedge_at = time.monotonic() + hedge_delay(vendor, operation) if hedge else None
+    error: Optional[BaseException] = None
+    try:
+        while pending:
+            now = time.monotonic()
+            if expires is not None and now >= expires:
+                break
+            wakes = [at for at in (expires, hedge_at) if at is not None]
+            timeout = max(0.0, min(wakes) - now) if wakes else None
+            done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    breaker.record_success()
+                    return future.result()
+                error = future.exception()
+            failed_early = not pending and error is not None and is_vendor_failure(error)
+            if hedge_at is not None and (time.monotonic() >= hedge_at or failed_early):
+                # Hedge at most once, and only while the circuit is closed (not when
+                # this call is the half-open probe); either way the hedge is settled.
+                if breaker.state == CircuitBreaker.CLOSED:
+                    print(f"🪁 Hedging {vendor} {operation} after {hedge_delay(vendor, operation):.2f}s")
+                    pending.add(executor.submit(_attempt, vendor, operation, func, cancelled, expires, args, kwargs))
+                hedge_at = None
+
+        if error is not None and not pending:
+            if is_vendor_failure(error):
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+            raise error
+        breaker.record_failure()
+        raise DeadlineExceeded(f"{vendor} {operation} took longer than {deadline:.1f}s")
+    finally:
+        cancelled.set()
+        for future in pending:
+            future.cancel()
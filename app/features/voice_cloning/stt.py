@@ -1,33 +1,65 @@
 import os
-import requests
-from dotenv import load_dotenv
+from concurrent.futures import ThreadPoolExecutor
+from app.features.voice_cloning.clients import elevenlabs_base_url, get_http_session, http_timeout, report_throttled
+from app.features.voice_cloning.ingest import decode_upload
+from app.features.voice_cloning.rate_limit import HedgeSlots
+from app.features.voice_cloning.resilience import vendor_call
+from app.features.voice_cloning.vad import split_on_silence, trim_silence
+
+STT_SEGMENT_CONCURRENCY = int(os.getenv("STT_SEGMENT_CONCURRENCY", 4))
 
 class ElevenLabsTranscriber:
     def __init__(self):
-        load_dotenv()
         self.api_key = os.getenv("ELEVENLABS_API_KEY")
-        self.base_url = "https://api.elevenlabs.io/v1/speech-to-text"
+        self.base_url = f"{elevenlabs_base_url()}/v1/speech-to-text"
         self.model_id = "scribe_v1"
 
     def transcribe(self, file_path: str):
         """Transcribe the given audio file and return the text or error."""
         try:
             with open(file_path, 'rb') as audio_file:
-                response = requests.post(
+                return self.transcribe_bytes(audio_file, file_path)
+        except Exception as e:
+            return {"error": str(e)}
+
+    def transcribe_bytes(self, audio, filename="audio.wav", file_format="other"):
+        """
+        Transcribe in-memory audio (bytes or a file object) and return the text or error.
+
+        file_format="pcm_s16le_16" sends raw 16 kHz mono PCM, which the API accepts
+        without decoding it first.
+        """
+        # Read a file object once so a hedged retry can send the same bytes.
+        if hasattr(audio, "read"):
+            audio = audio.read()
+
+        def post(cancelled, slots):
+            with slots.slot() as api_key:
+                response = get_http_session().post(
                     self.base_url,
                     headers={
-                        "xi-api-key": self.api_key
+                        "xi-api-key": api_key or self.api_key
                     },
                     data={
                         'model_id': self.model_id,
-                        'file_format': "other",
+                        'file_format': file_format,
                     },
                     files={
-                        'file': (file_path, audio_file),
+                        'file': (filename, audio),
                     },
+                    timeout=http_timeout(),
                 )
+            if response.status_code == 429:
+                # The session doesn't retry POSTs on a status; the hedge or the caller does.
+                retry_after = response.headers.get("retry-after", "")
+                report_throttled(api_key or self.api_key, float(retry_after) if retry_after.isdigit() else 1.0)
+            if response.status_code == 429 or response.status_code >= 500:
+                response.raise_for_status()  # counts against the circuit
+            return response.json()
 
-            result = response.json()
+        try:
+            with HedgeSlots() as slots:
+                result = vendor_call("elevenlabs", "stt", post, slots, hedge=True)
             if "text" in result:
                 return result["text"]
             else:
@@ -36,6 +68,54 @@ class ElevenLabsTranscriber:
         except Exception as e:
             return {"error": str(e)}
 
+    def transcribe_segmented(self, file_path: str, max_workers=STT_SEGMENT_CONCURRENCY):
+        """
+        Transcribe a long recording as speech segments split at pauses, several at a
+        time, so it takes about as long as the longest segment rather than the sum.
+
+        Returns:
+            dict: {"text": ..., "segments": [{"start": s, "end": s, "text": ...}, ...]}
+            with times in seconds, or {"error": ...}.
+        """
+        try:
+            audio = decode_upload(file_path)
+        except Exception as e:
+            return {"error": str(e)}
+        return self.transcribe_pcm_segmented(audio.pcm, audio.sample_rate, max_workers)
+
+    def transcribe_pcm_segmented(self, pcm, sample_rate, max_workers=STT_SEGMENT_CONCURRENCY):
+        """
+        transcribe_segmented() for 16 kHz mono int16 PCM already in memory. Long pauses
+        inside each segment are shortened before upload; "dropped_seconds" says how
+        much audio that saved.
+        """
+        bounds = split_on_silence(pcm, sample_rate)
+        if not bounds:
+            return {"text": "", "segments": [], "dropped_seconds": len(pcm) / sample_rate}
+        dropped = [len(pcm) / sample_rate - sum(end - start for start, end in bounds) / sample_rate]
+
+        def transcribe_segment(bound):
+            start, end = bound
+            speech, report = trim_silence(pcm[start:end], sample_rate)
+            dropped.append(report.dropped_seconds)
+            return self.transcribe_bytes(speech.astype("<i2").tobytes(), "segment.pcm", "pcm_s16le_16")
+
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(bounds)))) as executor:
+            texts = list(executor.map(transcribe_segment, bounds))
+
+        errors = [text["error"] for text in texts if isinstance(text, dict)]
+        if errors:
+            return {"error": errors[0]}
+        segments = [
+            {"start": round(start / sample_rate, 2), "end": round(end / sample_rate, 2), "text": text.strip()}
+            for (start, end), text in zip(bounds, texts)
+        ]
+        return {
+            "text": " ".join(segment["text"] for segment in segments if segment["text"]),
+            "segments": segments,
+            "dropped_seconds": round(sum(dropped), 2),
+        }
+
 def main():
     file_path = "file/Recording.m4a"  # Change path if needed
     transcriber = ElevenLabsTranscriber()
@@ -0,0 +1,415 @@
+import threading
+import time
+from concurrent.futures import wait
+
+import noisereduce as nr
+import numpy as np
+import httpx
+import pytest
+from scipy.signal import lfilter
+
+from app.features.voice_cloning import denoise, media_probe, production, vad
+from app.features.voice_cloning.clients import RetryTransport, get_elevenlabs_client, get_openai_client, reset_clients
+from app.features.voice_cloning.fake_vendors import FakeVendorServer, LatencyProfile, fake_pcm, fake_reply_text
+from app.features.voice_cloning.filters import StreamingHighPassFilter, highpass_coefficients
+from app.features.voice_cloning.ingest import encode_wav
+from app.features.voice_cloning.prompts import build_messages, system_prefix
+from app.features.voice_cloning.rate_limit import (
+    ElevenLabsNotConfigured,
+    ElevenLabsRateLimiter,
+    HedgeSlots,
+    RateLimitTimeout,
+)
+from app.features.voice_cloning.resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    DeadlineExceeded,
+    get_breaker,
+    reset_resilience,
+    vendor_call,
+)
+from app.features.voice_cloning.stt import ElevenLabsTranscriber
+from app.features.voice_cloning.tts_cache import TTSCache, tts_cache_key
+
+
+def test_chunked_high_pass_matches_whole_signal():
+    rng = np.random.default_rng(0)
+    signal = rng.uniform(-8000, 8000, 24000).astype(np.float32)
+    b, a = highpass_coefficients(24000)
+
+    high_pass = StreamingHighPassFilter(24000)
+    chunked = np.concatenate([high_pass.process(chunk) for chunk in np.array_split(signal, 7)])
+
+    np.testing.assert_allclose(chunked, lfilter(b, a, signal), rtol=1e-4, atol=1e-2)
+
+
+def test_pcm16_filter_handles_split_samples_and_clips():
+    pcm = np.array([32767, -32768] * 500, dtype=np.int16).tobytes()
+
+    high_pass = StreamingHighPassFilter(16000)
+    out = high_pass.process_pcm16(pcm[:1001]) + high_pass.process_pcm16(pcm[1001:])
+
+    assert len(out) == len(pcm)
+    filtered = np.frombuffer(out, dtype=np.int16)
+    assert filtered.max() <= 32767 and filtered.min() >= -32768
+    assert filtered[1] < 0  # clipped, not wrapped around to a positive value
+
+
+def test_tts_cache_key_ignores_voice_settings_order():
+    first = tts_cache_key("voice", "Hi!", "model", "mp3", {"stability": 0.5, "speed": 0.9})
+    second = tts_cache_key("voice", "Hi!", "model", "mp3", {"speed": 0.9, "stability": 0.5})
+
+    assert first == second
+    assert first != tts_cache_key("voice", "Hi!", "model", "pcm_24000", {"speed": 0.9, "stability": 0.5})
+
+
+def test_tts_cache_evicts_least_recently_used(tmp_path):
+    cache = TTSCache(directory=str(tmp_path), max_bytes=10)
+    cache.put("aa01", b"123456")
+    cache.put("bb02", b"123456")
+
+    assert cache.get("aa01") is None
+    assert cache.get("bb02") == b"123456"
+
+
+def test_probe_reads_wav_header_and_memoizes(tmp_path, monkeypatch):
+    path = tmp_path / "sample.wav"
+    path.write_bytes(encode_wav(np.zeros(16000 * 3, dtype=np.int16), 16000))
+
+    info = media_probe.validate_upload(str(path), min_duration=2)
+    assert (info.duration, info.channels, info.sample_rate) == (3.0, 1, 16000)
+
+    monkeypatch.setattr(media_probe, "_probe_with_soundfile", lambda p: 1 / 0)
+    assert media_probe.probe_media(str(path)) is info
+
+
+def test_probe_rejects_short_upload(tmp_path):
+    path = tmp_path / "short.wav"
+    path.write_bytes(encode_wav(np.zeros(8000, dtype=np.int16), 16000))
+
+    try:
+        media_probe.validate_upload(str(path), min_duration=10)
+    except media_probe.MediaProbeError as e:
+        assert "too short" in str(e)
+    else:
+        raise AssertionError("short upload was accepted")
+
+
+def test_crossfade_weights_sum_to_one():
+    length = 16000 * 7 + 123
+    total = np.zeros(length, dtype=np.float32)
+    for keep_start, keep_stop, read_start, read_stop in denoise.plan_windows(length, 16000 * 2, 1024, 4096, 1024):
+        assert read_start <= keep_start < keep_stop <= read_stop
+        total[keep_start:keep_stop] += denoise._crossfade_weights(keep_start, keep_stop, length, 1024)
+
+    np.testing.assert_allclose(total, 1.0, rtol=1e-6)
+
+
+def test_parallel_noise_reduction_matches_single_shot():
+    rng = np.random.default_rng(0)
+    t = np.arange(16000 * 30) / 16000
+    signal = (0.3 * np.sin(2 * np.pi * 220 * t) * (np.sin(2 * np.pi * 0.3 * t) > 0)
+              + 0.05 * rng.standard_normal(len(t))).astype(np.float32)
+
+    expected = nr.reduce_noise(y=signal, sr=16000, chunk_size=len(signal))
+    reduced = denoise.reduce_noise_parallel(signal, 16000, window_seconds=10, max_workers=2)
+
+    error = np.sqrt(np.mean((reduced - expected) ** 2)) / np.sqrt(np.mean(expected ** 2))
+    assert error < 0.01
+
+
+def test_noise_profile_gate_removes_stationary_noise():
+    rng = np.random.default_rng(0)
+    t = np.arange(16000 * 5) / 16000
+    tone = (0.3 * np.sin(2 * np.pi * 220 * t) * (t > 1)).astype(np.float32)
+    signal = tone + 0.05 * rng.standard_normal(len(t)).astype(np.float32)
+
+    silence = denoise.leading_silence(signal, 16000)
+    assert silence is not None and len(silence) <= 16000
+    profile = denoise.estimate_noise_profile(silence)
+    assert profile.dtype == np.float32 and profile.shape == (denoise.PROFILE_N_FFT // 2 + 1,)
+
+    gated = denoise.spectral_gate(signal, profile)
+    assert len(gated) == len(signal)
+    assert np.sqrt(np.mean(gated[:16000] ** 2)) < 0.2 * np.sqrt(np.mean(signal[:16000] ** 2))
+
+
+def test_fake_vendors_serve_deterministic_responses(monkeypatch):
+    instant = {name: LatencyProfile() for name in ("chat", "tts", "clone", "voices", "stt")}
+    with FakeVendorServer(profiles=instant) as server:
+        monkeypatch.setenv("OPENAI_BASE_URL", f"{server.base_url}/v1")
+        monkeypatch.setenv("ELEVENLABS_BASE_URL", server.base_url)
+        monkeypatch.setenv("OPENAI_API_KEY", "fake")
+        reset_clients()
+        try:
+            messages = [{"role": "user", "content": "Hi!"}]
+            reply = get_openai_client().chat.completions.create(model="gpt-4o", messages=messages)
+            streamed = "".join(
+                chunk.choices[0].delta.content or ""
+                for chunk in get_openai_client().chat.completions.create(model="gpt-4o", messages=messages, stream=True)
+            )
+            audio = b"".join(get_elevenlabs_client("fake").text_to_speech.stream(
+                voice_id="v1", text="Hello there", output_format="pcm_16000"
+            ))
+        finally:
+            reset_clients()
+
+    assert reply.choices[0].message.content == fake_reply_text(messages) == streamed
+    assert audio == fake_pcm("Hello there", "v1", 16000)
+    assert server.requests == {"chat": 2, "tts": 1}
+
+
+def _bursts(layout, sample_rate=16000):
+    """Tone bursts (True) and near-silence (False) of the given durations, as float32."""
+    rng = np.random.default_rng(1)
+    parts = []
+    for seconds, voiced in layout:
+        t = np.arange(int(seconds * sample_rate)) / sample_rate
+        parts.append((0.3 * np.sin(2 * np.pi * 200 * t) if voiced else 0) + 0.001 * rng.standard_normal(len(t)))
+    return np.concatenate(parts).astype(np.float32)
+
+
+def test_split_on_silence_cuts_at_pauses_and_caps_length():
+    samples = _bursts([(1, False), (3, True), (1, False), (2, True), (0.2, False), (2, True), (1, False), (12, True)])
+
+    segments = vad.split_on_silence(samples, 16000, max_segment_seconds=8)
+
+    assert [round(start / 16000, 1) for start, _ in segments][:3] == [0.5, 4.5, 9.7]
+    assert all(end - start <= 8 * 16000 for start, end in segments)
+    assert segments[-1][1] == len(samples)
+
+
+def test_segmented_transcription_stitches_in_order(monkeypatch):
+    instant = {name: LatencyProfile() for name in ("chat", "tts", "clone", "voices", "stt")}
+    samples = _bursts([(2, True), (1, False), (2, True), (1, False), (2, True)])
+    with FakeVendorServer(profiles=instant) as server:
+        monkeypatch.setenv("ELEVENLABS_BASE_URL", server.base_url)
+        result = ElevenLabsTranscriber().transcribe_pcm_segmented((samples * 32767).astype(np.int16), 16000)
+
+    assert server.requests == {"stt": 3}
+    assert [segment["start"] for segment in result["segments"]] == [0.0, 2.5, 5.5]
+    assert result["text"] == " ".join(segment["text"] for segment in result["segments"])
+
+
+def test_trim_silence_drops_dead_air_and_reports_it():
+    samples = _bursts([(2, False), (3, True), (1, False), (2, True), (0.2, False), (2, True), (1.5, False)])
+
+    trimmed, report = vad.trim_silence(samples, 16000, max_pause_seconds=0.3)
+
+    assert abs(report.kept_seconds - 7.5) < 0.05
+    assert report.pauses_shortened == 1
+    assert abs(report.dropped_seconds - (len(samples) - len(trimmed)) / 16000) < 1e-6
+
+
+def test_select_best_speech_prefers_the_densest_window():
+    samples = _bursts([(5, False), (4, True), (3, False), (10, True), (2, False)])
+
+    best = vad.select_best_speech(samples, 16000, seconds=10)
+
+    assert len(best) == 10 * 16000
+    np.testing.assert_array_equal(best, samples[12 * 16000:22 * 16000])
+
+
+def test_circuit_breaker_opens_then_lets_one_probe_through():
+    now = [0.0]
+    breaker = CircuitBreaker("vendor", failure_threshold=3, reset_seconds=30, clock=lambda: now[0])
+    for _ in range(3):
+        breaker.before_call()
+        breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    now[0] = 31.0
+    breaker.before_call()  # the probe
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_hedged_call_returns_first_success_and_cancels_the_loser(monkeypatch):
+    monkeypatch.setattr("app.features.voice_cloning.resilience.HEDGE_DEFAULT_DELAY_SECONDS", 0.05)
+    reset_resilience()
+    calls, loser_cancelled = [], threading.Event()
+
+    def fetch(cancelled):
+        calls.append(1)
+        if len(calls) == 1:  # the first copy stalls until the hedge wins
+            cancelled.wait(5)
+            if cancelled.is_set():
+                loser_cancelled.set()
+            return "slow"
+        return "fast"
+
+    assert vendor_call("test", "tts_convert", fetch, hedge=True, deadline=5) == "fast"
+    assert loser_cancelled.wait(1)
+    assert len(calls) == 2
+
+
+def test_hedge_is_skipped_without_spinning_while_the_circuit_is_half_open(monkeypatch):
+    monkeypatch.setattr("app.features.voice_cloning.resilience.HEDGE_DEFAULT_DELAY_SECONDS", 0.01)
+    reset_resilience()
+    breaker = get_breaker("test")
+    breaker._state, breaker._opened_at = CircuitBreaker.OPEN, time.monotonic() - breaker.reset_seconds
+    waits = []
+
+    def counting_wait(*args, **kwargs):
+        waits.append(kwargs.get("timeout"))
+        return wait(*args, **kwargs)
+
+    monkeypatch.setattr("app.features.voice_cloning.resilience.wait", counting_wait)
+    calls = []
+
+    def probe(cancelled):
+        calls.append(1)
+        time.sleep(0.3)
+        return "ok"
+
+    assert vendor_call("test", "tts_convert", probe, hedge=True, deadline=5) == "ok"
+    assert len(calls) == 1  # the probe is not hedged
+    assert len(waits) <= 3
+    reset_resilience()
+
+
+def test_vendor_call_deadline_counts_as_a_failure():
+    reset_resilience()
+    release = threading.Event()
+    started = time.monotonic()
+
+    with pytest.raises(DeadlineExceeded):
+        vendor_call("test", "chat", lambda cancelled: release.wait(5), deadline=0.1)
+
+    release.set()
+    assert time.monotonic() - started < 1
+    assert get_breaker("test")._failures == 1
+    reset_resilience()
+
+
+def test_retry_transport_only_repeats_posts_on_429_within_the_deadline(monkeypatch):
+    statuses = []
+
+    def respond(self, request):
+        statuses.append(request.method)
+        return httpx.Response(responses.pop(0), headers={"retry-after": "0"})
+
+    monkeypatch.setattr(httpx.HTTPTransport, "handle_request", respond)
+    monkeypatch.setattr("app.features.voice_cloning.clients.backoff_factor", lambda: 0)
+    transport = RetryTransport()
+
+    responses = [503, 503, 200]
+    assert transport.handle_request(httpx.Request("POST", "https://vendor/v1/voices/add")).status_code == 503
+    assert transport.handle_request(httpx.Request("GET", "https://vendor/v1/voices")).status_code == 200
+    responses = [429, 200]
+    assert transport.handle_request(httpx.Request("POST", "https://vendor/v1/text-to-speech")).status_code == 200
+    assert statuses == ["POST", "GET", "GET", "POST", "POST"]
+
+    # A Retry-After past the vendor_call deadline is handed back instead of slept through.
+    def post(cancelled):
+        return transport.handle_request(httpx.Request("POST", "https://vendor/v1/text-to-speech")).status_code
+
+    reset_resilience()
+    responses = [429, 200]
+    monkeypatch.setattr("app.features.voice_cloning.clients.backoff_factor", lambda: 10)
+    started = time.monotonic()
+    assert vendor_call("test", "tts_convert", post, deadline=1) == 429
+    assert time.monotonic() - started < 1
+    reset_resilience()
+
+
+def test_non_idempotent_call_is_not_abandoned_at_the_deadline():
+    reset_resilience()
+
+    def create_voice(cancelled):
+        time.sleep(0.2)
+        return "voice-1"
+
+    assert vendor_call("test", "clone", create_voice, deadline=0.05, idempotent=False) == "voice-1"
+    with pytest.raises(ValueError):
+        vendor_call("test", "clone", create_voice, hedge=True, idempotent=False)
+    reset_resilience()
+
+
+def test_rate_limiter_spreads_keys_and_honors_cool_down():
+    now = [0.0]
+    limiter = ElevenLabsRateLimiter(["key-a", "key-b"], max_concurrency=1, chars_per_minute=0, clock=lambda: now[0])
+
+    first, first_token = limiter.try_acquire()
+    second, second_token = limiter.try_acquire()
+    assert {first, second} == {"key-a", "key-b"}
+    assert limiter.try_acquire() == (None, 0.05)
+
+    limiter.release(first, first_token)
+    limiter.cool_down(first, 10)
+    assert limiter.try_acquire() == (None, 0.05)  # the free key is cooling down
+    now[0] = 10.0
+    assert limiter.try_acquire()[0] == first
+
+
+def test_rate_limiter_charges_characters_per_minute():
+    now = [0.0]
+    limiter = ElevenLabsRateLimiter(["key-a"], max_concurrency=0, chars_per_minute=1000, clock=lambda: now[0])
+
+    with limiter.slot(chars=600) as api_key:
+        assert api_key == "key-a"
+    now[0] = 15.0
+    api_key, wait = limiter.try_acquire(chars=600)
+    assert api_key is None and wait == 45.0
+    with pytest.raises(RateLimitTimeout):
+        with limiter.slot(chars=600, timeout=0.1):
+            pass
+
+    now[0] = 60.0
+    assert limiter.try_acquire(chars=600)[0] == "key-a"
+
+
+def test_acquire_without_keys_fails_at_once():
+    started = time.monotonic()
+    with pytest.raises(ElevenLabsNotConfigured):
+        ElevenLabsRateLimiter([]).acquire(timeout=30)
+    assert time.monotonic() - started < 1
+
+
+def test_hedged_copies_each_hold_their_own_slot():
+    limiter = ElevenLabsRateLimiter(["key-a"], max_concurrency=1, chars_per_minute=0)
+    first_started, release_first = threading.Event(), threading.Event()
+
+    with HedgeSlots(limiter=limiter) as slots:
+        def first():
+            with slots.slot():
+                first_started.set()
+                release_first.wait(5)
+
+        thread = threading.Thread(target=first)
+        thread.start()
+        assert first_started.wait(1)
+        with pytest.raises(RateLimitTimeout):  # no second slot: the hedge isn't sent
+            with slots.slot():
+                pass
+
+    # The caller is done, but the first copy's request still holds the key's slot.
+    assert limiter.try_acquire()[0] is None
+    release_first.set()
+    thread.join(1)
+    assert limiter.try_acquire()[0] == "key-a"
+
+
+def test_reply_without_any_voice_fails_clearly(monkeypatch):
+    monkeypatch.setattr(production, "default_voice_id", None)
+
+    with pytest.raises(production.NoVoiceError):
+        next(production.stream_voice_assistant_reply({"favorite_food": "Pizza"}))
+    assert production.require_voice_id("voice-1") == "voice-1"
+
+
+def test_system_prefix_is_byte_stable_and_memoized():
+    first = system_prefix({"nickname_for_loved_one": "Johnny", "favorite_food": "Pizza"})
+    reordered = system_prefix({"favorite_food": "Pizza", "nickname_for_loved_one": "Johnny"})
+
+    assert reordered is first
+    assert system_prefix({"favorite_food": "Tacos"}).cache_key != first.cache_key
+
+    turn = {"role": "user", "content": "Hi!"}
+    messages = build_messages({"favorite_food": "Pizza", "nickname_for_loved_one": "Johnny"}, [turn])
+    assert messages[:-1] == list(first.messages)
+    assert messages[-1] == turn
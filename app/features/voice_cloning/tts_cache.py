@@ -0,0 +1,191 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from app.features.voice_cloning.clients import get_redis_client
+
+TTS_CACHE_DIR = os.getenv("TTS_CACHE_DIR", "output/tts_cache")
+TTS_CACHE_MAX_BYTES = int(os.getenv("TTS_CACHE_MAX_BYTES", 512 * 1024 * 1024))
+# e.g. redis://127.0.0.1:6379/1 -- shares the LRU index between gunicorn workers.
+TTS_CACHE_REDIS_URL = os.getenv("TTS_CACHE_REDIS_URL")
+
+
+def tts_cache_key(voice_id, text, model_id, output_format, voice_settings, **extra) -> str:
+    """
+    Stable hash of everything that changes the synthesized audio.
+
+    Keys are sorted so two dicts with the same settings always hash the same.
+    """
+    payload = {
+        "voice_id": voice_id,
+        "text": text,
+        "model_id": model_id,
+        "output_format": output_format,
+        "voice_settings": voice_settings or {},
+        **{name: value for name, value in extra.items() if value},
+    }
+    encoded = json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class LocalIndex:
+    """
+    LRU bookkeeping from the cache directory itself (file mtime = last use).
+
+    The directory is only scanned when this process's running total says the
+    budget may have been exceeded.
+    """
+
+    def __init__(self, cache):
+        self.cache = cache
+        self._total = None
+
+    def touch(self, key):
+        try:
+            os.utime(self.cache.path(key))
+        except FileNotFoundError:
+            pass
+
+    def add(self, key, size):
+        if self._total is not None:
+            self._total += size
+
+    def discard(self, key):
+        pass
+
+    def evict(self, max_bytes):
+        if self._total is not None and self._total <= max_bytes:
+            return
+        entries = []
+        for root, _, files in os.walk(self.cache.directory):
+            for name in files:
+                if name.endswith(".bin"):
+                    try:
+                        stat = os.stat(os.path.join(root, name))
+                    except FileNotFoundError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, name[:-4]))
+        self._total = sum(size for _, size, _ in entries)
+        for _, size, key in sorted(entries):
+            if self._total <= max_bytes:
+                break
+            self._total -= size
+            yield key
+
+
+class RedisIndex:
+    """
+    LRU bookkeeping shared by every worker: a sorted set of keys by last use, plus
+    per-key sizes and a running byte total, so eviction never scans the directory.
+    """
+    LRU_KEY = "tts_cache:lru"
+    SIZES_KEY = "tts_cache:sizes"
+    TOTAL_KEY = "tts_cache:bytes"
+
+    def __init__(self, redis_client):
+        self.redis = redis_client
+
+    def touch(self, key):
+        self.redis.zadd(self.LRU_KEY, {key: time.time()}, xx=True)
+
+    def add(self, key, size):
+        if self.redis.hsetnx(self.SIZES_KEY, key, size):
+            pipe = self.redis.pipeline()
+            pipe.incrby(self.TOTAL_KEY, size)
+            pipe.zadd(self.LRU_KEY, {key: time.time()})
+            pipe.execute()
+        else:
+            self.touch(key)
+
+    def discard(self, key):
+        size = self.redis.hget(self.SIZES_KEY, key)
+        if size is not None and self.redis.hdel(self.SIZES_KEY, key):
+            pipe = self.redis.pipeline()
+            pipe.decrby(self.TOTAL_KEY, int(size))
+            pipe.zrem(self.LRU_KEY, key)
+            pipe.execute()
+
+    def evict(self, max_bytes):
+        while int(self.redis.get(self.TOTAL_KEY) or 0) > max_bytes:
+            oldest = self.redis.zpopmin(self.LRU_KEY, 1)
+            if not oldest:
+                break
+            key = oldest[0][0]
+            key = key.decode() if isinstance(key, bytes) else key
+            size = self.redis.hget(self.SIZES_KEY, key)
+            if size is not None and self.redis.hdel(self.SIZES_KEY, key):
+                self.redis.decrby(self.TOTAL_KEY, int(size))
+            yield key
+
+
+class TTSCache:
+    """
+    Disk-backed cache of synthesized audio, evicted least-recently-used first once
+    the directory grows past max_bytes.
+    """
+
+    def __init__(self, directory=TTS_CACHE_DIR, max_bytes=TTS_CACHE_MAX_BYTES, redis_client=None):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.index = RedisIndex(redis_client) if redis_client is not None else LocalIndex(self)
+
+    def path(self, key):
+        return os.path.join(self.directory, key[:2], f"{key}.bin")
+
+    def get(self, key):
+        try:
+            with open(self.path(key), "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            self._forget(key)
+            return None
+        try:
+            self.index.touch(key)
+        except Exception as e:
+            print(f"⚠️ TTS cache index unavailable: {e}")
+        return data
+
+    def _forget(self, key):
+        try:
+            self.index.discard(key)
+        except Exception as e:
+            print(f"⚠️ TTS cache index unavailable: {e}")
+
+    def put(self, key, data: bytes):
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write then rename, so readers in other workers never see a partial file.
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except Exception:
+            os.unlink(tmp_path)
+            raise
+
+        try:
+            self.index.add(key, len(data))
+            for evicted_key in self.index.evict(self.max_bytes):
+                try:
+                    os.remove(self.path(evicted_key))
+                except FileNotFoundError:
+                    pass
+        except Exception as e:
+            print(f"⚠️ TTS cache index unavailable: {e}")
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_tts_cache() -> TTSCache:
+    """Per-process TTS cache, built on first use."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            redis_client = get_redis_client(TTS_CACHE_REDIS_URL) if TTS_CACHE_REDIS_URL else None
+            _cache = TTSCache(redis_client=redis_client)
+        return _cache
@@ -0,0 +1,233 @@
+import os
+from dataclasses import dataclass
+from typing import Optional
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+FRAME_SECONDS = 0.02
+SILENCE_FLOOR_DB = -60.0
+MAX_PAUSE_SECONDS = float(os.getenv("TRIM_MAX_PAUSE_SECONDS", 0.3))
+CLONE_SAMPLE_SECONDS = float(os.getenv("CLONE_SAMPLE_SECONDS", 90))
+
+
+def frame_levels_db(samples: np.ndarray, frame: int, hop: Optional[int] = None) -> np.ndarray:
+    """
+    RMS level (dBFS) of each whole frame of float samples in [-1, 1] (or int16 PCM).
+
+    Frames are strided views into samples (hop defaults to frame, i.e. no overlap),
+    so no per-frame copies are made.
+    """
+    samples = np.asarray(samples)
+    samples = samples / np.float32(32768.0) if samples.dtype == np.int16 else samples.astype(np.float32, copy=False)
+    if len(samples) < frame:
+        return np.zeros(0, dtype=np.float32)
+    frames = sliding_window_view(samples, frame)[::hop or frame]
+    return 10 * np.log10(np.einsum("ij,ij->i", frames, frames) / frame + 1e-12)
+
+
+def noise_floor_db(levels, window=5) -> float:
+    """Level of the quietest window-frame stretch, robust to single-frame dropouts."""
+    if len(levels) <= window:
+        return float(np.min(levels))
+    return float(np.convolve(levels, np.ones(window) / window, mode="valid").min())
+
+
+class StreamingVAD:
+    """
+    Energy-based end-pointing for a live 16-bit mono PCM stream.
+
+    A frame counts as speech when it is threshold_db above an adaptive noise floor
+    (tracked while nobody is speaking). An utterance starts after start_seconds of
+    speech and ends after hangover_seconds of non-speech, or at max_seconds.
+    feed() returns ("speech_start", None) / ("speech_end", utterance_pcm) events;
+    utterances include preroll_seconds of audio from before the start.
+    """
+
+    def __init__(
+        self,
+        sample_rate=16000,
+        threshold_db=12.0,
+        start_seconds=0.1,
+        hangover_seconds=0.7,
+        preroll_seconds=0.3,
+        max_seconds=30.0,
+    ):
+        self.sample_rate = sample_rate
+        self.frame = int(FRAME_SECONDS * sample_rate)
+        self.threshold_db = threshold_db
+        self.start_frames = max(1, int(start_seconds / FRAME_SECONDS))
+        self.hangover_frames = max(1, int(hangover_seconds / FRAME_SECONDS))
+        self.preroll_frames = int(preroll_seconds / FRAME_SECONDS)
+        self.max_frames = int(max_seconds / FRAME_SECONDS)
+        self.reset()
+
+    def reset(self):
+        self.noise_floor_db = None
+        self.speaking = False
+        self._pending = b""
+        self._frames = []
+        self._voiced_run = 0
+        self._silent_run = 0
+
+    def feed(self, pcm: bytes) -> list:
+        data = self._pending + pcm
+        frame_bytes = self.frame * 2
+        whole = len(data) - len(data) % frame_bytes
+        self._pending = data[whole:]
+        if not whole:
+            return []
+
+        samples = np.frombuffer(data[:whole], dtype="<i2").astype(np.float32) / 32768.0
+        events = []
+        for index, level in enumerate(frame_levels_db(samples, self.frame)):
+            event = self._frame(data[index * frame_bytes:(index + 1) * frame_bytes], level)
+            if event:
+                events.append(event)
+        return events
+
+    def _frame(self, frame_pcm, level):
+        if self.noise_floor_db is None:
+            self.noise_floor_db = max(level, SILENCE_FLOOR_DB)
+        voiced = level > self.noise_floor_db + self.threshold_db
+        self._frames.append(frame_pcm)
+
+        if not self.speaking:
+            if not voiced:
+                self.noise_floor_db = max(0.95 * self.noise_floor_db + 0.05 * level, SILENCE_FLOOR_DB)
+            self._voiced_run = self._voiced_run + 1 if voiced else 0
+            if self._voiced_run >= self.start_frames:
+                self.speaking = True
+                self._silent_run = 0
+                self._frames = self._frames[-(self.start_frames + self.preroll_frames):]
+                return ("speech_start", None)
+            del self._frames[:-(self.start_frames + self.preroll_frames)]
+            return None
+
+        self._silent_run = 0 if voiced else self._silent_run + 1
+        if self._silent_run >= self.hangover_frames or len(self._frames) >= self.max_frames:
+            utterance = b"".join(self._frames)
+            self.speaking = False
+            self._frames = []
+            self._voiced_run = 0
+            return ("speech_end", utterance)
+        return None
+
+
+def split_on_silence(samples, sample_rate, min_silence_seconds=0.4, max_segment_seconds=30.0, threshold_db=12.0):
+    """
+    Split a recording into speech segments at pauses, for transcribing in parallel.
+
+    Frames more than threshold_db above the recording's noise floor (its quietest
+    100 ms) are speech. Segments are cut in the middle of pauses
+    of at least min_silence_seconds; a segment that would run past
+    max_segment_seconds is cut at its quietest frame instead. Segments without any
+    speech are dropped.
+
+    Returns:
+        list[tuple[int, int]]: (start, end) sample offsets, in order.
+    """
+    frame = int(FRAME_SECONDS * sample_rate)
+    levels = frame_levels_db(samples, frame)
+    if not len(levels):
+        return []
+    voiced = levels > max(noise_floor_db(levels), SILENCE_FLOOR_DB) + threshold_db
+    min_gap = max(1, int(min_silence_seconds / FRAME_SECONDS))
+    max_frames = max(1, int(max_segment_seconds / FRAME_SECONDS))
+
+    # Cut points: the middle of every long enough run of silent frames.
+    edges = np.flatnonzero(np.diff(np.concatenate(([1], voiced.astype(np.int8), [1]))))
+    cuts = [0]
+    for start, stop in zip(edges[0::2], edges[1::2]):
+        if stop - start >= min_gap:
+            cuts.append((start + stop) // 2)
+    cuts.append(len(levels))
+
+    segments = []
+    for start, stop in zip(cuts[:-1], cuts[1:]):
+        while stop - start > max_frames:
+            window = levels[start + max_frames // 2:start + max_frames]
+            cut = start + max_frames // 2 + int(np.argmin(window))
+            segments.append((start, cut))
+            start = cut
+        segments.append((start, stop))
+
+    last = len(samples)
+    return [
+        (int(start * frame), int(stop * frame) if stop < len(levels) else last)
+        for start, stop in segments
+        if voiced[start:stop].any()
+    ]
+
+
+@dataclass
+class TrimReport:
+    original_seconds: float
+    kept_seconds: float
+    pauses_shortened: int
+
+    @property
+    def dropped_seconds(self) -> float:
+        return self.original_seconds - self.kept_seconds
+
+    def __str__(self):
+        return (
+            f"kept {self.kept_seconds:.1f}s of {self.original_seconds:.1f}s "
+            f"(dropped {self.dropped_seconds:.1f}s, {self.pauses_shortened} pauses shortened)"
+        )
+
+
+def speech_frames(samples, sample_rate, threshold_db=12.0):
+    """(frame size, per-frame levels, per-frame voiced mask) for a recording."""
+    frame = int(FRAME_SECONDS * sample_rate)
+    levels = frame_levels_db(samples, frame)
+    if not len(levels):
+        return frame, levels, np.zeros(0, dtype=bool)
+    return frame, levels, levels > max(noise_floor_db(levels), SILENCE_FLOOR_DB) + threshold_db
+
+
+def trim_silence(samples, sample_rate, max_pause_seconds=MAX_PAUSE_SECONDS, threshold_db=12.0):
+    """
+    Drop leading and trailing silence and shorten every pause longer than
+    max_pause_seconds to that length (keeping its edges, so speech isn't clipped).
+
+    Returns:
+        (np.ndarray, TrimReport): The trimmed samples and what was removed.
+    """
+    samples = np.asarray(samples)
+    frame, _, voiced = speech_frames(samples, sample_rate, threshold_db)
+    original = len(samples) / sample_rate
+    if not voiced.any():
+        return samples[:0], TrimReport(original, 0.0, 0)
+
+    keep = voiced.copy()
+    half = max(1, int(max_pause_seconds / FRAME_SECONDS) // 2)
+    edges = np.flatnonzero(np.diff(np.concatenate(([1], voiced.astype(np.int8), [1]))))
+    starts, stops = edges[0::2], edges[1::2]
+    inner = (starts > 0) & (stops < len(voiced))
+    for start, stop in zip(starts[inner], stops[inner]):
+        keep[start:start + half] = True
+        keep[max(start + half, stop - half):stop] = True
+    pauses_shortened = int(np.count_nonzero((stops - starts)[inner] > 2 * half))
+
+    # Whole frames only; a partial last frame is kept if the last frame is.
+    mask = np.repeat(keep, frame)
+    mask = np.concatenate((mask, np.full(len(samples) - len(mask), keep[-1])))
+    trimmed = samples[mask]
+    return trimmed, TrimReport(original, len(trimmed) / sample_rate, pauses_shortened)
+
+
+def select_best_speech(samples, sample_rate, seconds=CLONE_SAMPLE_SECONDS, threshold_db=12.0):
+    """
+    The contiguous `seconds` of the recording with the most speech in it (ties go to
+    the louder stretch). Shorter recordings are returned whole.
+    """
+    samples = np.asarray(samples)
+    if len(samples) <= seconds * sample_rate:
+        return samples
+    frame, levels, voiced = speech_frames(samples, sample_rate, threshold_db)
+    window = int(seconds / FRAME_SECONDS)
+    # Voiced frame count per window, with mean level as a tie-breaker.
+    score = sliding_window_view(voiced.astype(np.float32), window).sum(axis=1)
+    score += sliding_window_view(np.clip(levels, SILENCE_FLOOR_DB, 0) / -SILENCE_FLOOR_DB, window).mean(axis=1)
+    start = int(np.argmax(score)) * frame
+    return samples[start:start + window * frame]
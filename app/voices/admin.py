@@ -0,0 +1,36 @@
+from django.contrib import admin
+from .models import GeneratedAudio, NoiseProfile, Voice, VoicePhrase, VoicePipelineJob
+
+
+@admin.register(Voice)
+class VoiceAdmin(admin.ModelAdmin):
+    list_display = ['id', 'name', 'voice_id', 'owner', 'status', 'last_used_at', 'synced_at']
+    list_filter = ['status']
+    search_fields = ['name', 'voice_id', 'sample_hash', 'owner__email']
+
+
+@admin.register(NoiseProfile)
+class NoiseProfileAdmin(admin.ModelAdmin):
+    list_display = ['id', 'owner', 'device_id', 'sample_rate', 'source', 'updated_at']
+    list_filter = ['source']
+    search_fields = ['owner__email', 'device_id']
+
+
+@admin.register(GeneratedAudio)
+class GeneratedAudioAdmin(admin.ModelAdmin):
+    list_display = ['audio_id', 'owner', 'size', 'content_type', 'created_at', 'last_accessed_at']
+    search_fields = ['audio_id', 'content_hash', 'owner__email']
+
+
+@admin.register(VoicePhrase)
+class VoicePhraseAdmin(admin.ModelAdmin):
+    list_display = ['id', 'owner', 'voice', 'kind', 'status', 'audio', 'updated_at']
+    list_filter = ['kind', 'status']
+    search_fields = ['owner__email', 'voice__voice_id', 'text']
+
+
+@admin.register(VoicePipelineJob)
+class VoicePipelineJobAdmin(admin.ModelAdmin):
+    list_display = ['job_id', 'user', 'status', 'tier', 'attempts', 'created_at', 'finished_at']
+    list_filter = ['status', 'tier']
+    search_fields = ['job_id', 'user__email']
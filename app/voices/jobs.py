@@ -0,0 +1,182 @@
+from datetime import timedelta
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from app.features import voice_cloning
+from app.voices.models import VoicePipelineJob
+from app.voices.phrases import queue_phrase_audio
+from app.voices.scheduling import next_job_candidates, user_tier
+
+
+def worker_setting(name):
+    return settings.VOICE_WORKER[name]
+
+
+def enqueue_pipeline_job(user, audio, user_data, skip_noise_reduction=True, device_id="", voice_name=""):
+    """
+    Store the upload and queue a pipeline run for the worker; returns immediately.
+
+    The stored file's header is probed before the job is committed, so unreadable or
+    too-short samples raise MediaProbeError here instead of failing (and retrying)
+    in the worker.
+    """
+    job = None
+    try:
+        with transaction.atomic():
+            job = VoicePipelineJob.objects.create(
+                user=user,
+                audio=audio,
+                user_data=user_data,
+                skip_noise_reduction=skip_noise_reduction,
+                device_id=device_id,
+                voice_name=voice_name,
+                tier=user_tier(user),
+                max_attempts=worker_setting("MAX_ATTEMPTS"),
+            )
+            voice_cloning.validate_upload(job.audio.path, min_duration=voice_cloning.MIN_SAMPLE_SECONDS)
+    except Exception:
+        if job is not None and job.audio:
+            job.audio.delete(save=False)
+        raise
+    return job
+
+
+def requeue_stale_jobs():
+    """Put RUNNING jobs whose worker died (lease not renewed in time) back on the queue."""
+    now = timezone.now()
+    expired = now - timedelta(seconds=worker_setting("LEASE_SECONDS"))
+    stale = VoicePipelineJob.objects.filter(
+        Q(heartbeat_at__lt=expired) | Q(heartbeat_at__isnull=True, started_at__lt=expired),
+        status=VoicePipelineJob.Status.RUNNING,
+    )
+    exhausted = dict(stale.filter(attempts__gte=F("max_attempts")).values_list("pk", "audio"))
+    stale.filter(pk__in=exhausted).update(
+        status=VoicePipelineJob.Status.FAILED,
+        error="Worker stopped before the job finished.",
+        audio="",
+        finished_at=now,
+    )
+    failed = VoicePipelineJob.objects.filter(
+        pk__in=exhausted, status=VoicePipelineJob.Status.FAILED, finished_at=now
+    ).values_list("pk", flat=True)
+    for pk in failed:
+        _delete_upload(exhausted[pk])
+    return stale.update(status=VoicePipelineJob.Status.QUEUED, worker="", available_at=now)
+
+
+def renew_leases(worker_name):
+    """Extend the lease of every job this worker is running; returns how many."""
+    return VoicePipelineJob.objects.filter(
+        status=VoicePipelineJob.Status.RUNNING, worker=worker_name
+    ).update(heartbeat_at=timezone.now())
+
+
+def claim_next_job(worker_name):
+    """
+    Atomically move the next due job from QUEUED to RUNNING for this worker.
+
+    Jobs are picked by subscription tier and per-user limits (see scheduling). The
+    claim is a conditional UPDATE, so concurrent workers never run the same job and
+    no row locks are held while the pipeline runs.
+    """
+    now = timezone.now()
+    for pk in next_job_candidates(now):
+        claimed = VoicePipelineJob.objects.filter(
+            pk=pk, status=VoicePipelineJob.Status.QUEUED
+        ).update(
+            status=VoicePipelineJob.Status.RUNNING,
+            worker=worker_name,
+            started_at=now,
+            heartbeat_at=now,
+            attempts=F("attempts") + 1,
+        )
+        if claimed:
+            return VoicePipelineJob.objects.select_related("user").get(pk=pk)
+    return None
+
+
+def _still_owned(job):
+    """The job's row, if this run still holds it (its lease wasn't taken over)."""
+    return VoicePipelineJob.objects.filter(
+        pk=job.pk, status=VoicePipelineJob.Status.RUNNING, worker=job.worker, attempts=job.attempts
+    )
+
+
+def _delete_upload(name):
+    if name:
+        VoicePipelineJob._meta.get_field("audio").storage.delete(name)
+
+
+def _finish(job, **fields):
+    """
+    Record the run's outcome unless another worker has taken the job over. A job
+    that succeeded or finally failed no longer needs its uploaded sample.
+    """
+    terminal = fields.get("status") in (VoicePipelineJob.Status.SUCCEEDED, VoicePipelineJob.Status.FAILED)
+    upload = job.audio.name if terminal else ""
+    if upload:
+        fields["audio"] = ""
+    if not _still_owned(job).update(**fields):
+        print(f"⚠️ Job {job.job_id} lost its lease; discarding this run's outcome")
+        job.refresh_from_db()
+        return False
+    for name, value in fields.items():
+        setattr(job, name, value)
+    _delete_upload(upload)
+    return True
+
+
+def _record_failure(job, error):
+    if job.attempts < job.max_attempts:
+        backoff = worker_setting("RETRY_BACKOFF_SECONDS") * 2 ** (job.attempts - 1)
+        _finish(
+            job,
+            status=VoicePipelineJob.Status.QUEUED,
+            error=error,
+            available_at=timezone.now() + timedelta(seconds=backoff),
+            worker="",
+        )
+    else:
+        _finish(job, status=VoicePipelineJob.Status.FAILED, error=error, finished_at=timezone.now())
+
+
+def run_job(job):
+    """
+    Run one claimed job to completion, scheduling a retry with backoff on failure.
+
+    The outcome is only recorded while the job is still this run's: if the lease
+    lapsed and another worker claimed it, that worker's run wins.
+    """
+    try:
+        result_path = voice_cloning.run_voice_assistant_pipeline_concurrent(
+            job.audio.path, job.user_data, job.skip_noise_reduction,
+            owner=job.user, device_id=job.device_id, voice_name=job.voice_name or None,
+        )
+        if not result_path:
+            _record_failure(job, "Pipeline did not produce any audio.")
+            return job
+
+        succeeded = _finish(
+            job,
+            status=VoicePipelineJob.Status.SUCCEEDED,
+            result_path=result_path,
+            error="",
+            finished_at=timezone.now(),
+        )
+        if succeeded:
+            # The job may have cloned a new voice: pre-generate its greeting and goodbye.
+            try:
+                queue_phrase_audio(job.user, job.user_data)
+            except Exception as e:
+                print(f"⚠️ Could not queue greeting audio: {e}")
+        return job
+
+    except Exception as e:
+        _record_failure(job, str(e))
+        return job
+
+    finally:
+        # Jobs run on worker threads; don't leave their connections open.
+        connections.close_all()
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from app.voices.media import collect_generated_audio
+
+
+class Command(BaseCommand):
+    help = "Delete expired generated audio and keep the media store under its size limit."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--ttl-seconds", type=int, default=None, help="Override VOICE_MEDIA_STORE TTL_SECONDS.")
+        parser.add_argument("--max-bytes", type=int, default=None, help="Override VOICE_MEDIA_STORE MAX_BYTES.")
+
+    def handle(self, *args, **options):
+        result = collect_generated_audio(options["ttl_seconds"], options["max_bytes"])
+        self.stdout.write(f"Deleted {result['rows']} row(s) and {result['files']} file(s).")
@@ -0,0 +1,99 @@
+import json
+import os
+import subprocess
+import sys
+from collections import defaultdict
+from django.core.management.base import BaseCommand, CommandError
+
+# Entry points whose import cost is paid by every gunicorn / ASGI worker and command.
+DEFAULT_MODULES = [
+    "app.voices.views",
+    "app.voices.jobs",
+    "app.voices.realtime",
+    "app.voices.management.commands.run_voice_worker",
+]
+# Libraries that should only load when a voice feature is actually used.
+HEAVY_PACKAGES = ["elevenlabs", "openai", "scipy", "noisereduce", "pydub", "soundfile", "numpy"]
+
+_CHILD = """
+import importlib, json, os, sys
+import django
+
+def rss_kb():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") // 1024
+
+django.setup()
+sys.stderr.write("--- setup done ---\\n")
+sys.stderr.flush()
+before = rss_kb()
+importlib.import_module(sys.argv[1])
+print(json.dumps({"rss_kb": rss_kb() - before, "modules": sorted(sys.modules)}))
+"""
+
+
+def parse_importtime(stderr: str) -> dict:
+    """Self import time in microseconds per top-level package, from `python -X importtime`."""
+    totals: defaultdict[str, int] = defaultdict(int)
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, name = line[len("import time:"):].split("|")
+        totals[name.strip().split(".")[0]] += int(self_us)
+    return dict(totals)
+
+
+def measure_import(module: str) -> dict:
+    """
+    Import module in a fresh interpreter (after django.setup()) and report the time
+    spent per top-level package, the resident memory it added, and which of
+    HEAVY_PACKAGES it pulled in.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _CHILD, module],
+        capture_output=True, text=True, env=os.environ.copy(),
+    )
+    if result.returncode != 0:
+        raise CommandError(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+    child = json.loads(result.stdout.strip().splitlines()[-1])
+
+    # Only what was imported after django.setup() is charged to the module.
+    packages = parse_importtime(result.stderr.partition("--- setup done ---\n")[2])
+    loaded = {name.split(".")[0] for name in child["modules"]}
+    return {
+        "module": module,
+        "total_ms": round(sum(packages.values()) / 1000, 1),
+        "rss_mb": round(child["rss_kb"] / 1024, 1),
+        "heavy": [name for name in HEAVY_PACKAGES if name in loaded],
+        "top": sorted(packages.items(), key=lambda item: item[1], reverse=True)[:8],
+    }
+
+
+class Command(BaseCommand):
+    help = "Report what importing the web/worker entry points costs, and which heavy libraries they load."
+
+    def add_arguments(self, parser):
+        parser.add_argument("modules", nargs="*", help=f"Modules to measure (default: {', '.join(DEFAULT_MODULES)}).")
+        parser.add_argument("--json", action="store_true", help="Print the report as JSON.")
+        parser.add_argument(
+            "--fail-on-heavy", action="store_true",
+            help="Exit with an error if any module loads one of " + ", ".join(HEAVY_PACKAGES) + ".",
+        )
+
+    def handle(self, *args, **options):
+        reports = [measure_import(module) for module in options["modules"] or DEFAULT_MODULES]
+
+        if options["json"]:
+            self.stdout.write(json.dumps(reports, indent=2))
+        else:
+            for report in reports:
+                self.stdout.write(
+                    f"{report['module']}: {report['total_ms']} ms, +{report['rss_mb']} MB, "
+                    f"heavy: {', '.join(report['heavy']) or 'none'}"
+                )
+                for package, self_us in report["top"]:
+                    self.stdout.write(f"    {package:<24} {self_us / 1000:8.1f} ms")
+
+        offenders = [report["module"] for report in reports if report["heavy"]]
+        if options["fail_on_heavy"] and offenders:
+            raise CommandError(f"Heavy libraries loaded at import time by: {', '.join(offenders)}")
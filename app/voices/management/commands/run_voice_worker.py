@@ -0,0 +1,101 @@
+import os
+import signal
+import socket
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from django.core.management.base import BaseCommand
+
+from app.voices.jobs import claim_next_job, renew_leases, requeue_stale_jobs, run_job, worker_setting
+from app.voices.media import collect_generated_audio, media_store_setting
+from app.voices.phrases import synthesize_pending_phrases
+from app.voices.voice_sync import sync_voices
+
+
+class Command(BaseCommand):
+    help = "Run queued voice pipeline jobs off the request path, with bounded concurrency and retries."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--concurrency", type=int, default=None, help="Jobs to run at the same time.")
+        parser.add_argument("--once", action="store_true", help="Exit once the queue is empty.")
+
+    def handle(self, *args, **options):
+        concurrency = options["concurrency"] or worker_setting("CONCURRENCY")
+        poll_interval = worker_setting("POLL_INTERVAL_SECONDS")
+        worker_name = f"{socket.gethostname()}:{os.getpid()}"
+        self.stopping = False
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+
+        self.stdout.write(f"Voice worker {worker_name} started (concurrency={concurrency}).")
+        in_flight = set()
+        last_stale_check = 0
+        last_heartbeat = 0
+        last_media_gc = 0
+        last_voice_sync = 0
+
+        # Greeting / goodbye pre-generation runs beside the jobs, one batch at a time.
+        phrase_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="voice-phrases")
+        phrases = None
+
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="voice-job") as executor:
+            while not self.stopping:
+                if phrases is None or phrases.done():
+                    if phrases is not None and phrases.exception() is None and phrases.result():
+                        self.stdout.write(f"Pre-generated {phrases.result()} phrase(s).")
+                    phrases = phrase_executor.submit(synthesize_pending_phrases)
+
+                if in_flight and time.monotonic() - last_heartbeat > worker_setting("HEARTBEAT_SECONDS"):
+                    renew_leases(worker_name)
+                    last_heartbeat = time.monotonic()
+
+                if time.monotonic() - last_stale_check > poll_interval * 30:
+                    requeued = requeue_stale_jobs()
+                    if requeued:
+                        self.stdout.write(f"Requeued {requeued} stale job(s).")
+                    last_stale_check = time.monotonic()
+
+                if time.monotonic() - last_media_gc > media_store_setting("GC_INTERVAL_SECONDS"):
+                    collected = collect_generated_audio()
+                    if collected["files"]:
+                        self.stdout.write(f"Removed {collected['files']} generated audio file(s).")
+                    last_media_gc = time.monotonic()
+
+                if time.monotonic() - last_voice_sync > worker_setting("VOICE_SYNC_INTERVAL_SECONDS"):
+                    try:
+                        synced = sync_voices()
+                        if synced["missing"]:
+                            self.stdout.write(f"{synced['missing']} voice(s) are missing at the vendor.")
+                    except Exception as e:
+                        self.stderr.write(f"Voice sync failed: {e}")
+                    last_voice_sync = time.monotonic()
+
+                while len(in_flight) < concurrency:
+                    job = claim_next_job(worker_name)
+                    if job is None:
+                        break
+                    self.stdout.write(f"Running job {job.job_id} (attempt {job.attempts}/{job.max_attempts}).")
+                    in_flight.add(executor.submit(run_job, job))
+
+                if not in_flight:
+                    if options["once"]:
+                        break
+                    time.sleep(poll_interval)
+                    continue
+
+                done, in_flight = wait(in_flight, timeout=poll_interval, return_when=FIRST_COMPLETED)
+                for future in done:
+                    job = future.result()
+                    self.stdout.write(f"Job {job.job_id} is {job.status}.")
+
+            if in_flight:
+                self.stdout.write(f"Waiting for {len(in_flight)} running job(s) to finish...")
+            # Keep their leases while they finish, or another worker would requeue them.
+            while in_flight:
+                renew_leases(worker_name)
+                _, in_flight = wait(in_flight, timeout=worker_setting("HEARTBEAT_SECONDS"))
+        phrase_executor.shutdown(wait=True)
+
+        self.stdout.write("Voice worker stopped.")
+
+    def _stop(self, signum, frame):
+        self.stopping = True
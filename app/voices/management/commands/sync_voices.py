@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from app.voices.voice_sync import sync_voices
+
+
+class Command(BaseCommand):
+    help = "Reconcile the Voice table with the voices in the ElevenLabs account."
+
+    def handle(self, *args, **options):
+        result = sync_voices()
+        self.stdout.write(
+            f"{result['missing']} voice(s) missing at the vendor, {result['ready']} ready again, "
+            f"{result['created']} added."
+        )
@@ -0,0 +1,167 @@
+import os
+import re
+import time
+from datetime import timedelta
+from django.conf import settings
+from django.db.models import Max
+from django.http import FileResponse, HttpResponse
+from django.utils import timezone
+from django.utils.http import parse_etags
+
+from app.features.voice_cloning.media_store import get_media_store
+from app.voices.models import GeneratedAudio
+
+
+def media_store_setting(name):
+    return settings.VOICE_MEDIA_STORE[name]
+
+
+def collect_generated_audio(ttl_seconds=None, max_bytes=None, store=None, grace_seconds=None):
+    """
+    Garbage-collect the generated-audio store.
+
+    Rows not accessed within ttl_seconds are deleted, then the least recently used
+    files until the store is under max_bytes. Files are removed once no row points
+    at them; files no row has ever pointed at (or abandoned temp files) are removed
+    once they are older than the TTL.
+
+    A file modified within grace_seconds of the sweep is kept even when its rows are
+    gone: MediaStore.put found it and touched it, and the new row is on its way.
+
+    Returns:
+        dict: How many rows and files were deleted.
+    """
+    ttl_seconds = ttl_seconds if ttl_seconds is not None else media_store_setting("TTL_SECONDS")
+    max_bytes = max_bytes if max_bytes is not None else media_store_setting("MAX_BYTES")
+    grace_seconds = grace_seconds if grace_seconds is not None else media_store_setting("WRITE_GRACE_SECONDS")
+    store = store or get_media_store()
+    touched_since = time.time() - grace_seconds
+
+    expired = GeneratedAudio.objects.filter(last_accessed_at__lt=timezone.now() - timedelta(seconds=ttl_seconds))
+    released = set(expired.values_list("path", flat=True))
+    rows_deleted, _ = expired.delete()
+
+    # Files are shared by every row with the same hash; size and recency are per file.
+    files = (
+        GeneratedAudio.objects
+        .values("content_hash", "path", "size")
+        .annotate(last_used=Max("last_accessed_at"))
+        .order_by("last_used")
+    )
+    total = sum(entry["size"] for entry in files)
+    for entry in files:
+        if total <= max_bytes:
+            break
+        deleted, _ = GeneratedAudio.objects.filter(content_hash=entry["content_hash"]).delete()
+        rows_deleted += deleted
+        released.add(entry["path"])
+        total -= entry["size"]
+
+    tracked = {os.path.normpath(path) for path in GeneratedAudio.objects.values_list("path", flat=True)}
+    files_deleted = 0
+    for path in released:
+        if os.path.normpath(path) in tracked or GeneratedAudio.objects.filter(path=path).exists():
+            continue
+        try:
+            if os.stat(path).st_mtime >= touched_since:
+                continue
+        except FileNotFoundError:
+            continue
+        store.delete(path)
+        files_deleted += 1
+    # Untracked files get the full TTL, so a file written just before its row is safe.
+    files_deleted += store.sweep_untracked(tracked, older_than_seconds=ttl_seconds)
+    return {"rows": rows_deleted, "files": files_deleted}
+
+
+_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class _FileRange:
+    """Read-only view of length bytes of an open file from start; keeps fileno() for sendfile."""
+
+    def __init__(self, file, start, length):
+        file.seek(start)
+        self.file = file
+        self.remaining = length
+
+    def read(self, size=-1):
+        size = self.remaining if size is None or size < 0 else min(size, self.remaining)
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def tell(self):
+        return self.file.tell()
+
+    def close(self):
+        self.file.close()
+
+
+def parse_range(header, size):
+    """
+    (start, end) of a single "bytes=" range, inclusive; None when the whole file should
+    be sent (no header, or a multi-range request), ValueError when unsatisfiable.
+    """
+    if not header:
+        return None
+    match = _RANGE.match(header.strip())
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        start, end = max(0, size - int(last)), size - 1
+    else:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError(header)
+    return start, end
+
+
+def serve_audio_file(request, path, content_type, etag=None):
+    """
+    Response for an already-authorized audio file.
+
+    With SENDFILE_BACKEND set, only headers are returned and the front proxy sends the
+    file (X-Accel-Redirect needs the file under the media store directory). Otherwise
+    Django sends it itself: If-None-Match gets a 304, a single Range gets a 206, and
+    the body is a FileResponse over the open file, which gunicorn's file wrapper sends
+    with os.sendfile.
+    """
+    stat = os.stat(path)
+    etag = f'"{etag}"' if etag else f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+    headers = {"ETag": etag, "Accept-Ranges": "bytes", "Cache-Control": "private, max-age=86400"}
+
+    if_none_match = request.META.get("HTTP_IF_NONE_MATCH")
+    if if_none_match and (etag in parse_etags(if_none_match) or if_none_match.strip() == "*"):
+        return HttpResponse(status=304, headers=headers)
+
+    backend = media_store_setting("SENDFILE_BACKEND")
+    directory = os.path.abspath(get_media_store().directory)
+    if backend == "nginx" and os.path.abspath(path).startswith(directory + os.sep):
+        location = media_store_setting("ACCEL_REDIRECT_PREFIX").rstrip("/") + "/"
+        relative = os.path.relpath(os.path.abspath(path), directory).replace(os.sep, "/")
+        return HttpResponse(content_type=content_type, headers={**headers, "X-Accel-Redirect": location + relative})
+    if backend == "apache":
+        return HttpResponse(content_type=content_type, headers={**headers, "X-Sendfile": os.path.abspath(path)})
+
+    if_range = request.META.get("HTTP_IF_RANGE")
+    try:
+        byte_range = None if if_range and if_range != etag else parse_range(request.META.get("HTTP_RANGE"), stat.st_size)
+    except ValueError:
+        return HttpResponse(status=416, headers={**headers, "Content-Range": f"bytes */{stat.st_size}"})
+
+    file = open(path, "rb")
+    if byte_range is None:
+        return FileResponse(file, content_type=content_type, headers=headers)
+    start, end = byte_range
+    response = FileResponse(_FileRange(file, start, end - start + 1), status=206, content_type=content_type, headers=headers)
+    response["Content-Length"] = end - start + 1
+    response["Content-Range"] = f"bytes {start}-{end}/{stat.st_size}"
+    return response
@@ -0,0 +1,268 @@
+from django.conf import settings
+from django.db import models
+from django.utils import timezone
+from shortuuid.django_fields import ShortUUIDField
+
+from app.subscribtions.models import Subscription
+
+
+class Voice(models.Model):
+    """
+    A vendor (ElevenLabs) voice a user can talk with. Cloned samples are recorded by
+    content hash, so identical re-uploads resolve locally instead of listing every
+    vendor voice. Rows without an owner are shared voices (e.g. ELEVENLABS_VOICE_ID).
+    """
+    class Status(models.TextChoices):
+        PENDING = "PENDING", "Pending"
+        READY = "READY", "Ready"
+        FAILED = "FAILED", "Failed"
+        # No longer present in the vendor account (found by sync_voices).
+        MISSING = "MISSING", "Missing at vendor"
+
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="voices"
+    )
+    name = models.CharField(max_length=255)
+    voice_id = models.CharField(max_length=64, db_index=True)
+    sample_hash = models.CharField(max_length=64, blank=True)
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.READY)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(null=True, blank=True)
+    synced_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.name} ({self.voice_id})"
+
+    class Meta:
+        verbose_name = "Voice"
+        verbose_name_plural = "Voices"
+        ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["owner", "name"], name="voice_owner_name_idx"),
+        ]
+        # NULLs are distinct in a unique constraint, so shared voices (owner=None)
+        # need their own one.
+        constraints = [
+            models.UniqueConstraint(
+                fields=["sample_hash", "name", "owner"],
+                condition=models.Q(owner__isnull=False),
+                name="unique_voice_sample",
+            ),
+            models.UniqueConstraint(
+                fields=["sample_hash", "name"],
+                condition=models.Q(owner__isnull=True),
+                name="unique_shared_voice_sample",
+            ),
+        ]
+
+
+class NoiseProfile(models.Model):
+    """
+    Stationary background-noise estimate for one user's recording setup: a float32
+    per-frequency gate threshold, reused to denoise later uploads in a single pass.
+    """
+    class Source(models.TextChoices):
+        LEADING_SILENCE = "LEADING_SILENCE", "Leading silence"
+        CALIBRATION = "CALIBRATION", "Calibration clip"
+
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="noise_profiles"
+    )
+    device_id = models.CharField(max_length=100, blank=True)
+    sample_rate = models.PositiveIntegerField()
+    spectrum = models.BinaryField()
+    source = models.CharField(max_length=20, choices=Source.choices)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.owner} {self.device_id or 'default'} ({self.source})"
+
+    class Meta:
+        verbose_name = "Noise Profile"
+        verbose_name_plural = "Noise Profiles"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["owner", "device_id", "sample_rate"],
+                name="unique_noise_profile_device",
+            ),
+        ]
+
+
+class GeneratedAudio(models.Model):
+    """
+    One generated audio artifact (e.g. a pipeline reply) in the content-addressed
+    media store. Identical audio shares a file on disk; rows are per owner.
+    """
+    audio_id = ShortUUIDField(
+        length=12,
+        alphabet="1234567890abcdefghijklmnopqrstuvwxyz",
+        primary_key=True,
+        editable=False
+    )
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="generated_audio"
+    )
+    content_hash = models.CharField(max_length=64, db_index=True)
+    path = models.CharField(max_length=500)
+    size = models.PositiveBigIntegerField()
+    content_type = models.CharField(max_length=50, default="audio/mpeg")
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_accessed_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    def __str__(self):
+        return f"{self.audio_id} ({self.content_hash[:12]})"
+
+    class Meta:
+        verbose_name = "Generated Audio"
+        verbose_name_plural = "Generated Audio"
+        ordering = ["-created_at"]
+        # As for Voice: audio without an owner needs its own constraint.
+        constraints = [
+            models.UniqueConstraint(
+                fields=["content_hash", "owner"],
+                condition=models.Q(owner__isnull=False),
+                name="unique_generated_audio_owner",
+            ),
+            models.UniqueConstraint(
+                fields=["content_hash"],
+                condition=models.Q(owner__isnull=True),
+                name="unique_generated_audio_unowned",
+            ),
+        ]
+
+
+class VoicePhrase(models.Model):
+    """
+    A fixed phrase (the user's greeting or goodbye) pre-synthesized with one of their
+    voices, so the first audio of a session comes straight from the media store.
+    Queued on profile or voice changes and synthesized by run_voice_worker.
+    """
+    class Kind(models.TextChoices):
+        GREETING = "GREETING", "Greeting"
+        GOODBYE = "GOODBYE", "Goodbye"
+
+    class Status(models.TextChoices):
+        PENDING = "PENDING", "Pending"
+        RUNNING = "RUNNING", "Running"
+        READY = "READY", "Ready"
+        FAILED = "FAILED", "Failed"
+
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="voice_phrases"
+    )
+    # Shared voices (no owner) carry a phrase per user.
+    voice = models.ForeignKey(Voice, on_delete=models.CASCADE, related_name="phrases")
+    kind = models.CharField(max_length=10, choices=Kind.choices)
+    text = models.CharField(max_length=500)
+    status = models.CharField(
+        max_length=10,
+        choices=Status.choices,
+        default=Status.PENDING
+    )
+    # Cleared if the media store garbage-collects the audio; it is then queued again.
+    audio = models.ForeignKey(
+        GeneratedAudio,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+"
+    )
+    error = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.kind} for {self.voice} ({self.status})"
+
+    class Meta:
+        verbose_name = "Voice Phrase"
+        verbose_name_plural = "Voice Phrases"
+        ordering = ["-updated_at"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["owner", "voice", "kind"],
+                name="unique_voice_phrase",
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["status", "updated_at"]),
+        ]
+
+
+class VoicePipelineJob(models.Model):
+    """A voice assistant pipeline run, queued by the API and executed by run_voice_worker."""
+    class Status(models.TextChoices):
+        QUEUED = "QUEUED", "Queued"
+        RUNNING = "RUNNING", "Running"
+        SUCCEEDED = "SUCCEEDED", "Succeeded"
+        FAILED = "FAILED", "Failed"
+
+    job_id = ShortUUIDField(
+        length=12,
+        alphabet="1234567890abcdefghijklmnopqrstuvwxyz",
+        primary_key=True,
+        editable=False
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="voice_jobs"
+    )
+    audio = models.FileField(upload_to='voice/job_uploads/')
+    user_data = models.JSONField(default=dict, blank=True)
+    skip_noise_reduction = models.BooleanField(default=True)
+    device_id = models.CharField(max_length=100, blank=True)
+    # Name the sample is cloned as; several voices per user are told apart by it.
+    voice_name = models.CharField(max_length=255, blank=True)
+    # Subscription tier when the job was queued; the worker schedules by it.
+    tier = models.CharField(
+        max_length=10,
+        choices=Subscription.PackageType.choices,
+        default=Subscription.PackageType.FREE
+    )
+
+    status = models.CharField(
+        max_length=10,
+        choices=Status.choices,
+        default=Status.QUEUED
+    )
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=3)
+    available_at = models.DateTimeField(default=timezone.now)
+    worker = models.CharField(max_length=100, blank=True)
+    result_path = models.CharField(max_length=500, blank=True)
+    error = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    # Renewed by the running worker; a RUNNING job whose lease lapsed is requeued.
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.job_id} ({self.status})"
+
+    class Meta:
+        verbose_name = "Voice Pipeline Job"
+        verbose_name_plural = "Voice Pipeline Jobs"
+        ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["status", "available_at"]),
+            models.Index(fields=["status", "tier", "available_at"]),
+        ]
@@ -0,0 +1,146 @@
+from datetime import timedelta
+from django.conf import settings
+from django.db import connections
+from django.db.models import F, Q
+from django.utils import timezone
+
+from app.features import voice_cloning
+from app.voices.models import Voice, VoicePhrase
+
+# Profile field (and user_data key) each phrase is read from.
+PHRASE_FIELDS = {
+    VoicePhrase.Kind.GREETING: "distinct_greeting",
+    VoicePhrase.Kind.GOODBYE: "distinct_goodbye",
+}
+
+
+def phrase_texts(user, user_data=None):
+    """The user's greeting and goodbye: from their profile, else from user_data (e.g. a job's)."""
+    try:
+        profile = user.profile
+    except Exception:
+        profile = None
+    user_data = user_data or {}
+    texts = {}
+    for kind, field in PHRASE_FIELDS.items():
+        text = (getattr(profile, field, "") or user_data.get(field) or "").strip()
+        if text:
+            texts[kind] = text
+    return texts
+
+
+def current_voice(user, name=None):
+    """The Voice row the user's sessions speak with (see resolve_voice_id), if it is known."""
+    voice_id = voice_cloning.resolve_voice_id(user, name, voice_cloning.default_voice_id)
+    if not voice_id:
+        return None
+    return (
+        Voice.objects
+        .filter(Q(owner=user) | Q(owner__isnull=True), voice_id=voice_id)
+        .order_by(F("owner").asc(nulls_last=True))
+        .first()
+    )
+
+
+def queue_phrase_audio(user, user_data=None, voice=None):
+    """
+    Queue greeting / goodbye synthesis with the user's current voice for
+    run_voice_worker. Phrases whose text and voice are unchanged keep their audio.
+
+    Returns:
+        list: The VoicePhrase rows that were queued.
+    """
+    voice = voice or current_voice(user)
+    if voice is None:
+        return []
+    queued = []
+    for kind, text in phrase_texts(user, user_data).items():
+        phrase, created = VoicePhrase.objects.get_or_create(owner=user, voice=voice, kind=kind, defaults={"text": text})
+        unchanged = phrase.text == text and phrase.status != VoicePhrase.Status.FAILED
+        if not created and unchanged and (phrase.audio_id or phrase.status != VoicePhrase.Status.READY):
+            continue
+        phrase.text = text
+        phrase.status = VoicePhrase.Status.PENDING
+        phrase.error = ""
+        phrase.save(update_fields=["text", "status", "error", "updated_at"])
+        queued.append(phrase)
+    return queued
+
+
+def ready_phrase(user, kind, voice):
+    """The READY phrase, or None. A phrase whose audio the media store collected is queued again."""
+    phrase = (
+        VoicePhrase.objects
+        .select_related("audio")
+        .filter(owner=user, voice=voice, kind=kind)
+        .first()
+    )
+    if phrase is None or phrase.status != VoicePhrase.Status.READY:
+        return None
+    if phrase.audio is None:
+        # The media store garbage-collected it.
+        VoicePhrase.objects.filter(pk=phrase.pk, status=VoicePhrase.Status.READY).update(
+            status=VoicePhrase.Status.PENDING, updated_at=timezone.now()
+        )
+        return None
+    return phrase
+
+
+def ready_phrase_audio_id(user, voice_id, kind=VoicePhrase.Kind.GREETING):
+    """audio_id of the user's READY phrase for a vendor voice id, or None."""
+    return (
+        VoicePhrase.objects
+        .filter(owner=user, voice__voice_id=voice_id, kind=kind, status=VoicePhrase.Status.READY, audio__isnull=False)
+        .values_list("audio_id", flat=True)
+        .first()
+    )
+
+
+def synthesize_pending_phrases(limit=10):
+    """
+    Synthesize queued phrases into the generated-audio store (run by run_voice_worker).
+
+    Each phrase is claimed with a conditional UPDATE like pipeline jobs, and its
+    audio is only kept if the text didn't change while it was being synthesized.
+
+    Returns:
+        int: Phrases that became READY.
+    """
+    now = timezone.now()
+    # Phrases whose worker died mid-synthesis.
+    VoicePhrase.objects.filter(
+        status=VoicePhrase.Status.RUNNING,
+        updated_at__lt=now - timedelta(seconds=settings.VOICE_WORKER["LEASE_SECONDS"]),
+    ).update(status=VoicePhrase.Status.PENDING)
+
+    ready = 0
+    try:
+        pending = (
+            VoicePhrase.objects
+            .filter(status=VoicePhrase.Status.PENDING)
+            .order_by("updated_at")
+            .values_list("pk", flat=True)[:limit]
+        )
+        for pk in pending:
+            claimed = VoicePhrase.objects.filter(pk=pk, status=VoicePhrase.Status.PENDING).update(
+                status=VoicePhrase.Status.RUNNING, updated_at=timezone.now()
+            )
+            if not claimed:
+                continue
+            phrase = VoicePhrase.objects.select_related("voice").get(pk=pk)
+            try:
+                audio = voice_cloning.synthesize_filtered_mp3(phrase.voice.voice_id, phrase.text)
+                stored = voice_cloning.store_generated_audio(audio, "mp3", phrase.owner_id)
+            except Exception as e:
+                print(f"❌ Phrase synthesis failed: {e}")
+                VoicePhrase.objects.filter(pk=pk, status=VoicePhrase.Status.RUNNING).update(
+                    status=VoicePhrase.Status.FAILED, error=str(e)
+                )
+                continue
+            ready += VoicePhrase.objects.filter(
+                pk=pk, status=VoicePhrase.Status.RUNNING, text=phrase.text
+            ).update(status=VoicePhrase.Status.READY, audio_id=stored.audio_id, error="", updated_at=timezone.now())
+        return ready
+    finally:
+        # Runs on a worker thread; don't leave its connections open.
+        connections.close_all()
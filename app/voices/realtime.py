@@ -0,0 +1,179 @@
+import asyncio
+import json
+import threading
+from urllib.parse import parse_qs
+from asgiref.sync import sync_to_async
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from app.features import voice_cloning
+from app.voices.phrases import ready_phrase_audio_id
+
+CONVERSATION_PATH = "/ws/voice/conversation/"
+
+# WebSocket close codes
+CLOSE_UNAUTHORIZED = 4401
+CLOSE_NOT_FOUND = 4404
+
+
+async def authenticate(scope):
+    """Resolve the user from the ?token=<JWT access token> query parameter."""
+    token = parse_qs(scope.get("query_string", b"").decode()).get("token", [None])[0]
+    if not token:
+        return None
+    auth = JWTAuthentication()
+    try:
+        validated = auth.get_validated_token(token)
+        return await sync_to_async(auth.get_user)(validated)
+    except Exception:
+        return None
+
+
+class ConversationSocket:
+    """
+    Duplex voice conversation over one WebSocket.
+
+    Client -> server:
+        binary frames: microphone audio, 16 kHz mono s16le, any frame size.
+        {"type": "config", "user_data": {...}, "voice_name": "..."}: persona / one of
+            the user's voices by name.
+        {"type": "interrupt"}: stop the reply being spoken.
+    Server -> client:
+        {"type": "ready", "input_sample_rate": 16000, "output_sample_rate": 24000,
+            "greeting_audio_id": ...}: the greeting pre-generated in the session's voice
+            (GET /api/v1/voice/audio/<id>/), or null if it isn't ready.
+        {"type": "speech_start"} / {"type": "barge_in"}
+        {"type": "transcript", "text": ...}
+        {"type": "reply_start"}, {"type": "reply_text", "text": ...} per sentence,
+        binary frames: reply audio, OUTPUT_SAMPLE_RATE mono s16le,
+        {"type": "reply_end", "interrupted": bool}
+        {"type": "error", "message": ...}
+
+    Turns are end-pointed server side; when the caller starts talking over a reply,
+    the reply and its in-flight TTS are cancelled (barge-in). Clients should capture
+    with echo cancellation on, so the reply itself doesn't trigger barge-in.
+    """
+
+    def __init__(self, receive, send, user):
+        self.receive = receive
+        self.send = send
+        self.user = user
+        self.conversation = voice_cloning.VoiceConversation()
+        self.turn = None
+        self.cancelled = None
+
+    async def send_json(self, payload):
+        await self.send({"type": "websocket.send", "text": json.dumps(payload)})
+
+    async def run(self):
+        # Start with the user's most recently used voice.
+        self.conversation.voice_id = await sync_to_async(voice_cloning.resolve_voice_id)(
+            self.user, None, voice_cloning.default_voice_id
+        )
+        greeting_audio_id = await sync_to_async(ready_phrase_audio_id)(self.user, self.conversation.voice_id)
+        await self.send({"type": "websocket.accept"})
+        await self.send_json({
+            "type": "ready",
+            "input_sample_rate": voice_cloning.INPUT_SAMPLE_RATE,
+            "output_sample_rate": voice_cloning.OUTPUT_SAMPLE_RATE,
+            "greeting_audio_id": greeting_audio_id,
+        })
+        try:
+            while True:
+                message = await self.receive()
+                if message["type"] == "websocket.disconnect":
+                    break
+                if message.get("bytes"):
+                    await self.on_audio(message["bytes"])
+                elif message.get("text"):
+                    await self.on_control(message["text"])
+        finally:
+            self.interrupt()
+            if self.turn is not None:
+                self.turn.cancel()
+
+    def interrupt(self):
+        if self.cancelled is not None and not self.cancelled.is_set():
+            self.cancelled.set()
+            return True
+        return False
+
+    async def on_control(self, text):
+        try:
+            control = json.loads(text)
+        except ValueError:
+            return await self.send_json({"type": "error", "message": "Control messages must be JSON."})
+        if control.get("type") == "config":
+            self.conversation.user_data = control.get("user_data") or self.conversation.user_data
+            # Voices are only picked by name among the user's own, never by vendor id.
+            if control.get("voice_name"):
+                self.conversation.voice_id = await sync_to_async(voice_cloning.resolve_voice_id)(
+                    self.user, control["voice_name"], self.conversation.voice_id
+                )
+        elif control.get("type") == "interrupt":
+            self.interrupt()
+
+    async def on_audio(self, pcm):
+        for event, utterance in self.conversation.feed_audio(pcm):
+            if event == "speech_start":
+                await self.send_json({"type": "barge_in" if self.interrupt() else "speech_start"})
+            elif event == "speech_end":
+                self.turn = asyncio.create_task(self.respond(utterance, previous=self.turn))
+
+    async def respond(self, utterance, previous=None):
+        if previous is not None:
+            await asyncio.gather(previous, return_exceptions=True)
+        cancelled = self.cancelled = threading.Event()
+        try:
+            text = await asyncio.to_thread(self.conversation.transcribe, utterance)
+        except Exception as e:
+            return await self.send_json({"type": "error", "message": str(e)})
+        if not text or cancelled.is_set():
+            return
+        await self.send_json({"type": "transcript", "text": text})
+        await self.send_json({"type": "reply_start"})
+
+        loop = asyncio.get_running_loop()
+        events = asyncio.Queue()
+
+        def put(kind, value=None):
+            loop.call_soon_threadsafe(events.put_nowait, (kind, value))
+
+        def speak():
+            try:
+                for chunk in self.conversation.reply_audio(text, cancelled, lambda s: put("text", s)):
+                    put("audio", chunk)
+            except Exception as e:
+                put("error", str(e))
+            finally:
+                put("done")
+
+        speaker = loop.run_in_executor(None, speak)
+        try:
+            while True:
+                kind, value = await events.get()
+                if kind == "done":
+                    break
+                if kind == "audio":
+                    if not cancelled.is_set():
+                        await self.send({"type": "websocket.send", "bytes": value})
+                elif kind == "text":
+                    await self.send_json({"type": "reply_text", "text": value})
+                else:
+                    await self.send_json({"type": "error", "message": value})
+            await self.send_json({"type": "reply_end", "interrupted": cancelled.is_set()})
+        finally:
+            cancelled.set()
+            await asyncio.gather(speaker, return_exceptions=True)
+
+
+async def websocket_application(scope, receive, send):
+    """ASGI app for WebSocket connections; see ConversationSocket for the protocol."""
+    message = await receive()
+    if message["type"] != "websocket.connect":
+        return
+    if scope["path"] != CONVERSATION_PATH:
+        return await send({"type": "websocket.close", "code": CLOSE_NOT_FOUND})
+    user = await authenticate(scope)
+    if user is None:
+        return await send({"type": "websocket.close", "code": CLOSE_UNAUTHORIZED})
+    await ConversationSocket(receive, send, user).run()
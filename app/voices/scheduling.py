@@ -0,0 +1,139 @@
+from collections import defaultdict
+from datetime import timedelta
+from django.conf import settings
+from django.db.models import Count, Min
+from django.utils import timezone
+
+from app.subscribtions.models import Subscription
+from app.voices.models import VoicePipelineJob
+
+TIERS = [choice.value for choice in Subscription.PackageType]
+
+
+def tier_weight(tier):
+    return settings.VOICE_WORKER["TIER_WEIGHTS"].get(tier, 1)
+
+
+def max_running_per_user(tier):
+    return settings.VOICE_WORKER["MAX_RUNNING_PER_USER"].get(tier, 1)
+
+
+def user_tier(user):
+    """The user's subscription tier, or FREE without a current subscription."""
+    try:
+        profile = user.profile
+    except Exception:
+        return Subscription.PackageType.FREE
+    plan = profile.subscription_plan
+    if plan is None or (profile.subscription_end and profile.subscription_end < timezone.now()):
+        return Subscription.PackageType.FREE
+    return plan.package_type
+
+
+def running_counts():
+    """Jobs running now, per tier and per user."""
+    per_tier, per_user = defaultdict(int), defaultdict(int)
+    rows = (
+        VoicePipelineJob.objects
+        .filter(status=VoicePipelineJob.Status.RUNNING)
+        .values("tier", "user_id")
+        .annotate(running=Count("pk"))
+    )
+    for row in rows:
+        per_tier[row["tier"]] += row["running"]
+        per_user[row["user_id"]] += row["running"]
+    return per_tier, per_user
+
+
+def tier_order(waiting_tiers, running_per_tier):
+    """
+    Weighted-fair order of the tiers with due jobs: the next slot goes to the tier
+    that would be furthest below its share (running + 1) / weight, the heavier
+    tier on ties. With weights 6:3:1 and every tier busy, workers split 6:3:1; a
+    tier alone in the queue gets every slot.
+    """
+    return sorted(
+        waiting_tiers,
+        key=lambda tier: ((running_per_tier.get(tier, 0) + 1) / tier_weight(tier), -tier_weight(tier)),
+    )
+
+
+def next_job_candidates(now=None, limit=10):
+    """
+    Primary keys of due QUEUED jobs in the order a worker should try to claim them:
+    tiers in weighted-fair order, oldest first within a tier, skipping users who
+    already have their tier's MAX_RUNNING_PER_USER jobs running.
+
+    The cap is checked before the claim, so two workers claiming at the same moment
+    can exceed it by one job.
+    """
+    now = now or timezone.now()
+    running_per_tier, running_per_user = running_counts()
+    due = VoicePipelineJob.objects.filter(status=VoicePipelineJob.Status.QUEUED, available_at__lte=now)
+    waiting_tiers = set(due.order_by().values_list("tier", flat=True).distinct())
+
+    candidates = []
+    for tier in tier_order(waiting_tiers, running_per_tier):
+        capped = [user_id for user_id, running in running_per_user.items() if running >= max_running_per_user(tier)]
+        candidates += list(
+            due.filter(tier=tier)
+            .exclude(user_id__in=capped)
+            .order_by("available_at", "created_at")
+            .values_list("pk", flat=True)[:limit - len(candidates)]
+        )
+        if len(candidates) >= limit:
+            break
+    return candidates
+
+
+def _percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] if values else None
+
+
+def queue_stats(now=None, window_seconds=3600):
+    """
+    Queue depth and wait times per tier.
+
+    Returns:
+        dict: {tier: {"queued", "delayed", "running", "oldest_wait_seconds",
+        "wait_seconds_avg", "wait_seconds_p95"}}. "delayed" jobs wait on a retry
+        backoff; wait times are from queueing to the first attempt, for jobs started
+        within window_seconds.
+    """
+    now = now or timezone.now()
+    stats = {
+        tier: {"queued": 0, "delayed": 0, "running": 0, "oldest_wait_seconds": 0,
+               "wait_seconds_avg": None, "wait_seconds_p95": None}
+        for tier in TIERS
+    }
+    queued = (
+        VoicePipelineJob.objects
+        .filter(status=VoicePipelineJob.Status.QUEUED, available_at__lte=now)
+        .values("tier")
+        .annotate(count=Count("pk"), oldest=Min("available_at"))
+    )
+    for row in queued:
+        stats[row["tier"]]["queued"] = row["count"]
+        stats[row["tier"]]["oldest_wait_seconds"] = round((now - row["oldest"]).total_seconds(), 1)
+    delayed = (
+        VoicePipelineJob.objects
+        .filter(status=VoicePipelineJob.Status.QUEUED, available_at__gt=now)
+        .values("tier")
+        .annotate(count=Count("pk"))
+    )
+    for row in delayed:
+        stats[row["tier"]]["delayed"] = row["count"]
+    for tier, running in running_counts()[0].items():
+        stats[tier]["running"] = running
+
+    waits = defaultdict(list)
+    started = VoicePipelineJob.objects.filter(
+        attempts=1, started_at__gte=now - timedelta(seconds=window_seconds)
+    ).values_list("tier", "created_at", "started_at")
+    for tier, created_at, started_at in started:
+        waits[tier].append((started_at - created_at).total_seconds())
+    for tier, values in waits.items():
+        stats[tier]["wait_seconds_avg"] = round(sum(values) / len(values), 1)
+        stats[tier]["wait_seconds_p95"] = round(_percentile(values, 0.95), 1)
+    return stats
@@ -0,0 +1,51 @@
+from rest_framework import serializers
+from app.features import voice_cloning
+from .models import VoicePipelineJob
+
+
+class VoiceReplyRequestSerializer(serializers.Serializer):
+    user_data = serializers.DictField()
+    voice_id = serializers.CharField(
+        required=False, allow_blank=True, help_text="A vendor voice id: one of the user's voices or a shared one."
+    )
+    voice_name = serializers.CharField(
+        required=False, allow_blank=True, help_text="One of the user's voices, by name. Ignored if voice_id is given."
+    )
+
+    def validate_voice_id(self, value):
+        # A vendor voice id alone is not a permission: cloned voices belong to their owner.
+        if value and value != voice_cloning.default_voice_id:
+            if not voice_cloning.voice_available_to(self.context["request"].user, value):
+                raise serializers.ValidationError("Unknown voice.")
+        return value
+
+
+class VoicePipelineJobCreateSerializer(serializers.ModelSerializer):
+    # Sent as a JSON string alongside the multipart audio upload.
+    user_data = serializers.JSONField(binary=True, required=False)
+
+    class Meta:
+        model = VoicePipelineJob
+        fields = ["audio", "user_data", "skip_noise_reduction", "device_id", "voice_name"]
+
+
+class NoiseProfileCalibrationSerializer(serializers.Serializer):
+    audio = serializers.FileField(help_text="A few seconds of room tone from the recording device, without speech.")
+    device_id = serializers.CharField(required=False, allow_blank=True, max_length=100)
+
+
+class VoicePipelineJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = VoicePipelineJob
+        fields = [
+            "job_id",
+            "status",
+            "tier",
+            "attempts",
+            "max_attempts",
+            "error",
+            "created_at",
+            "started_at",
+            "finished_at",
+        ]
+        read_only_fields = fields
@@ -0,0 +1,484 @@
+import asyncio
+import json
+import os
+import tempfile
+import time
+from datetime import timedelta
+from unittest import mock
+import numpy as np
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import IntegrityError, transaction
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from app.accounts.models import User, UserProfile
+from app.features import voice_cloning
+from app.features.voice_cloning import tts_cache
+from app.features.voice_cloning.clients import reset_clients
+from app.features.voice_cloning.fake_vendors import FakeVendorServer, LatencyProfile
+from app.features.voice_cloning.ingest import encode_wav
+from app.features.voice_cloning.media_probe import MediaProbeError
+from app.features.voice_cloning.media_store import MediaStore, store_generated_audio
+from app.features.voice_cloning.registry import (
+    lookup_noise_profile,
+    remember_cloned_voice,
+    remember_noise_profile,
+    resolve_voice_id,
+)
+from app.subscribtions.models import Subscription
+from app.voices import jobs
+from app.voices.management.commands.import_report import measure_import
+from app.voices.media import collect_generated_audio
+from app.voices.realtime import ConversationSocket, websocket_application
+from app.voices.models import GeneratedAudio, Voice, VoicePhrase, VoicePipelineJob
+from app.voices.phrases import synthesize_pending_phrases
+from app.voices.scheduling import queue_stats, user_tier
+from app.voices.voice_sync import list_vendor_voices, sync_voices
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class VoicePipelineJobTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email="voice@example.com", password="pass")
+        self.job = jobs.enqueue_pipeline_job(
+            self.user,
+            SimpleUploadedFile("sample.wav", encode_wav(np.zeros(16000 * 12, dtype=np.int16), 16000)),
+            {"distinct_greeting": "Hi!"},
+        )
+
+    def test_invalid_upload_is_rejected_before_queueing(self):
+        short = SimpleUploadedFile("short.wav", encode_wav(np.zeros(16000 * 2, dtype=np.int16), 16000))
+        with self.assertRaises(MediaProbeError):
+            jobs.enqueue_pipeline_job(self.user, short, {})
+
+        self.assertEqual(VoicePipelineJob.objects.count(), 1)
+
+    def test_claim_is_exclusive(self):
+        claimed = jobs.claim_next_job("worker-a")
+
+        self.assertEqual(claimed.pk, self.job.pk)
+        self.assertEqual(claimed.status, VoicePipelineJob.Status.RUNNING)
+        self.assertEqual(claimed.attempts, 1)
+        self.assertIsNone(jobs.claim_next_job("worker-b"))
+
+    def test_failed_run_is_retried_with_backoff_then_fails(self):
+        with mock.patch.object(voice_cloning, "run_voice_assistant_pipeline_concurrent", return_value=""):
+            for _ in range(self.job.max_attempts):
+                VoicePipelineJob.objects.filter(pk=self.job.pk).update(available_at=self.job.created_at)
+                job = jobs.run_job(jobs.claim_next_job("worker-a"))
+
+        self.assertEqual(job.status, VoicePipelineJob.Status.FAILED)
+        self.assertEqual(job.attempts, job.max_attempts)
+        self.assertFalse(os.path.exists(self.job.audio.path))
+
+    def test_successful_run_records_result(self):
+        upload = self.job.audio.path
+        self.assertTrue(os.path.exists(upload))
+        with mock.patch.object(voice_cloning, "run_voice_assistant_pipeline_concurrent", return_value="output/reply.mp3"):
+            job = jobs.run_job(jobs.claim_next_job("worker-a"))
+
+        self.assertEqual(job.status, VoicePipelineJob.Status.SUCCEEDED)
+        self.assertEqual(job.result_path, "output/reply.mp3")
+        self.assertFalse(os.path.exists(upload))
+        self.assertEqual(VoicePipelineJob.objects.get(pk=job.pk).audio.name, "")
+
+    def test_renewed_lease_keeps_a_long_job_running(self):
+        claimed = jobs.claim_next_job("worker-a")
+        long_ago = timezone.now() - timedelta(seconds=settings.VOICE_WORKER["LEASE_SECONDS"] + 60)
+        VoicePipelineJob.objects.filter(pk=claimed.pk).update(started_at=long_ago, heartbeat_at=long_ago)
+
+        self.assertEqual(jobs.renew_leases("worker-a"), 1)
+        self.assertEqual(jobs.requeue_stale_jobs(), 0)
+
+        VoicePipelineJob.objects.filter(pk=claimed.pk).update(heartbeat_at=long_ago)
+        self.assertEqual(jobs.requeue_stale_jobs(), 1)
+
+    def test_run_that_lost_its_lease_does_not_record_its_outcome(self):
+        stale_run = jobs.claim_next_job("worker-a")
+        VoicePipelineJob.objects.filter(pk=stale_run.pk).update(
+            status=VoicePipelineJob.Status.QUEUED, worker="", available_at=self.job.created_at
+        )
+        jobs.claim_next_job("worker-b")
+
+        with mock.patch.object(voice_cloning, "run_voice_assistant_pipeline_concurrent", return_value="output/late.mp3"):
+            job = jobs.run_job(stale_run)
+
+        self.assertEqual(job.status, VoicePipelineJob.Status.RUNNING)
+        self.assertEqual(job.worker, "worker-b")
+        self.assertEqual(job.result_path, "")
+        self.assertTrue(os.path.exists(self.job.audio.path))
+
+    def test_retried_run_keeps_its_upload(self):
+        with mock.patch.object(voice_cloning, "run_voice_assistant_pipeline_concurrent", return_value=""):
+            job = jobs.run_job(jobs.claim_next_job("worker-a"))
+
+        self.assertEqual(job.status, VoicePipelineJob.Status.QUEUED)
+        self.assertTrue(os.path.exists(job.audio.path))
+
+    def test_stale_job_out_of_attempts_drops_its_upload(self):
+        claimed = jobs.claim_next_job("worker-a")
+        long_ago = timezone.now() - timedelta(seconds=settings.VOICE_WORKER["LEASE_SECONDS"] + 60)
+        VoicePipelineJob.objects.filter(pk=claimed.pk).update(heartbeat_at=long_ago, attempts=claimed.max_attempts)
+
+        self.assertEqual(jobs.requeue_stale_jobs(), 0)
+        job = VoicePipelineJob.objects.get(pk=claimed.pk)
+        self.assertEqual(job.status, VoicePipelineJob.Status.FAILED)
+        self.assertFalse(os.path.exists(self.job.audio.path))
+
+
+class JobSchedulingTests(TestCase):
+    def setUp(self):
+        self.free = User.objects.create_user(email="free@example.com", password="pass")
+        yearly = User.objects.create_user(email="yearly@example.com", password="pass")
+        plan = Subscription.objects.create(package_type=Subscription.PackageType.YEARLY, status=True)
+        UserProfile.objects.filter(user=yearly).update(subscription_plan=plan)
+        self.yearly = User.objects.get(pk=yearly.pk)
+
+    def queue(self, user, minutes_ago=0):
+        return VoicePipelineJob.objects.create(
+            user=user, audio="voice/job_uploads/sample.wav", tier=user_tier(user),
+            available_at=timezone.now() - timedelta(minutes=minutes_ago),
+        )
+
+    def test_paying_tier_is_claimed_before_older_free_jobs(self):
+        self.queue(self.free, minutes_ago=10)
+        yearly_job = self.queue(self.yearly)
+
+        self.assertEqual(yearly_job.tier, Subscription.PackageType.YEARLY)
+        self.assertEqual(jobs.claim_next_job("worker-a").pk, yearly_job.pk)
+        self.assertEqual(jobs.claim_next_job("worker-a").user, self.free)
+
+    def test_users_are_capped_per_tier(self):
+        first, second = self.queue(self.free, minutes_ago=2), self.queue(self.free, minutes_ago=1)
+
+        self.assertEqual(jobs.claim_next_job("worker-a").pk, first.pk)
+        self.assertIsNone(jobs.claim_next_job("worker-a"))  # FREE users run one job at a time
+        second.refresh_from_db()
+        self.assertEqual(second.status, VoicePipelineJob.Status.QUEUED)
+
+        stats = queue_stats()
+        self.assertEqual(stats["FREE"]["queued"], 1)
+        self.assertEqual(stats["FREE"]["running"], 1)
+        self.assertGreaterEqual(stats["FREE"]["oldest_wait_seconds"], 60)
+        self.assertIsNotNone(stats["FREE"]["wait_seconds_avg"])
+        self.assertEqual(stats["YEARLY"]["queued"], 0)
+
+
+class NoiseProfileTests(TestCase):
+    def test_profile_round_trips_per_device(self):
+        user = User.objects.create_user(email="noise@example.com", password="pass")
+        profile = np.linspace(-60, -40, 513, dtype=np.float32)
+
+        remember_noise_profile(user, "phone", 16000, profile, "CALIBRATION")
+
+        np.testing.assert_array_equal(lookup_noise_profile(user, "phone", 16000), profile)
+        self.assertIsNone(lookup_noise_profile(user, "laptop", 16000))
+
+
+class VoiceRegistryTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email="voices@example.com", password="pass")
+        cache.clear()
+
+    def test_voices_resolve_per_owner_and_name_from_cache(self):
+        remember_cloned_voice("hash-mom", "Mom", "vendor-mom", self.user)
+        remember_cloned_voice("hash-dad", "Dad", "vendor-dad", self.user)
+
+        self.assertEqual(resolve_voice_id(self.user, "Mom"), "vendor-mom")
+        with self.assertNumQueries(0):
+            self.assertEqual(resolve_voice_id(self.user, "Mom"), "vendor-mom")
+        self.assertEqual(resolve_voice_id(self.user, "Grandma", default="default-voice"), "default-voice")
+        self.assertEqual(resolve_voice_id(None, "Mom", default="default-voice"), "default-voice")
+
+        # Re-cloning under an existing name replaces the cached answer.
+        remember_cloned_voice("hash-mom-2", "Mom", "vendor-mom-2", self.user)
+        self.assertEqual(resolve_voice_id(self.user, "Mom"), "vendor-mom-2")
+
+    def test_recloning_a_shared_sample_reuses_its_row(self):
+        remember_cloned_voice("hash-narrator", "Narrator", "vendor-narrator")
+        remember_cloned_voice("hash-narrator", "Narrator", "vendor-narrator-2")
+
+        self.assertEqual(list(Voice.objects.filter(owner=None).values_list("voice_id", flat=True)), ["vendor-narrator-2"])
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Voice.objects.create(sample_hash="hash-narrator", name="Narrator", voice_id="vendor-narrator-3")
+
+    def test_sync_marks_voices_missing_at_the_vendor(self):
+        remember_cloned_voice("hash-a", "A", "vendor-a", self.user)
+        remember_cloned_voice("hash-b", "B", "vendor-b", self.user)
+        self.assertEqual(resolve_voice_id(self.user, "B"), "vendor-b")
+
+        with mock.patch.dict("os.environ", {"ELEVENLABS_VOICE_ID": "vendor-shared"}):
+            result = sync_voices({"vendor-a": "A", "vendor-shared": "Shared"})
+
+        self.assertEqual(result, {"missing": 1, "ready": 0, "created": 1})
+        self.assertEqual(Voice.objects.get(voice_id="vendor-b").status, Voice.Status.MISSING)
+        self.assertIsNone(resolve_voice_id(self.user, "B"))
+        self.assertTrue(Voice.objects.filter(owner=None, voice_id="vendor-shared").exists())
+
+    def test_vendor_voices_are_listed_in_bulk(self):
+        vendors = FakeVendorServer(profiles={"voices": LatencyProfile()}).start()
+        self.addCleanup(vendors.stop)
+        env = mock.patch.dict("os.environ", {"ELEVENLABS_BASE_URL": vendors.base_url, "ELEVENLABS_API_KEY": "fake"})
+        env.start()
+        self.addCleanup(env.stop)
+        reset_clients()
+        self.addCleanup(reset_clients)
+
+        self.assertEqual(sorted(list_vendor_voices().values()), ["Fake Voice A", "Fake Voice B"])
+        self.assertEqual(vendors.requests, {"voices": 1})
+
+
+class VoiceReplyStreamTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email="caller@example.com", password="pass", is_active=True)
+        self.other = User.objects.create_user(email="owner@example.com", password="pass", is_active=True)
+        remember_cloned_voice("hash-other", "Grandpa", "vendor-other", owner=self.other)
+        remember_cloned_voice("hash-shared", "Narrator", "vendor-shared")
+        self.client.defaults["HTTP_AUTHORIZATION"] = f"Bearer {RefreshToken.for_user(self.user).access_token}"
+
+    def post(self, voice_id):
+        return self.client.post(
+            "/api/v1/voice/reply/stream/", {"user_data": {"name": "Sam"}, "voice_id": voice_id}, content_type="application/json"
+        )
+
+    @mock.patch("app.features.voice_cloning.stream_voice_assistant_reply")
+    def test_another_users_voice_is_refused(self, stream_reply):
+        response = self.post("vendor-other")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("voice_id", response.json())
+        stream_reply.assert_not_called()
+
+    @mock.patch("app.features.voice_cloning.stream_voice_assistant_reply", return_value=iter([b"RIFF"]))
+    def test_shared_voice_is_accepted(self, stream_reply):
+        response = self.post("vendor-shared")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b"".join(response.streaming_content), b"RIFF")
+        stream_reply.assert_called_once_with({"name": "Sam"}, "vendor-shared")
+
+
+class GeneratedAudioStoreTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email="media@example.com", password="pass")
+        self.store = MediaStore(tempfile.mkdtemp())
+        patcher = mock.patch("app.features.voice_cloning.media_store.get_media_store", return_value=self.store)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_identical_audio_is_stored_once(self):
+        first = store_generated_audio(b"same reply", "mp3", self.user)
+        second = store_generated_audio(b"same reply", "mp3", self.user)
+        other = store_generated_audio(b"same reply", "mp3")
+        other_again = store_generated_audio(b"same reply", "mp3")
+
+        self.assertEqual(first.path, second.path)
+        self.assertEqual(first.audio_id, second.audio_id)
+        self.assertNotEqual(first.audio_id, other.audio_id)
+        self.assertEqual(other.audio_id, other_again.audio_id)
+        self.assertEqual(len(list(self.store.files())), 1)
+        self.assertEqual(GeneratedAudio.objects.count(), 2)
+
+    def test_gc_removes_expired_and_least_recently_used_audio(self):
+        expired = store_generated_audio(b"old reply", "mp3", self.user)
+        evicted = store_generated_audio(b"older reply", "mp3", self.user)
+        kept = store_generated_audio(b"newest reply", "mp3", self.user)
+        GeneratedAudio.objects.filter(pk=expired.audio_id).update(last_accessed_at=timezone.now() - timedelta(days=2))
+        GeneratedAudio.objects.filter(pk=evicted.audio_id).update(last_accessed_at=timezone.now() - timedelta(hours=1))
+        for audio in (expired, evicted):
+            self.backdate(audio.path)
+
+        result = collect_generated_audio(ttl_seconds=86400, max_bytes=kept.size, store=self.store)
+
+        self.assertEqual(result, {"rows": 2, "files": 2})
+        self.assertEqual(list(GeneratedAudio.objects.values_list("pk", flat=True)), [kept.audio_id])
+        self.assertFalse(os.path.exists(expired.path))
+        self.assertFalse(os.path.exists(evicted.path))
+        self.assertTrue(os.path.exists(kept.path))
+
+    def test_gc_keeps_a_file_put_is_reusing(self):
+        stored = store_generated_audio(b"old reply", "mp3", self.user)
+        GeneratedAudio.objects.filter(pk=stored.audio_id).update(last_accessed_at=timezone.now() - timedelta(days=2))
+        self.backdate(stored.path)
+
+        # Another pipeline produces the same audio: put() finds the file and touches
+        # it, then the GC runs before that pipeline records its row.
+        self.store.put(b"old reply", "mp3")
+        result = collect_generated_audio(ttl_seconds=86400, store=self.store)
+        again = store_generated_audio(b"old reply", "mp3", self.user)
+
+        self.assertEqual(result, {"rows": 1, "files": 0})
+        self.assertEqual(again.path, stored.path)
+        self.assertTrue(os.path.exists(again.path))
+
+    def backdate(self, path, seconds=3600):
+        past = time.time() - seconds
+        os.utime(path, (past, past))
+
+
+class GeneratedAudioDownloadTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email="listener@example.com", password="pass", is_active=True)
+        self.store = MediaStore(tempfile.mkdtemp())
+        for target in ("app.features.voice_cloning.media_store.get_media_store", "app.voices.media.get_media_store"):
+            patcher = mock.patch(target, return_value=self.store)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.audio = store_generated_audio(bytes(range(256)) * 4, "mp3", self.user)
+        self.url = f"/api/v1/voice/audio/{self.audio.audio_id}/"
+        self.client.defaults["HTTP_AUTHORIZATION"] = f"Bearer {RefreshToken.for_user(self.user).access_token}"
+
+    def test_range_and_conditional_requests(self):
+        response = self.client.get(self.url, HTTP_RANGE="bytes=1000-")
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response["Content-Range"], "bytes 1000-1023/1024")
+        self.assertEqual(b"".join(response.streaming_content), (bytes(range(256)) * 4)[1000:])
+
+        response = self.client.get(self.url, HTTP_RANGE="bytes=-4")
+        self.assertEqual(b"".join(response.streaming_content), bytes([252, 253, 254, 255]))
+        self.assertEqual(self.client.get(self.url, HTTP_RANGE="bytes=2000-").status_code, 416)
+
+        etag = self.client.get(self.url)["ETag"]
+        self.assertEqual(etag, f'"{self.audio.content_hash}"')
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_only_the_owner_can_download(self):
+        other = User.objects.create_user(email="other@example.com", password="pass", is_active=True)
+        self.client.defaults["HTTP_AUTHORIZATION"] = f"Bearer {RefreshToken.for_user(other).access_token}"
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+    def test_transfer_is_handed_to_nginx(self):
+        config = {**settings.VOICE_MEDIA_STORE, "SENDFILE_BACKEND": "nginx"}
+        with override_settings(VOICE_MEDIA_STORE=config):
+            response = self.client.get(self.url)
+
+        relative = os.path.relpath(self.audio.path, self.store.directory)
+        self.assertEqual(response["X-Accel-Redirect"], "/protected/generated-audio/" + relative)
+        self.assertEqual(response.content, b"")
+
+
+class VoicePhraseTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email="greeter@example.com", password="pass", is_active=True)
+        remember_cloned_voice("hash-mom", "Mom", "vendor-mom", self.user)
+        self.store = MediaStore(tempfile.mkdtemp())
+        for target in ("app.features.voice_cloning.media_store.get_media_store", "app.voices.media.get_media_store"):
+            patcher = mock.patch(target, return_value=self.store)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.client.defaults["HTTP_AUTHORIZATION"] = f"Bearer {RefreshToken.for_user(self.user).access_token}"
+
+    def synthesize(self):
+        with mock.patch.object(voice_cloning, "synthesize_filtered_mp3", side_effect=lambda voice_id, text: text.encode()) as tts:
+            synthesize_pending_phrases()
+        return tts
+
+    def test_profile_update_pregenerates_greeting_in_the_users_voice(self):
+        self.assertEqual(self.client.get("/api/v1/voice/phrases/greeting/").status_code, 409)
+        response = self.client.patch(
+            "/api/v1/profile/", {"distinct_greeting": "Hey sweetie!"}, content_type="application/json"
+        )
+        self.assertEqual(response.status_code, 200)
+
+        tts = self.synthesize()
+        tts.assert_called_once_with("vendor-mom", "Hey sweetie!")
+        response = self.client.get("/api/v1/voice/phrases/greeting/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b"".join(response.streaming_content), b"Hey sweetie!")
+
+        # Saving the same text again doesn't synthesize it again.
+        self.client.patch("/api/v1/profile/", {"distinct_greeting": "Hey sweetie!"}, content_type="application/json")
+        self.synthesize().assert_not_called()
+
+    def test_collected_audio_is_generated_again(self):
+        self.client.patch("/api/v1/profile/", {"distinct_goodbye": "Bye now!"}, content_type="application/json")
+        self.synthesize()
+        GeneratedAudio.objects.all().delete()
+
+        self.assertEqual(self.client.get("/api/v1/voice/phrases/goodbye/").status_code, 409)
+        self.assertEqual(VoicePhrase.objects.get().status, VoicePhrase.Status.PENDING)
+        self.synthesize()
+        self.assertEqual(self.client.get("/api/v1/voice/phrases/goodbye/").status_code, 200)
+
+
+class ConversationSocketTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email="talk@example.com", password="pass", is_active=True)
+        instant = {name: LatencyProfile() for name in ("chat", "tts", "clone", "voices", "stt")}
+        self.vendors = FakeVendorServer(profiles=instant).start()
+        self.addCleanup(self.vendors.stop)
+        env = mock.patch.dict("os.environ", {
+            "OPENAI_BASE_URL": f"{self.vendors.base_url}/v1",
+            "ELEVENLABS_BASE_URL": self.vendors.base_url,
+            "OPENAI_API_KEY": "fake",
+            "ELEVENLABS_API_KEY": "fake",
+        })
+        env.start()
+        self.addCleanup(env.stop)
+        cache = mock.patch.object(tts_cache, "_cache", tts_cache.TTSCache(tempfile.mkdtemp()))
+        cache.start()
+        self.addCleanup(cache.stop)
+        reset_clients()
+        self.addCleanup(reset_clients)
+
+    def converse(self, token, frames):
+        sent = []
+
+        async def run():
+            incoming = asyncio.Queue()
+            for frame in frames:
+                incoming.put_nowait(frame)
+
+            async def send(message):
+                sent.append(message)
+                if "reply_end" in message.get("text", ""):
+                    incoming.put_nowait({"type": "websocket.disconnect"})
+
+            scope = {"type": "websocket", "path": "/ws/voice/conversation/", "query_string": f"token={token}".encode()}
+            await asyncio.wait_for(websocket_application(scope, incoming.get, send), timeout=30)
+
+        async_to_sync(run)()
+        return sent
+
+    def test_rejects_missing_token(self):
+        sent = self.converse("", [{"type": "websocket.connect"}])
+
+        self.assertEqual(sent, [{"type": "websocket.close", "code": 4401}])
+
+    def test_spoken_turn_gets_transcript_and_streamed_reply(self):
+        t = np.arange(16000) / 16000
+        speech = (0.5 * 32767 * np.sin(2 * np.pi * 220 * t)).astype("<i2").tobytes()
+        silence = bytes(16000 * 2)
+        remember_cloned_voice("hash-mom", "Mom", "v1", owner=self.user)
+        frames = [
+            {"type": "websocket.connect"},
+            {"type": "websocket.receive", "text": json.dumps({"type": "config", "voice_name": "Mom"})},
+            {"type": "websocket.receive", "bytes": silence[:8000] + speech + silence},
+        ]
+
+        sent = self.converse(str(RefreshToken.for_user(self.user).access_token), frames)
+
+        events = [json.loads(m["text"])["type"] for m in sent if "text" in m]
+        self.assertEqual(events[:4], ["ready", "speech_start", "transcript", "reply_start"])
+        self.assertIn("reply_text", events)
+        self.assertEqual(events[-1], "reply_end")
+        self.assertTrue(any(m.get("bytes") for m in sent))
+
+    def test_config_cannot_select_a_voice_by_vendor_id(self):
+        other = User.objects.create_user(email="voice-owner@example.com", password="pass", is_active=True)
+        remember_cloned_voice("hash-other", "Grandpa", "vendor-other", owner=other)
+        socket = ConversationSocket(None, None, self.user)
+        socket.conversation.voice_id = "v1"
+
+        async_to_sync(socket.on_control)(json.dumps({"type": "config", "voice_id": "vendor-other"}))
+
+        self.assertEqual(socket.conversation.voice_id, "v1")
+
+
+class ImportCostTests(TestCase):
+    def test_entry_points_do_not_load_audio_or_vendor_libraries(self):
+        for module in ("app.voices.views", "app.voices.realtime"):
+            self.assertEqual(measure_import(module)["heavy"], [], module)
@@ -0,0 +1,176 @@
+import os
+from django.http import StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from drf_yasg.utils import swagger_auto_schema
+from rest_framework import permissions, status
+from rest_framework.parsers import FormParser, MultiPartParser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from app.features import voice_cloning
+from app.voices.jobs import enqueue_pipeline_job
+from app.voices.media import serve_audio_file
+from app.voices.phrases import current_voice, ready_phrase
+from app.voices.scheduling import queue_stats
+from .models import GeneratedAudio, VoicePhrase, VoicePipelineJob
+from .serializers import (
+    NoiseProfileCalibrationSerializer,
+    VoicePipelineJobCreateSerializer,
+    VoicePipelineJobSerializer,
+    VoiceReplyRequestSerializer,
+)
+
+
+class VoiceReplyStreamView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    @swagger_auto_schema(
+        operation_summary="Stream AI voice reply",
+        operation_description="Generates the AI reply and streams it back as chunked, high-pass filtered WAV audio, sentence by sentence, while the rest is still being generated.",
+        request_body=VoiceReplyRequestSerializer,
+        responses={200: "Chunked audio/wav stream", 400: "Invalid request or unknown voice"}
+    )
+    def post(self, request):
+        serializer = VoiceReplyRequestSerializer(data=request.data, context={"request": request})
+        serializer.is_valid(raise_exception=True)
+
+        voice_id = serializer.validated_data.get("voice_id") or voice_cloning.resolve_voice_id(
+            request.user, serializer.validated_data.get("voice_name"), voice_cloning.default_voice_id
+        )
+        audio_stream = voice_cloning.stream_voice_assistant_reply(serializer.validated_data["user_data"], voice_id)
+        response = StreamingHttpResponse(audio_stream, content_type="audio/wav")
+        # Keep a buffering proxy from holding the audio back until the reply ends.
+        response["X-Accel-Buffering"] = "no"
+        response["Cache-Control"] = "no-cache"
+        return response
+
+
+class VoicePipelineJobCreateView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+    parser_classes = [MultiPartParser, FormParser]
+
+    @swagger_auto_schema(
+        operation_summary="Queue a voice pipeline run",
+        operation_description="Uploads a voice sample and queues the clone + AI reply + TTS pipeline for a background worker. Poll the status endpoint for progress.",
+        request_body=VoicePipelineJobCreateSerializer,
+        responses={202: VoicePipelineJobSerializer(), 400: "Invalid or too short audio sample"}
+    )
+    def post(self, request):
+        serializer = VoicePipelineJobCreateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        try:
+            job = enqueue_pipeline_job(
+                request.user,
+                serializer.validated_data["audio"],
+                serializer.validated_data.get("user_data") or {},
+                serializer.validated_data.get("skip_noise_reduction", True),
+                serializer.validated_data.get("device_id", ""),
+                serializer.validated_data.get("voice_name", ""),
+            )
+        except voice_cloning.MediaProbeError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(VoicePipelineJobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
+
+
+class VoiceQueueStatsView(APIView):
+    permission_classes = [permissions.IsAdminUser]
+
+    @swagger_auto_schema(
+        operation_summary="Voice job queue stats",
+        operation_description="Per subscription tier: due, delayed (retry backoff) and running jobs, the oldest due job's wait, and mean / p95 wait before the first attempt over the last hour.",
+        responses={200: "Stats per tier"}
+    )
+    def get(self, request):
+        return Response(queue_stats())
+
+
+class VoicePipelineJobStatusView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    @swagger_auto_schema(
+        operation_summary="Voice pipeline job status",
+        responses={200: VoicePipelineJobSerializer()}
+    )
+    def get(self, request, job_id):
+        job = get_object_or_404(VoicePipelineJob, job_id=job_id, user=request.user)
+        return Response(VoicePipelineJobSerializer(job).data)
+
+
+class VoicePipelineJobResultView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    @swagger_auto_schema(
+        operation_summary="Voice pipeline job result",
+        operation_description="Returns the generated MP3 once the job has succeeded.",
+        responses={200: "audio/mpeg", 409: "Job has not succeeded (yet)"}
+    )
+    def get(self, request, job_id):
+        job = get_object_or_404(VoicePipelineJob, job_id=job_id, user=request.user)
+        if job.status != VoicePipelineJob.Status.SUCCEEDED:
+            return Response(
+                {"error": f"Job is {job.status}.", "status": job.status},
+                status=status.HTTP_409_CONFLICT
+            )
+        if not os.path.exists(job.result_path):
+            return Response({"error": "Result audio is no longer available."}, status=status.HTTP_410_GONE)
+        return serve_audio_file(request, job.result_path, "audio/mpeg")
+
+
+class GeneratedAudioDownloadView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    @swagger_auto_schema(
+        operation_summary="Download generated audio",
+        operation_description="Returns one of the user's generated audio files. Supports Range requests (206) for seeking and resuming, and If-None-Match (304). Behind nginx/Apache the transfer is handed to the proxy with X-Accel-Redirect / X-Sendfile.",
+        responses={200: "Audio file", 206: "Partial content", 304: "Not modified", 404: "Not found", 410: "Audio is no longer available"}
+    )
+    def get(self, request, audio_id):
+        audio = get_object_or_404(GeneratedAudio, audio_id=audio_id, owner=request.user)
+        if not os.path.exists(audio.path):
+            return Response({"error": "Audio is no longer available."}, status=status.HTTP_410_GONE)
+        GeneratedAudio.objects.filter(pk=audio.pk).update(last_accessed_at=timezone.now())
+        return serve_audio_file(request, audio.path, audio.content_type, etag=audio.content_hash)
+
+
+class VoicePhraseAudioView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    @swagger_auto_schema(
+        operation_summary="Pre-generated greeting / goodbye audio",
+        operation_description="Returns the user's greeting or goodbye (kind: greeting | goodbye) spoken with their current voice, or the voice named by ?voice_name=. The audio is generated in the background when the profile's distinct_greeting / distinct_goodbye or the voice changes, so it is served straight from the media store.",
+        responses={200: "audio/mpeg", 404: "No such phrase", 409: "Audio is not ready yet"}
+    )
+    def get(self, request, kind):
+        kind = kind.upper()
+        if kind not in VoicePhrase.Kind.values:
+            return Response({"error": "Unknown phrase."}, status=status.HTTP_404_NOT_FOUND)
+        voice = current_voice(request.user, request.query_params.get("voice_name") or None)
+        phrase = ready_phrase(request.user, kind, voice) if voice is not None else None
+        if phrase is None or not os.path.exists(phrase.audio.path):
+            return Response({"error": "Audio is not ready yet."}, status=status.HTTP_409_CONFLICT)
+        GeneratedAudio.objects.filter(pk=phrase.audio_id).update(last_accessed_at=timezone.now())
+        return serve_audio_file(request, phrase.audio.path, phrase.audio.content_type, etag=phrase.audio.content_hash)
+
+
+class NoiseProfileCalibrationView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+    parser_classes = [MultiPartParser, FormParser]
+
+    @swagger_auto_schema(
+        operation_summary="Calibrate noise profile",
+        operation_description="Stores a stationary noise profile for the user's recording device from a short room-tone clip. Voice samples later uploaded with the same device_id are denoised against it in a single fast pass.",
+        request_body=NoiseProfileCalibrationSerializer,
+        responses={201: "Noise profile stored", 400: "Audio could not be decoded"}
+    )
+    def post(self, request):
+        serializer = NoiseProfileCalibrationSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        device_id = serializer.validated_data.get("device_id", "")
+        try:
+            voice_cloning.calibrate_noise_profile(serializer.validated_data["audio"].read(), request.user, device_id)
+        except voice_cloning.AudioIngestError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({"message": "Noise profile stored.", "device_id": device_id}, status=status.HTTP_201_CREATED)
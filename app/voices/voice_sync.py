@@ -0,0 +1,63 @@
+import os
+from django.utils import timezone
+
+from app.features.voice_cloning.clients import get_elevenlabs_client
+from app.features.voice_cloning.registry import forget_all_resolved_voices
+from app.voices.models import Voice
+
+VENDOR_PAGE_SIZE = 100
+
+
+def list_vendor_voices():
+    """{voice_id: name} of every voice in the ElevenLabs account, fetched page by page."""
+    client = get_elevenlabs_client()
+    voices = {}
+    page_token = None
+    while True:
+        page = client.voices.search(page_size=VENDOR_PAGE_SIZE, next_page_token=page_token)
+        voices.update({voice.voice_id: voice.name for voice in page.voices})
+        page_token = page.next_page_token
+        if not page.has_more or not page_token:
+            return voices
+
+
+def sync_voices(vendor_voices=None):
+    """
+    Reconcile the Voice table with the vendor account in bulk: voices deleted at the
+    vendor become MISSING, voices that reappeared (or finished cloning) become READY,
+    and the shared ELEVENLABS_VOICE_ID voice is added if it isn't tracked yet.
+
+    Returns:
+        dict: How many voices were marked missing, ready and created.
+    """
+    vendor_voices = list_vendor_voices() if vendor_voices is None else vendor_voices
+    if not vendor_voices:
+        # An empty listing is far more likely an account/key problem than every voice being deleted.
+        return {"missing": 0, "ready": 0, "created": 0}
+
+    now = timezone.now()
+    missing = (
+        Voice.objects
+        .filter(status=Voice.Status.READY)
+        .exclude(voice_id__in=vendor_voices)
+        .update(status=Voice.Status.MISSING, synced_at=now)
+    )
+    ready = (
+        Voice.objects
+        .filter(status__in=[Voice.Status.PENDING, Voice.Status.MISSING], voice_id__in=vendor_voices)
+        .update(status=Voice.Status.READY, synced_at=now)
+    )
+    Voice.objects.filter(voice_id__in=vendor_voices).update(synced_at=now)
+
+    created = 0
+    default_voice_id = os.getenv("ELEVENLABS_VOICE_ID")
+    if default_voice_id in vendor_voices:
+        _, created = Voice.objects.get_or_create(
+            owner=None,
+            voice_id=default_voice_id,
+            defaults={"name": vendor_voices[default_voice_id], "synced_at": now},
+        )
+
+    if missing or ready or created:
+        forget_all_resolved_voices()
+    return {"missing": missing, "ready": ready, "created": int(created)}
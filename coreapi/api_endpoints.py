@@ -8,6 +8,7 @@ from app.accounts.views import password_management_view as password_views
 from app.dashboard import views as admin_views
 from app.subscribtions import views as subscriptions_view
 from app.stripe import views as stripe_view
+from app.voices import views as voice_views
 urlpatterns = [
     # your existing URLs
     path("sign-up/",user_views.UserSignupView.as_view()),
@@ -30,6 +31,15 @@ urlpatterns = [
     path("contact-us/",admin_views.contact_us,name="contact-us+help-and-support"),
     path('privacy-policy/', admin_views.PrivacyPolicyView.as_view(), name='privacy-policy'),
     path('terms-and-conditions/', admin_views.TermsConditionsView.as_view(), name='terms-and-conditions'),
+    # 
+    path("voice/reply/stream/",voice_views.VoiceReplyStreamView.as_view(),name="voice_reply_stream"),
+    path("voice/jobs/",voice_views.VoicePipelineJobCreateView.as_view(),name="voice_job_create"),
+    path("voice/jobs/stats/",voice_views.VoiceQueueStatsView.as_view(),name="voice_job_stats"),
+    path("voice/jobs/<str:job_id>/",voice_views.VoicePipelineJobStatusView.as_view(),name="voice_job_status"),
+    path("voice/jobs/<str:job_id>/result/",voice_views.VoicePipelineJobResultView.as_view(),name="voice_job_result"),
+    path("voice/audio/<str:audio_id>/",voice_views.GeneratedAudioDownloadView.as_view(),name="voice_audio_download"),
+    path("voice/phrases/<str:kind>/",voice_views.VoicePhraseAudioView.as_view(),name="voice_phrase_audio"),
+    path("voice/noise-profile/",voice_views.NoiseProfileCalibrationView.as_view(),name="voice_noise_profile"),
 ]
 
 if settings.DEBUG:
@@ -6,15 +6,22 @@ source /opt/env/bin/activate
 # Wait for DB (optional)
 # ./wait-for-it.sh db:5432 -- echo "Database is up"
 
-# Run based on DEBUG value
-if [ "$DEBUG" = "true" ]; then
+# Run based on PROCESS_TYPE / DEBUG value
+if [ "$PROCESS_TYPE" = "voice-worker" ]; then
+    echo "Running voice pipeline worker"
+    python manage.py run_voice_worker
+elif [ "$PROCESS_TYPE" = "realtime" ]; then
+    echo "Running real-time voice conversation server (ASGI)"
+    uvicorn _core.asgi:application \
+        --host 0.0.0.0 \
+        --port 8001 \
+        --workers 2 \
+        --log-level info
+elif [ "$DEBUG" = "true" ]; then
     echo "Running in development mode"
     python manage.py runserver 0.0.0.0:8000
 else
     echo "Running in production mode with Gunicorn"
-    gunicorn _core.wsgi:application \
-        --bind 0.0.0.0:8000 \
-        --workers 4 \
-        --timeout 120 \
-        --log-level info
+    # Workers, preload/warm-up, max_requests etc. are set in gunicorn.conf.py
+    gunicorn -c gunicorn.conf.py _core.wsgi:application
 fi
@@ -0,0 +1,59 @@
+"""
+Gunicorn configuration for the Tether API:
+
+    gunicorn -c gunicorn.conf.py _core.wsgi:application
+
+The app is loaded once in the master (preload_app) and warmed up there
+(_core.warmup), then gc.freeze() moves every object created so far out of the
+collector's reach. Forked workers therefore share those pages copy-on-write
+instead of each importing Django, the apps and the voice libraries, and the
+first requests after a deploy don't pay for imports.
+
+Every setting can be overridden from the environment (GUNICORN_*).
+"""
+import gc
+import os
+
+cpu_count = os.cpu_count() or 1
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8000")
+
+# Streaming replies hold a request open for seconds while mostly waiting on the
+# vendors, so concurrency comes from threads; processes scale with the CPUs.
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "gthread")
+workers = int(os.getenv("GUNICORN_WORKERS", 0)) or (
+    cpu_count + 1 if worker_class == "gthread" else 2 * cpu_count + 1
+)
+threads = int(os.getenv("GUNICORN_THREADS", 4))
+
+preload_app = os.getenv("GUNICORN_PRELOAD", "true").lower() != "false"
+warmup_voice = os.getenv("GUNICORN_WARMUP_VOICE", "true").lower() != "false"
+
+# Recycle workers to cap slow leaks; the jitter keeps them from restarting together.
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", 1000))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", max_requests // 10))
+
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 120))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", 30))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", 5))
+loglevel = os.getenv("GUNICORN_LOG_LEVEL", "info")
+accesslog = "-"
+
+
+def when_ready(server):
+    # Runs in the master after the app is loaded and before the first fork.
+    if not preload_app:
+        return
+    from _core.warmup import warm_up
+
+    timings = warm_up(voice=warmup_voice, log=server.log.warning)
+    server.log.info("Warm-up done: " + ", ".join(f"{name} {seconds:.2f}s" for name, seconds in timings.items()))
+
+    # Later collections in the workers would touch (and so copy) every shared page.
+    gc.collect()
+    gc.freeze()
+    server.log.info(f"Froze {gc.get_freeze_count()} objects before forking {workers} workers.")
+
+
+def post_fork(server, worker):
+    server.log.info(f"Worker {worker.pid} started ({worker_class}, {threads} threads).")